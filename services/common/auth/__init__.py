@@ -1,4 +1,11 @@
 from .models import User
 from .dependencies import create_get_current_user, create_get_current_user_optional
+from .jwks import init_jwks, shutdown_jwks
 
-__all__ = ["User", "create_get_current_user", "create_get_current_user_optional"]
+__all__ = [
+    "User",
+    "create_get_current_user",
+    "create_get_current_user_optional",
+    "init_jwks",
+    "shutdown_jwks",
+]
@@ -1,44 +1,206 @@
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from typing import Optional
+
+import httpx
 import jwt
-from jwt import PyJWKClient, PyJWKClientError
+from jwt import PyJWK, PyJWKClientError, PyJWKSet
+from jwt.exceptions import PyJWKClientConnectionError, PyJWKSetError
 from fastapi import HTTPException, status
 
 log = logging.getLogger(__name__)
 
-_jwk_client: Optional[PyJWKClient] = None
-_jwks_url: Optional[str] = None
+ALGORITHMS = ["RS256", "ES256"]
 
 
-def get_jwk_client(supabase_url: str) -> PyJWKClient:
-    global _jwk_client, _jwks_url
+class JWKSManager:
+    def __init__(
+        self,
+        jwks_url: str,
+        lifespan: int = 3600,
+        refresh_margin: int = 300,
+        min_refresh_interval: int = 30,
+    ):
+        self.jwks_url = jwks_url
+        self.lifespan = lifespan
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
 
-    jwks_url = f"{supabase_url}/auth/v1/.well-known/jwks.json"
+    async def start(self) -> None:
+        log.info(f"Starting JWKS refresh for {self.jwks_url}")
+        try:
+            await self.refresh()
+        except PyJWKClientError as e:
+            log.warning(f"Initial JWKS fetch failed: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
 
-    if _jwk_client is None or _jwks_url != jwks_url:
-        log.info(f"Initializing PyJWKClient with {jwks_url}")
-        _jwk_client = PyJWKClient(
-            jwks_url,
-            cache_keys=True,
-            max_cached_keys=16,
-            cache_jwk_set=True,
-            lifespan=3600,
-        )
-        _jwks_url = jwks_url
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+        log.info("JWKS refresh stopped")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(
+                max(
+                    self._fetched_at
+                    + self.lifespan
+                    - self.refresh_margin
+                    - time.time(),
+                    0,
+                )
+            )
+            try:
+                await self.refresh()
+            except PyJWKClientError as e:
+                log.warning(f"JWKS refresh failed: {e}. Retrying in 5 seconds...")
+                await asyncio.sleep(5)
+
+    async def refresh(self) -> None:
+        fetched_at = self._fetched_at
+        async with self._lock:
+            # another caller refreshed while we waited for the lock
+            if self._fetched_at != fetched_at:
+                return
+
+            try:
+                async with httpx.AsyncClient(timeout=10) as client:
+                    response = await client.get(self.jwks_url)
+                    response.raise_for_status()
+                    jwk_set = PyJWKSet.from_dict(response.json())
+            except httpx.HTTPError as e:
+                raise PyJWKClientConnectionError(
+                    f'Fail to fetch data from the url, err: "{e}"'
+                )
+            except (
+                PyJWKSetError,
+                ValueError,
+                KeyError,
+                TypeError,
+                AttributeError,
+            ) as e:
+                # also covers non-JSON bodies, e.g. a proxy error page
+                raise PyJWKClientError(f"Invalid JWKS response: {e}")
+
+            self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+            self._fetched_at = time.time()
+            log.info(f"Fetched {len(self._keys)} signing keys from {self.jwks_url}")
+
+    async def get_signing_key(self, kid: str) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # unknown kid usually means keys were rotated; bound refetches so
+        # forged kids can't hammer the JWKS endpoint
+        if time.time() - self._fetched_at >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise PyJWKClientError(
+                f'Unable to find a signing key that matches: "{kid}"'
+            )
+
+        return key
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        payload, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+
+        key = self._key(token)
+        self._entries[key] = (payload, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
 
-    return _jwk_client
+
+_jwks_manager: Optional[JWKSManager] = None
+_token_cache = VerifiedTokenCache()
+
+
+def get_jwks_url(supabase_url: str) -> str:
+    return f"{supabase_url}/auth/v1/.well-known/jwks.json"
+
+
+def get_jwks_manager(supabase_url: str) -> JWKSManager:
+    global _jwks_manager
+
+    jwks_url = get_jwks_url(supabase_url)
+
+    if _jwks_manager is None or _jwks_manager.jwks_url != jwks_url:
+        log.info(f"Initializing JWKS manager with {jwks_url}")
+        _jwks_manager = JWKSManager(jwks_url)
+
+    return _jwks_manager
+
+
+async def init_jwks(supabase_url: str) -> None:
+    await get_jwks_manager(supabase_url).start()
+
+
+async def shutdown_jwks() -> None:
+    global _jwks_manager
+
+    if _jwks_manager:
+        await _jwks_manager.stop()
+
+    _jwks_manager = None
 
 
 async def verify_jwt_with_jwks(token: str, supabase_url: str) -> dict:
-    try:
-        jwk_client = get_jwk_client(supabase_url)
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
 
-        signing_key = jwk_client.get_signing_key_from_jwt(token)
+    try:
+        header = jwt.get_unverified_header(token)
+        signing_key = await get_jwks_manager(supabase_url).get_signing_key(
+            header.get("kid")
+        )
 
         payload = jwt.decode(
             token,
             signing_key.key,
-            algorithms=["RS256", "ES256"],
+            algorithms=ALGORITHMS,
             options={
                 "verify_signature": True,
                 "verify_aud": False,
@@ -46,6 +208,8 @@ async def verify_jwt_with_jwks(token: str, supabase_url: str) -> dict:
             },
         )
 
+        _token_cache.put(token, payload)
+
         return payload
     except PyJWKClientError as e:
         log.error(f"JWKS client error: {e}")
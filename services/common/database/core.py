@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
 )
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
 
 from .config import config
@@ -17,14 +18,25 @@ class Base(DeclarativeBase):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
 
+def pool_options(url: str) -> dict:
+    # in-memory SQLite (tests) runs on one static connection without a queue
+    database_url = make_url(url)
+    in_memory = database_url.database in (None, "", ":memory:")
+    if database_url.get_backend_name() == "sqlite" and in_memory:
+        return {}
+    return {
+        "pool_size": config.DATABASE_POOL_SIZE,
+        "max_overflow": config.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": config.DATABASE_POOL_TIMEOUT,
+    }
+
+
 engine = create_async_engine(
     config.DATABASE_URL,
     echo=config.DATABASE_ECHO,
-    pool_size=config.DATABASE_POOL_SIZE,
-    max_overflow=config.DATABASE_MAX_OVERFLOW,
-    pool_timeout=config.DATABASE_POOL_TIMEOUT,
     pool_recycle=config.DATABASE_POOL_RECYCLE,
     pool_pre_ping=True,
+    **pool_options(config.DATABASE_URL),
 )
 
 async_session_maker = async_sessionmaker(
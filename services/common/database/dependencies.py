@@ -3,9 +3,17 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
+from .core import async_session_maker
+
 
 async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    session: AsyncSession = request.state.db
+    # DatabaseMiddleware commits or rolls back and closes the session
+    if not hasattr(request.state, "db"):
+        raise RuntimeError("get_db requires DatabaseMiddleware")
+    session: AsyncSession | None = request.state.db
+    if session is None:
+        session = async_session_maker()
+        request.state.db = session
     try:
         yield session
     finally:
@@ -1,31 +1,40 @@
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
-
-from .core import async_session_maker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 log = logging.getLogger(__name__)
 
 
-class DatabaseMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        async with async_session_maker() as session:
-            request.state.db = session
-            try:
-                response = await call_next(request)
+class DatabaseMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # get_db opens the session on first use and stores it here
+        state = scope.setdefault("state", {})
+        state["db"] = None
 
-                if response.status_code < 400:
+        async def send_wrapper(message: Message) -> None:
+            session = state.get("db")
+            if message["type"] == "http.response.start" and session is not None:
+                if message["status"] < 400:
                     await session.commit()
                 else:
                     await session.rollback()
+            await send(message)
 
-                return response
-            except Exception as e:
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            session = state.get("db")
+            if session is not None:
                 await session.rollback()
                 log.error(f"database error: {e}")
-                raise
-            finally:
+            raise
+        finally:
+            session = state.pop("db", None)
+            if session is not None:
                 await session.close()
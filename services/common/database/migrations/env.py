@@ -17,7 +17,7 @@ from services.common.database.core import Base  # noqa: E402
 
 # import all models here
 from services.core.app.recast.models import RecastTemplate  # noqa
-from services.core.app.pipelines.models import Pipeline  # noqa
+from services.core.app.pipelines.models import Pipeline, PipelineOutboxMessage  # noqa
 
 config = context.config
 
@@ -0,0 +1,23 @@
+"""add preview_url to pipelines
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("pipelines", sa.Column("preview_url", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("pipelines", "preview_url")
@@ -4,5 +4,35 @@ from enum import Enum
 class PipelineStatus(str, Enum):
     PENDING = "PENDING"
     RUNNING = "RUNNING"
+    PREVIEW = "PREVIEW"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    EXPIRED = "EXPIRED"
+    CANCELLED = "CANCELLED"
+
+    @property
+    def is_terminal(self) -> bool:
+        return self in (
+            PipelineStatus.COMPLETED,
+            PipelineStatus.FAILED,
+            PipelineStatus.EXPIRED,
+            PipelineStatus.CANCELLED,
+        )
+
+    @property
+    def rank(self) -> int:
+        return _STATUS_RANKS[self]
+
+    def can_transition_to(self, status: "PipelineStatus") -> bool:
+        return not self.is_terminal and status.rank >= self.rank
+
+
+_STATUS_RANKS = {
+    PipelineStatus.PENDING: 0,
+    PipelineStatus.RUNNING: 1,
+    PipelineStatus.PREVIEW: 2,
+    PipelineStatus.COMPLETED: 3,
+    PipelineStatus.FAILED: 3,
+    PipelineStatus.EXPIRED: 3,
+    PipelineStatus.CANCELLED: 3,
+}
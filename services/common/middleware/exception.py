@@ -1,6 +1,4 @@
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import StreamingResponse
-from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import ValidationError
 from fastapi.responses import JSONResponse
 from fastapi import status
@@ -10,29 +8,45 @@ import logging
 log = logging.getLogger(__name__)
 
 
-class ExceptionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> StreamingResponse:
+class ExceptionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            response = await call_next(request)
-        except ValidationError as e:
-            log.exception(e)
-            response = JSONResponse(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                content={"message": e.errors()},
-            )
-        except ValueError as e:
-            log.exception(e)
-            response = JSONResponse(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                content={"message": str(e)},
-            )
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
+            # headers already went out, nothing left to replace
+            if response_started:
+                raise
             log.exception(e)
-            response = JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"message": str(e)},
-            )
+            await error_response(e)(scope, receive, send_wrapper)
+
 
-        return response
+def error_response(e: Exception) -> JSONResponse:
+    if isinstance(e, ValidationError):
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"message": e.errors()},
+        )
+    if isinstance(e, ValueError):
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"message": str(e)},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"message": str(e)},
+    )
@@ -1,8 +1,8 @@
 import logging
 import json
 import asyncio
-from typing import Callable, Awaitable, Any, Dict, Set
-from aio_pika.abc import AbstractIncomingMessage
+from typing import Callable, Awaitable, Any, Dict, List, Set
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
 
 from .connection import RabbitMQConnection
 from .config import RabbitMQConfig
@@ -24,6 +24,8 @@ class RabbitMQConsumer:
         self._consumer_task: asyncio.Task | None = None
         self._background_tasks: Set[asyncio.Task] = set()
         self._semaphore = asyncio.Semaphore(max_concurrent_tasks)
+        self._batch_channel: AbstractChannel | None = None
+        self._flush_batch: Callable[[], Awaitable[None]] | None = None
 
     async def consume(
         self,
@@ -72,6 +74,96 @@ class RabbitMQConsumer:
         self._consumer_task = asyncio.create_task(queue.consume(process_message))
         log.info(f"Consumer started for queue: {queue_name}")
 
+    async def consume_batch(
+        self,
+        queue_name: str,
+        callback: Callable[[List[Any]], Awaitable[None]],
+        max_batch_size: int = 100,
+        max_wait_ms: int = 50,
+        validate: Callable[[Dict[str, Any]], Any] | None = None,
+    ) -> None:
+        if not self.connection.connection:
+            raise RuntimeError("Connection not initialized")
+
+        log.info(
+            f"Starting batch consumer for queue: {queue_name} "
+            f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})"
+        )
+
+        # dedicated channel, so the prefetch window can hold a full batch
+        # while the previous one is being flushed
+        self._batch_channel = await self.connection.connection.channel()
+        await self._batch_channel.set_qos(prefetch_count=max_batch_size * 2)
+        queue = await self._batch_channel.get_queue(queue_name)
+
+        # items are None for messages that failed to parse or validate
+        batch: List[tuple[AbstractIncomingMessage, Any]] = []
+        flush_lock = asyncio.Lock()
+
+        async def flush() -> None:
+            nonlocal batch
+
+            async with flush_lock:
+                if not batch:
+                    return
+                pending, batch = batch, []
+
+                # dropped messages are settled on their own first, so the
+                # multiple-ack below never covers them
+                for message, item in pending:
+                    if item is None:
+                        await message.reject(requeue=False)
+                items = [
+                    (message, item) for message, item in pending if item is not None
+                ]
+                if not items:
+                    return
+
+                # deliveries on this channel are settled strictly in order,
+                # so one multiple-ack settles the whole batch
+                last_message = items[-1][0]
+                try:
+                    await callback([item for _, item in items])
+                    await last_message.ack(multiple=True)
+                    log.info(f"Processed batch of {len(items)} from {queue_name}")
+                except Exception as e:
+                    await last_message.nack(multiple=True, requeue=True)
+                    log.error(
+                        f"Error processing batch of {len(items)} from {queue_name}: {e}",
+                        exc_info=True,
+                    )
+
+        async def flush_after_wait() -> None:
+            await asyncio.sleep(max_wait_ms / 1000)
+            await flush()
+
+        def schedule(coro: Awaitable[None]) -> None:
+            task = asyncio.create_task(coro)
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+        async def process_message(message: AbstractIncomingMessage) -> None:
+            # nothing is awaited before the append, so the batch keeps
+            # delivery order
+            try:
+                item = json.loads(message.body.decode())
+                if validate is not None:
+                    item = validate(item)
+            except Exception as e:
+                log.error(f"Dropping invalid message from {queue_name}: {e}")
+                item = None
+
+            batch.append((message, item))
+
+            if len(batch) >= max_batch_size:
+                schedule(flush())
+            elif len(batch) == 1:
+                schedule(flush_after_wait())
+
+        self._flush_batch = flush
+        self._consumer_task = asyncio.create_task(queue.consume(process_message))
+        log.info(f"Batch consumer started for queue: {queue_name}")
+
     async def stop(self) -> None:
         if self._consumer_task:
             self._consumer_task.cancel()
@@ -86,4 +178,11 @@ class RabbitMQConsumer:
             )
             await asyncio.gather(*self._background_tasks, return_exceptions=True)
 
+        if self._flush_batch:
+            await self._flush_batch()
+
+        if self._batch_channel:
+            await self._batch_channel.close()
+            self._batch_channel = None
+
         log.info("Consumer stopped")
@@ -1,6 +1,7 @@
+import asyncio
 import logging
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List
 from aio_pika import Message, DeliveryMode
 
 from .connection import RabbitMQConnection
@@ -41,3 +42,38 @@ class RabbitMQPublisher:
         )
 
         log.info(f"Message published to {routing_key}")
+
+    async def publish_many(
+        self,
+        routing_key: str,
+        messages: List[Dict[str, Any]],
+        expirations: List[float | None] | None = None,
+    ) -> None:
+        if not self.connection.channel:
+            raise RuntimeError("Channel not initialized")
+
+        exchange = await self.connection.channel.get_exchange(self.config.exchange)
+
+        log.info(f"Publishing {len(messages)} messages to {routing_key}")
+
+        # seconds until the broker drops each message, None keeps it queued
+        expirations = expirations or [None] * len(messages)
+
+        # confirms are awaited together instead of one round trip per message
+        await asyncio.gather(
+            *(
+                exchange.publish(
+                    Message(
+                        body=json.dumps(message).encode(),
+                        delivery_mode=DeliveryMode.PERSISTENT,
+                        content_type="application/json",
+                        expiration=expiration,
+                    ),
+                    routing_key=routing_key,
+                    timeout=self.config.publish_confirm_timeout,
+                )
+                for message, expiration in zip(messages, expirations)
+            )
+        )
+
+        log.info(f"{len(messages)} messages published to {routing_key}")
@@ -1,10 +1,19 @@
 from .client import get_redis_client, close_redis_client
-from .rate_limit import check_rate_limit, RateLimitExceeded, rate_limit
+from .cancellation import get_cancelled_pipelines, mark_pipelines_cancelled
+from .rate_limit import (
+    check_rate_limit,
+    RateLimitAlgorithm,
+    RateLimitExceeded,
+    rate_limit,
+)
 
 __all__ = [
     "get_redis_client",
     "check_rate_limit",
+    "RateLimitAlgorithm",
     "RateLimitExceeded",
     "rate_limit",
     "close_redis_client",
+    "get_cancelled_pipelines",
+    "mark_pipelines_cancelled",
 ]
@@ -0,0 +1,30 @@
+import time
+from uuid import UUID
+
+from .client import get_redis_client
+
+CANCELLED_PIPELINES_KEY = "pipelines:cancelled"
+
+
+async def mark_pipelines_cancelled(
+    pipeline_ids: list[UUID | str], ttl_seconds: int
+) -> None:
+    if not pipeline_ids:
+        return
+
+    # scored by cancel time, so entries no job can still be waiting on get pruned
+    now = time.time()
+    redis_client = await get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zadd(CANCELLED_PIPELINES_KEY, {str(pid): now for pid in pipeline_ids})
+        pipe.zremrangebyscore(CANCELLED_PIPELINES_KEY, "-inf", now - ttl_seconds)
+        await pipe.execute()
+
+
+async def get_cancelled_pipelines(pipeline_ids: list[str]) -> set[str]:
+    if not pipeline_ids:
+        return set()
+
+    redis_client = await get_redis_client()
+    scores = await redis_client.zmscore(CANCELLED_PIPELINES_KEY, pipeline_ids)
+    return {pid for pid, score in zip(pipeline_ids, scores) if score is not None}
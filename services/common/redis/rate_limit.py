@@ -1,12 +1,113 @@
 import logging
-from typing import Callable, Any
-from fastapi import HTTPException, status, Depends
+import math
+from enum import Enum
+from typing import Awaitable, Callable, Any
+from uuid import uuid4
+
+from fastapi import HTTPException, Request, status, Depends
 
 from .client import get_redis_client
 
 log = logging.getLogger(__name__)
 
 
+class RateLimitAlgorithm(str, Enum):
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_WINDOW = "sliding_window"
+    TOKEN_BUCKET = "token_bucket"
+
+
+# All scripts take KEYS[1] = bucket key and
+# ARGV = limit (including burst), window_ms, cost, member token, refill limit,
+# and return {allowed, remaining, retry_after_ms}.
+# Time comes from the Redis server so replicas share one clock.
+
+_FIXED_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if current + cost > limit then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl < 0 then
+        ttl = window_ms
+    end
+    return {0, limit - current, ttl}
+end
+
+local count = redis.call('INCRBY', KEYS[1], cost)
+if count == cost or redis.call('PTTL', KEYS[1]) < 0 then
+    redis.call('PEXPIRE', KEYS[1], window_ms)
+end
+return {1, limit - count, 0}
+"""
+
+_SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window_ms)
+local count = redis.call('ZCARD', KEYS[1])
+
+if count + cost > limit then
+    local retry_after = window_ms
+    local index = count + cost - limit - 1
+    if index < count then
+        local entry = redis.call('ZRANGE', KEYS[1], index, index, 'WITHSCORES')
+        retry_after = tonumber(entry[2]) + window_ms - now
+    end
+    return {0, limit - count, math.max(retry_after, 1)}
+end
+
+for i = 1, cost do
+    redis.call('ZADD', KEYS[1], now, ARGV[4] .. ':' .. i)
+end
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return {1, limit - count - cost, 0}
+"""
+
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local rate = tonumber(ARGV[5]) / window_ms
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+_SCRIPTS = {
+    RateLimitAlgorithm.FIXED_WINDOW: _FIXED_WINDOW_SCRIPT,
+    RateLimitAlgorithm.SLIDING_WINDOW: _SLIDING_WINDOW_SCRIPT,
+    RateLimitAlgorithm.TOKEN_BUCKET: _TOKEN_BUCKET_SCRIPT,
+}
+
+_registered_scripts: dict[RateLimitAlgorithm, Any] = {}
+
+
 class RateLimitExceeded(HTTPException):
     def __init__(self, retry_after: int = 60):
         super().__init__(
@@ -20,31 +121,33 @@ async def check_rate_limit(
     key: str,
     limit: int,
     window_seconds: int = 60,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+    burst: int = 0,
+    cost: int = 1,
 ) -> None:
     redis_client = await get_redis_client()
 
-    current = await redis_client.get(key)
-
-    if current is None:
-        await redis_client.setex(key, window_seconds, 1)
-        log.debug(f"Rate limit initialized for {key}: 1/{limit}")
-        return
-
-    current_count = int(current)
-
-    if current_count >= limit:
-        ttl = await redis_client.ttl(key)
-        log.warning(f"Rate limit exceeded for {key}: {current_count}/{limit}")
-        raise RateLimitExceeded(retry_after=max(ttl, 1))
-
-    new_count = await redis_client.incr(key)
-    ttl = await redis_client.ttl(key)
-
-    if ttl == -1:
-        await redis_client.expire(key, window_seconds)
-        log.warning(f"Rate limit key {key} had no TTL, set to {window_seconds}s")
+    script = _registered_scripts.get(algorithm)
+    if script is None:
+        # evaluated with EVALSHA, falling back to EVAL after a SCRIPT FLUSH
+        script = redis_client.register_script(_SCRIPTS[algorithm])
+        _registered_scripts[algorithm] = script
+
+    allowed, remaining, retry_after_ms = await script(
+        keys=[key],
+        args=[limit + burst, window_seconds * 1000, cost, uuid4().hex, limit],
+        client=redis_client,
+    )
+
+    if not allowed:
+        log.warning(
+            f"Rate limit exceeded for {key}: cost={cost}, remaining={remaining}/{limit + burst}"
+        )
+        raise RateLimitExceeded(
+            retry_after=max(math.ceil(int(retry_after_ms) / 1000), 1)
+        )
 
-    log.debug(f"Rate limit checked for {key}: {new_count}/{limit}")
+    log.debug(f"Rate limit checked for {key}: remaining={remaining}/{limit + burst}")
 
 
 def rate_limit(
@@ -53,8 +156,13 @@ def rate_limit(
     window_seconds: int = 60,
     get_current_user: Callable | None = None,
     test_user_email: str | None = None,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+    burst: int = 0,
+    cost: Callable[[Request], Awaitable[int]] | None = None,
 ) -> Callable:
-    async def dependency(current_user: Any = Depends(get_current_user)) -> None:
+    async def dependency(
+        request: Request, current_user: Any = Depends(get_current_user)
+    ) -> None:
         user_email = getattr(current_user, "email", None)
         user_id = getattr(current_user, "id", "anonymous")
 
@@ -66,9 +174,12 @@ def rate_limit(
             )
 
         await check_rate_limit(
-            key=f"{prefix}:{user_id}",
+            key=f"{prefix}:{algorithm.value}:{user_id}",
             limit=effective_limit,
             window_seconds=window_seconds,
+            algorithm=algorithm,
+            burst=burst,
+            cost=await cost(request) if cost else 1,
         )
 
     return dependency
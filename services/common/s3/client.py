@@ -1,27 +1,39 @@
 import io
 import os
 import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator
 from uuid import uuid4
 
 import aioboto3
-from botocore.config import Config as BotoConfig
+from aiobotocore.config import AioConfig
+from botocore.exceptions import ClientError
 
 from .config import config
 
 log = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 512 * 1024
+# S3 rejects multipart parts under 5 MiB, except the last one
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
 
 class S3Client:
     def __init__(self):
-        self.boto_config = BotoConfig(
+        self.boto_config = AioConfig(
             region_name=config.S3_REGION,
             connect_timeout=30,
             read_timeout=60,
             retries={"max_attempts": 5, "mode": "adaptive"},
+            max_pool_connections=config.S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connector_args={"keepalive_timeout": config.S3_KEEPALIVE_TIMEOUT_SECONDS},
         )
         self.session = aioboto3.Session()
+        self._client = None
+        self._exit_stack: AsyncExitStack | None = None
 
-    async def _get_client(self):
+    def _create_client(self):
         return self.session.client(
             "s3",
             aws_access_key_id=config.S3_ACCESS_KEY_ID,
@@ -30,6 +42,33 @@ class S3Client:
             config=self.boto_config,
         )
 
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(self._create_client())
+        log.info(
+            f"S3 client started: {config.S3_ENDPOINT}, max_pool_connections={config.S3_MAX_POOL_CONNECTIONS}"
+        )
+
+    async def close(self) -> None:
+        if self._exit_stack:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+        log.info("S3 client closed")
+
+    @asynccontextmanager
+    async def _get_client(self):
+        # started clients share one connection pool; otherwise open one per call
+        if self._client is not None:
+            yield self._client
+            return
+
+        async with self._create_client() as s3:
+            yield s3
+
     async def upload_file(
         self,
         data_bytes: bytes,
@@ -37,39 +76,176 @@ class S3Client:
         s3_folder: str,
         file_extension: str,
         file_name: str | None = None,
+        content_type: str | None = None,
     ) -> str:
-        async with await self._get_client() as s3:
+        async with self._get_client() as s3:
             file = io.BytesIO(data_bytes)
             file_name = file_name or uuid4().hex
             s3_key = f"{s3_folder}/{file_name}.{file_extension}"
-            await s3.upload_fileobj(Bucket=s3_bucket, Key=s3_key, Fileobj=file)
-            return f"{config.S3_PUBLIC_BUCKETS_ENDPOINT}/{s3_bucket}/{s3_key}"
+            extra_args = {"ContentType": content_type} if content_type else None
+            await s3.upload_fileobj(
+                Bucket=s3_bucket, Key=s3_key, Fileobj=file, ExtraArgs=extra_args
+            )
+            return self.public_url(s3_bucket, s3_key)
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        s3_bucket: str,
+        s3_key: str,
+        content_type: str,
+        part_size: int = MULTIPART_PART_SIZE,
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        # small objects go up in one put; larger ones as a multipart upload
+        # whose parts are sent while the rest is still being produced
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+        object_args = {"ContentType": content_type, "Metadata": metadata or {}}
+
+        async with self._get_client() as s3:
+            try:
+                async for chunk in chunks:
+                    buffer += chunk
+                    if len(buffer) < part_size:
+                        continue
+                    if upload_id is None:
+                        response = await s3.create_multipart_upload(
+                            Bucket=s3_bucket, Key=s3_key, **object_args
+                        )
+                        upload_id = response["UploadId"]
+                    parts.append(
+                        await self._upload_part(
+                            s3, s3_bucket, s3_key, upload_id, len(parts) + 1, buffer
+                        )
+                    )
+                    buffer = bytearray()
+
+                if upload_id is None:
+                    await s3.put_object(
+                        Bucket=s3_bucket,
+                        Key=s3_key,
+                        Body=bytes(buffer),
+                        **object_args,
+                    )
+                else:
+                    if buffer:
+                        parts.append(
+                            await self._upload_part(
+                                s3, s3_bucket, s3_key, upload_id, len(parts) + 1, buffer
+                            )
+                        )
+                    await s3.complete_multipart_upload(
+                        Bucket=s3_bucket,
+                        Key=s3_key,
+                        UploadId=upload_id,
+                        MultipartUpload={"Parts": parts},
+                    )
+            except Exception:
+                if upload_id is not None:
+                    await s3.abort_multipart_upload(
+                        Bucket=s3_bucket, Key=s3_key, UploadId=upload_id
+                    )
+                raise
+
+        return self.public_url(s3_bucket, s3_key)
+
+    @staticmethod
+    async def _upload_part(
+        s3, s3_bucket: str, s3_key: str, upload_id: str, number: int, data: bytearray
+    ) -> dict:
+        response = await s3.upload_part(
+            Bucket=s3_bucket,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=bytes(data),
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    @staticmethod
+    def public_url(s3_bucket: str, s3_key: str) -> str:
+        return f"{config.S3_PUBLIC_BUCKETS_ENDPOINT}/{s3_bucket}/{s3_key}"
+
+    async def head_file(self, s3_bucket: str, s3_key: str) -> dict:
+        async with self._get_client() as s3:
+            return await s3.head_object(Bucket=s3_bucket, Key=s3_key)
+
+    async def download_range(
+        self,
+        s3_bucket: str,
+        s3_key: str,
+        start: int,
+        end: int,
+        etag: str | None = None,
+    ) -> bytes:
+        kwargs = {}
+        if etag:
+            kwargs["IfMatch"] = '"' + etag.strip('"') + '"'
+        async with self._get_client() as s3:
+            response = await s3.get_object(
+                Bucket=s3_bucket, Key=s3_key, Range=f"bytes={start}-{end}", **kwargs
+            )
+            return await response["Body"].read()
+
+    async def file_exists(self, s3_bucket: str, s3_key: str) -> bool:
+        async with self._get_client() as s3:
+            try:
+                await s3.head_object(Bucket=s3_bucket, Key=s3_key)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                    return False
+                raise
+            return True
+
+    @asynccontextmanager
+    async def _get_object(self, s3_bucket: str, s3_key: str):
+        async with self._get_client() as s3:
+            yield await s3.get_object(Bucket=s3_bucket, Key=s3_key)
+
+    async def _read_body(self, s3_key: str, response: dict, write) -> None:
+        total = response["ContentLength"]
+        downloaded = 0
+        last_log = 0
+
+        while True:
+            chunk = await response["Body"].read(DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            write(chunk)
+            downloaded += len(chunk)
+            progress = int(downloaded / total * 100)
+            if progress - last_log >= 10:
+                log.info(f"{s3_key}: {progress}%")
+                last_log = progress
 
     async def _download_to_file(self, s3_bucket: str, s3_key: str, file):
-        async with await self._get_client() as s3:
-            response = await s3.get_object(Bucket=s3_bucket, Key=s3_key)
-            total = response["ContentLength"]
-            chunk_size = 512 * 1024
-            downloaded = 0
-            last_log = 0
-
-            while True:
-                chunk = await response["Body"].read(chunk_size)
-                if not chunk:
-                    break
-                file.write(chunk)
-                downloaded += len(chunk)
-                progress = int(downloaded / total * 100)
-                if progress - last_log >= 10:
-                    log.info(f"{s3_key}: {progress}%")
-                    last_log = progress
+        async with self._get_object(s3_bucket, s3_key) as response:
+            await self._read_body(s3_key, response, file.write)
 
     async def download_file(self, s3_bucket: str, s3_key: str) -> bytes:
         file = io.BytesIO()
         await self._download_to_file(s3_bucket, s3_key, file)
+        # shares the buffer instead of copying it like seek and read
+        return file.getvalue()
+
+    async def download_buffer(self, s3_bucket: str, s3_key: str) -> memoryview:
+        # filled in place from ContentLength, so the payload is allocated once
+        async with self._get_object(s3_bucket, s3_key) as response:
+            buffer = memoryview(bytearray(response["ContentLength"]))
+            offset = 0
+
+            def write(chunk: bytes) -> None:
+                nonlocal offset
+                buffer[offset : offset + len(chunk)] = chunk
+                offset += len(chunk)
+
+            await self._read_body(s3_key, response, write)
 
-        file.seek(0)
-        return file.read()
+        if offset != len(buffer):
+            raise IOError(f"{s3_key}: got {offset} of {len(buffer)} bytes")
+        return buffer
 
     async def download_file_to_disc(
         self, s3_bucket: str, s3_key: str, path: str
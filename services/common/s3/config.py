@@ -10,6 +10,8 @@ class Config(BaseSettings):
     S3_ENDPOINT: str
     S3_PUBLIC_BUCKETS_ENDPOINT: str
     S3_REGION: str
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_KEEPALIVE_TIMEOUT_SECONDS: int = 60
 
 
 config = Config()
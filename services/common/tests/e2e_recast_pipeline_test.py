@@ -1,5 +1,6 @@
 import asyncio
 import argparse
+import json
 import os
 import sys
 import time
@@ -7,6 +8,8 @@ from uuid import uuid4
 import httpx
 from supabase import create_client, Client
 
+from services.common.domain.enums import PipelineStatus
+
 CORE_API_URL = os.getenv("CORE_API_URL")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -14,7 +17,6 @@ TEST_USER_EMAIL = os.getenv("TEST_USER_EMAIL")
 TEST_USER_PASSWORD = os.getenv("TEST_USER_PASSWORD")
 
 MAX_POLL_TIME = 90
-POLL_INTERVAL = 2
 
 
 def parse_s3_url(url: str):
@@ -24,6 +26,32 @@ def parse_s3_url(url: str):
     return {"bucket": bucket, "key": key}
 
 
+async def wait_for_pipeline(
+    client: httpx.AsyncClient, headers: dict, pipeline_id: str
+) -> dict | None:
+    async def read_stream() -> dict | None:
+        async with client.stream(
+            "POST",
+            f"{CORE_API_URL}/v1/pipelines/status/stream",
+            json={"pipeline_ids": [pipeline_id]},
+            headers=headers,
+            timeout=None,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                pipeline = json.loads(line[len("data: ") :])
+                if PipelineStatus(pipeline["status"]).is_terminal:
+                    return pipeline
+        return None
+
+    try:
+        return await asyncio.wait_for(read_stream(), timeout=MAX_POLL_TIME)
+    except asyncio.TimeoutError:
+        return None
+
+
 async def run_single_test(
     client: httpx.AsyncClient,
     headers: dict,
@@ -80,45 +108,28 @@ async def run_single_test(
             f"{prefix} Pipeline queued: {pipeline_id[:8]}... (queue_length={queue_data.get('queue_length', 'unknown')})"
         )
 
-        poll_start = time.time()
-        result_url = None
-
-        while time.time() - poll_start < MAX_POLL_TIME:
-            status_payload = {"pipeline_ids": [pipeline_id]}
-
-            status_response = await client.post(
-                f"{CORE_API_URL}/v1/pipelines/status",
-                json=status_payload,
-                headers=headers,
-            )
-            status_response.raise_for_status()
-            status_data = status_response.json()
-
-            if status_data["pipelines"]:
-                pipeline = status_data["pipelines"][0]
-                status = pipeline["status"]
-                elapsed = int(time.time() - poll_start)
-
-                if status == "COMPLETED":
-                    result_url = pipeline.get("result_url")
-                    print(f"{prefix} Pipeline completed in {elapsed}s")
-                    break
-                elif status == "FAILED":
-                    error_msg = pipeline.get("message", "Unknown error")
-                    return {
-                        "success": False,
-                        "error": f"Pipeline failed: {error_msg}",
-                        "duration": time.time() - start_time,
-                    }
-
-            await asyncio.sleep(POLL_INTERVAL)
-        else:
+        wait_start = time.time()
+        pipeline = await wait_for_pipeline(client, headers, pipeline_id)
+        elapsed = int(time.time() - wait_start)
+
+        if pipeline is None:
             return {
                 "success": False,
                 "error": f"Pipeline timed out after {MAX_POLL_TIME}s",
                 "duration": time.time() - start_time,
             }
 
+        if pipeline["status"] != PipelineStatus.COMPLETED:
+            error_msg = pipeline.get("message", "Unknown error")
+            return {
+                "success": False,
+                "error": f"Pipeline {pipeline['status'].lower()}: {error_msg}",
+                "duration": time.time() - start_time,
+            }
+
+        result_url = pipeline.get("result_url")
+        print(f"{prefix} Pipeline completed in {elapsed}s")
+
         if not result_url:
             return {
                 "success": False,
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from services.common.config.settings import settings as config_settings
 
@@ -8,5 +10,48 @@ class Config(BaseSettings):
     ENV: str
     SENTRY_DSN: str | None = None
 
+    FACE_BOOST_MODEL: str | None = "GFPGANv1.4.pth"
+    RESULT_CACHE_ENABLED: bool = True
+    PREVIEW_ENABLED: bool = True
+    PREVIEW_MAX_SIZE: int = 512
+    PREVIEW_QUALITY: int = 70
+    SOURCE_MAX_DIMENSION: int = 1024
+    OUTPUT_FORMAT: Literal["webp", "avif", "jpeg", "png"] = "webp"
+    OUTPUT_QUALITY: int = 90
+    OUTPUT_EFFORT: int = 4
+
+    SOURCE_FACE_CACHE_SIZE: int = 4096
+
+    PIPELINE_CANCELLATION_ENABLED: bool = True
+    PIPELINE_CANCELLATION_RETRY_SECONDS: int = 30
+
+    TEMPLATE_INDEX_DIR: str = "cache/template_index"
+    TEMPLATE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    TEMPLATE_INDEX_S3_PREFIX: str = "template_index"
+
+    MODEL_STORE_BUCKET: str = "media"
+    MODEL_STORE_PREFIX: str = "models"
+    MODEL_DOWNLOAD_PART_BYTES: int = 16 * 1024 * 1024
+    MODEL_DOWNLOAD_CONCURRENCY: int = 8
+
+    QUALITY_TIERS_ENABLED: bool = True
+    TIER_FAST_BACKLOG: int = 20
+    TIER_FAST_WAIT_SECONDS: int = 30
+    TIER_ECONOMY_BACKLOG: int = 60
+    TIER_ECONOMY_WAIT_SECONDS: int = 120
+    TIER_ECONOMY_MAX_SIZE: int = 1024
+    TIER_POLL_INTERVAL_SECONDS: int = 5
+
+    INFERENCE_BATCH_SIZE: int = 8
+    INFERENCE_BATCH_WAIT_MS: int = 10
+    INFERENCE_PROCESSES: int = 0
+    INFERENCE_INTRA_OP_THREADS: int = 0
+
+    STAGE_IO_WORKERS: int = 8
+    STAGE_CPU_WORKERS: int = 4
+    STAGE_ENCODE_WORKERS: int = 4
+    STAGE_QUEUE_SIZE: int = 32
+    STAGE_REPORT_INTERVAL_SECONDS: int = 30
+
 
 config = Config()
@@ -0,0 +1,54 @@
+import logging
+import time
+
+from services.compute.app.config import config
+
+log = logging.getLogger(__name__)
+
+# lookups pause after a failure, so an unreachable Redis doesn't add its
+# connect timeout to every stage of every job
+_retry_at = 0.0
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+async def cancelled_pipelines(pipeline_ids: list[str]) -> set[str]:
+    global _retry_at
+
+    if not config.PIPELINE_CANCELLATION_ENABLED or not pipeline_ids:
+        return set()
+    if time.monotonic() < _retry_at:
+        return set()
+
+    try:
+        from services.common.redis import get_cancelled_pipelines
+
+        return await get_cancelled_pipelines(pipeline_ids)
+    except Exception as e:
+        # a missed cancel only costs the work, the result is dropped by core
+        log.warning(
+            f"Cancellation lookup failed, pausing for "
+            f"{config.PIPELINE_CANCELLATION_RETRY_SECONDS}s: {e}"
+        )
+        _retry_at = time.monotonic() + config.PIPELINE_CANCELLATION_RETRY_SECONDS
+        return set()
+
+
+async def check_cancelled(pipeline_id: str, stage: str) -> None:
+    if pipeline_id in await cancelled_pipelines([pipeline_id]):
+        raise PipelineCancelled(f"Pipeline {pipeline_id} cancelled before {stage}")
+
+
+async def check_cancellation_store() -> None:
+    try:
+        from services.common.redis import get_redis_client
+
+        redis_client = await get_redis_client()
+        await redis_client.ping()
+    except Exception as e:
+        log.error(
+            f"Cancellation checks are enabled but Redis is unreachable, "
+            f"cancelled jobs will run to completion: {e}"
+        )
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Any, Dict
 
@@ -9,8 +10,27 @@ from services.common.rabbitmq import (
 from services.common.rabbitmq.config import rabbitmq_config
 from services.common.domain.enums import PipelineStatus
 from services.common.s3.client import S3Client
+from services.compute.app.config import config
 
-from services.compute.app.pipelines.service import create_service, pipeline_templates
+from services.compute.app.pipelines.cancellation import (
+    PipelineCancelled,
+    check_cancellation_store,
+)
+from services.compute.app.pipelines.deadlines import Deadline, DeadlineExceeded
+from services.compute.app.pipelines.model_store import ModelStore
+from services.compute.app.pipelines.tiers import (
+    FULL_TIER,
+    LoadMonitor,
+    QualityPolicy,
+    QualityTier,
+    wait_seconds,
+)
+from services.compute.app.pipelines.service import (
+    BatchService,
+    create_service,
+    pipeline_templates,
+    shutdown_pipeline_engine,
+)
 from services.common.logging.config import context_trace_id, context_pipeline_id
 
 log = logging.getLogger(__name__)
@@ -19,6 +39,8 @@ rabbitmq_connection: RabbitMQConnection | None = None
 rabbitmq_publisher: RabbitMQPublisher | None = None
 rabbitmq_consumer: RabbitMQConsumer | None = None
 s3_client: S3Client | None = None
+load_monitor: LoadMonitor | None = None
+quality_policy: QualityPolicy | None = None
 
 
 async def _publish_pipeline_update(
@@ -27,6 +49,7 @@ async def _publish_pipeline_update(
     status: PipelineStatus,
     result_url: str | None = None,
     message: str | None = None,
+    preview_url: str | None = None,
 ) -> None:
     if not rabbitmq_publisher:
         raise RuntimeError("Publisher not initialized")
@@ -36,6 +59,7 @@ async def _publish_pipeline_update(
         "pipeline_id": pipeline_id,
         "status": status.value,
         "result_url": result_url,
+        "preview_url": preview_url,
         "message": message,
     }
 
@@ -47,7 +71,126 @@ async def _publish_pipeline_update(
     )
 
 
+def _preview_publisher(trace_id: str):
+    async def on_preview(pipeline_id: str, preview_url: str) -> None:
+        await _publish_pipeline_update(
+            trace_id=trace_id,
+            pipeline_id=pipeline_id,
+            status=PipelineStatus.PREVIEW,
+            preview_url=preview_url,
+        )
+
+    return on_preview
+
+
+def _error_status(error: Exception) -> PipelineStatus:
+    if isinstance(error, DeadlineExceeded):
+        return PipelineStatus.EXPIRED
+    return PipelineStatus.FAILED
+
+
+async def _expire(trace_id: str, pipeline_ids: list[str], deadline: Deadline) -> None:
+    log.info(
+        f"Dropping expired pipelines {pipeline_ids}, deadline {deadline.at}, trace_id: {trace_id}"
+    )
+    await asyncio.gather(
+        *(
+            _publish_pipeline_update(
+                trace_id=trace_id,
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.EXPIRED,
+                message="deadline passed before the job started",
+            )
+            for pipeline_id in pipeline_ids
+        )
+    )
+
+
+async def _process_batch(trace_id: str, service: BatchService) -> None:
+    reported: set[str] = set()
+
+    async def on_item(pipeline_id: str, results: dict | None, error: Exception | None):
+        reported.add(pipeline_id)
+        # core already marked it cancelled
+        if isinstance(error, PipelineCancelled):
+            log.info(f"Skipped cancelled item {pipeline_id}: {error}")
+            return
+        if error is not None:
+            await _publish_pipeline_update(
+                trace_id=trace_id,
+                pipeline_id=pipeline_id,
+                status=_error_status(error),
+                message=str(error),
+            )
+            return
+
+        await _publish_pipeline_update(
+            trace_id=trace_id,
+            pipeline_id=pipeline_id,
+            status=PipelineStatus.COMPLETED,
+            result_url=results.get("url"),
+            message="success",
+        )
+
+    try:
+        await asyncio.gather(
+            *(
+                _publish_pipeline_update(
+                    trace_id=trace_id,
+                    pipeline_id=pipeline_id,
+                    status=PipelineStatus.RUNNING,
+                )
+                for pipeline_id in service.item_ids
+            )
+        )
+        await service.run_batch(on_item, _preview_publisher(trace_id))
+    except Exception as e:
+        error_message = str(e)
+        log.error(
+            f"Batch failed: {error_message}, trace_id: {trace_id} batch_id: {service.id}",
+            exc_info=True,
+        )
+
+        await asyncio.gather(
+            *(
+                _publish_pipeline_update(
+                    trace_id=trace_id,
+                    pipeline_id=pipeline_id,
+                    status=_error_status(e),
+                    message=error_message,
+                )
+                for pipeline_id in service.item_ids
+                if pipeline_id not in reported
+            )
+        )
+
+
+def _select_quality_tier(message: Dict[str, Any]) -> QualityTier:
+    if load_monitor is None or quality_policy is None:
+        return FULL_TIER
+
+    waited = wait_seconds(message.get("enqueued_at"))
+    tier = quality_policy.select(load_monitor.backlog, waited)
+    if tier is not FULL_TIER:
+        log.info(
+            f"Using {tier.name} quality tier: backlog {load_monitor.backlog}, waited {waited:.1f}s"
+        )
+    return tier
+
+
 async def _process_pipeline(message: Dict[str, Any]) -> None:
+    if load_monitor is None:
+        await _run_pipeline(message)
+        return
+
+    load_monitor.in_flight += 1
+    try:
+        await _run_pipeline(message)
+    finally:
+        load_monitor.in_flight -= 1
+
+
+async def _run_pipeline(message: Dict[str, Any]) -> None:
     import time
 
     t0 = time.perf_counter()
@@ -62,23 +205,42 @@ async def _process_pipeline(message: Dict[str, Any]) -> None:
 
     log.info(f"Processing pipeline: {pipeline_name}, trace_id: {trace_id}")
 
+    deadline = Deadline.from_message(message)
     try:
-        await _publish_pipeline_update(
-            trace_id=trace_id,
-            pipeline_id=pipeline_id,
-            status=PipelineStatus.RUNNING,
-        )
-
         service = create_service(
             pipeline_id=pipeline_id,
             pipeline_name=pipeline_name,
             pipeline_input=pipeline_input_dict,
             s3_client=s3_client,
+            quality_tier=_select_quality_tier(message),
+            deadline=deadline,
+        )
+
+        # nobody is waiting for the result anymore, so nothing is downloaded
+        if deadline.expired:
+            item_ids = (
+                service.item_ids if isinstance(service, BatchService) else [pipeline_id]
+            )
+            await _expire(trace_id, item_ids, deadline)
+            return
+
+        # one message, a status update and result per item
+        if isinstance(service, BatchService):
+            await _process_batch(trace_id, service)
+            log.info(
+                f"_process_pipeline: TOTAL took {(time.perf_counter() - t0) * 1000:.1f}ms"
+            )
+            return
+
+        await _publish_pipeline_update(
+            trace_id=trace_id,
+            pipeline_id=pipeline_id,
+            status=PipelineStatus.RUNNING,
         )
 
         log.info(f"Running pipeline: {pipeline_name}, trace_id: {trace_id}")
         t1 = time.perf_counter()
-        results = await service.run()
+        results = await service.run(_preview_publisher(trace_id))
         log.info(
             f"_process_pipeline service.run took {(time.perf_counter() - t1) * 1000:.1f}ms"
         )
@@ -100,6 +262,21 @@ async def _process_pipeline(message: Dict[str, Any]) -> None:
             f"Pipeline completed successfully: {pipeline_name}, trace_id: {trace_id} pipeline_id: {pipeline_id}"
         )
 
+    except PipelineCancelled as e:
+        log.info(f"Pipeline skipped: {e}, trace_id: {trace_id}")
+
+    except DeadlineExceeded as e:
+        log.info(
+            f"Pipeline expired: {e}, trace_id: {trace_id} pipeline_id: {pipeline_id}"
+        )
+
+        await _publish_pipeline_update(
+            trace_id=trace_id,
+            pipeline_id=pipeline_id,
+            status=PipelineStatus.EXPIRED,
+            message=str(e),
+        )
+
     except Exception as e:
         error_message = str(e)
         log.error(
@@ -117,6 +294,7 @@ async def _process_pipeline(message: Dict[str, Any]) -> None:
 
 async def init() -> None:
     global rabbitmq_connection, rabbitmq_publisher, rabbitmq_consumer, s3_client
+    global load_monitor, quality_policy
 
     log.info("Initializing pipeline router")
 
@@ -127,26 +305,71 @@ async def init() -> None:
     rabbitmq_publisher = RabbitMQPublisher(rabbitmq_connection, rabbitmq_config)
     rabbitmq_consumer = RabbitMQConsumer(rabbitmq_connection, rabbitmq_config)
 
-    await rabbitmq_consumer.consume(
-        queue_name=rabbitmq_config.queue_main,
-        callback=_process_pipeline,
-    )
+    if config.QUALITY_TIERS_ENABLED:
+        quality_policy = QualityPolicy(
+            fast_backlog=config.TIER_FAST_BACKLOG,
+            fast_wait_seconds=config.TIER_FAST_WAIT_SECONDS,
+            economy_backlog=config.TIER_ECONOMY_BACKLOG,
+            economy_wait_seconds=config.TIER_ECONOMY_WAIT_SECONDS,
+            economy_max_size=config.TIER_ECONOMY_MAX_SIZE,
+        )
+        load_monitor = LoadMonitor(
+            lambda: rabbitmq_connection.get_queue_length(rabbitmq_config.queue_main),
+            interval_seconds=config.TIER_POLL_INTERVAL_SECONDS,
+        )
+        await load_monitor.start()
 
     s3_client = S3Client()
+    await s3_client.start()
+    models = {
+        path
+        for template in pipeline_templates.values()
+        for path in template.service_type.required_models()
+    }
+    await ModelStore(
+        s3_client,
+        bucket=config.MODEL_STORE_BUCKET,
+        prefix=config.MODEL_STORE_PREFIX,
+        part_size=config.MODEL_DOWNLOAD_PART_BYTES,
+        concurrency=config.MODEL_DOWNLOAD_CONCURRENCY,
+    ).ensure(sorted(models))
     for template in pipeline_templates.values():
         await template.service_type.initialize(s3_client)
+    if config.PIPELINE_CANCELLATION_ENABLED:
+        await check_cancellation_store()
+
+    # jobs are only taken once the client, models and templates are ready
+    await rabbitmq_consumer.consume(
+        queue_name=rabbitmq_config.queue_main,
+        callback=_process_pipeline,
+    )
 
     log.info("Pipeline router initialized successfully")
 
 
 async def shutdown() -> None:
-    global rabbitmq_connection, rabbitmq_consumer
+    global rabbitmq_connection, rabbitmq_consumer, s3_client, load_monitor
 
     log.info("Shutting down pipeline router")
 
     if rabbitmq_consumer:
         await rabbitmq_consumer.stop()
 
+    if load_monitor:
+        await load_monitor.stop()
+        load_monitor = None
+
+    await shutdown_pipeline_engine()
+
+    if s3_client:
+        await s3_client.close()
+        s3_client = None
+
+    if config.PIPELINE_CANCELLATION_ENABLED:
+        from services.common.redis import close_redis_client
+
+        await close_redis_client()
+
     if rabbitmq_connection:
         await rabbitmq_connection.close()
 
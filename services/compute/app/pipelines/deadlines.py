@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+@dataclass(frozen=True)
+class Deadline:
+    at: datetime | None = None
+
+    @classmethod
+    def from_message(cls, message: dict) -> "Deadline":
+        return cls(parse_timestamp(message.get("deadline")))
+
+    @property
+    def expired(self) -> bool:
+        return self.at is not None and datetime.now(timezone.utc) >= self.at
+
+    def check(self, stage: str) -> None:
+        if self.expired:
+            raise DeadlineExceeded(
+                f"Deadline {self.at.isoformat()} passed before {stage}"
+            )
+
+
+NO_DEADLINE = Deadline()
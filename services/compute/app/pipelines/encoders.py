@@ -0,0 +1,143 @@
+import asyncio
+import io
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Literal
+
+from PIL import Image, features
+
+from services.compute.app.config import config
+
+log = logging.getLogger(__name__)
+
+OutputFormat = Literal["webp", "avif", "jpeg", "png"]
+
+# Pillow writes in blocks of up to 64 KiB, so this caps what sits between the
+# encoder and the upload at about 1 MiB
+STREAM_QUEUE_CHUNKS = 16
+
+
+@dataclass(frozen=True)
+class OutputEncoder:
+    format: str
+    extension: str
+    content_type: str
+    feature: str | None = None
+
+    def is_supported(self) -> bool:
+        return self.feature is None or bool(features.check(self.feature))
+
+
+ENCODERS: dict[str, OutputEncoder] = {
+    "webp": OutputEncoder("WEBP", "webp", "image/webp", feature="webp"),
+    "avif": OutputEncoder("AVIF", "avif", "image/avif", feature="avif"),
+    "jpeg": OutputEncoder("JPEG", "jpg", "image/jpeg", feature="jpg"),
+    "png": OutputEncoder("PNG", "png", "image/png"),
+}
+
+
+@dataclass(frozen=True)
+class OutputSettings:
+    format: OutputFormat
+    quality: int
+    effort: int
+
+    @property
+    def encoder(self) -> OutputEncoder:
+        return ENCODERS[self.format]
+
+    @property
+    def extension(self) -> str:
+        return self.encoder.extension
+
+    @property
+    def content_type(self) -> str:
+        return self.encoder.content_type
+
+    def save_options(self) -> dict:
+        # effort runs 0-9 from fastest to smallest output for every format
+        if self.format == "webp":
+            return {"quality": self.quality, "method": round(self.effort * 6 / 9)}
+        if self.format == "avif":
+            return {"quality": self.quality, "speed": 10 - self.effort}
+        if self.format == "jpeg":
+            return {"quality": self.quality, "optimize": self.effort >= 5}
+        return {"compress_level": self.effort}
+
+    def encode(self, image: Image.Image, fp) -> None:
+        if not self.encoder.is_supported():
+            raise ValueError(f"Output format {self.format} is not supported by Pillow")
+        image.save(fp, format=self.encoder.format, **self.save_options())
+
+
+def output_settings(
+    format: OutputFormat | None = None,
+    quality: int | None = None,
+    effort: int | None = None,
+) -> OutputSettings:
+    return OutputSettings(
+        format=format or config.OUTPUT_FORMAT,
+        quality=quality if quality is not None else config.OUTPUT_QUALITY,
+        effort=effort if effort is not None else config.OUTPUT_EFFORT,
+    )
+
+
+class _ChunkWriter(io.RawIOBase):
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self._loop = loop
+        self._queue = queue
+        self._stopped = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        if self._stopped:
+            raise OSError("Encoded stream was closed")
+        # encoders may reuse their buffer, so each chunk is copied
+        chunk = bytes(b)
+        # blocks while the queue is full, so a slow upload holds the encoder back
+        asyncio.run_coroutine_threadsafe(self._queue.put(chunk), self._loop).result()
+        return len(chunk)
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+async def encode_stream(
+    image: Image.Image,
+    output: OutputSettings,
+    run: Callable[[Callable], Awaitable],
+    max_chunks: int = STREAM_QUEUE_CHUNKS,
+) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max_chunks)
+    writer = _ChunkWriter(loop, queue)
+
+    def encode() -> None:
+        output.encode(image, writer)
+
+    # every put completes before encode returns, so once the task is done
+    # the queue holds the rest of the stream
+    task = asyncio.ensure_future(run(encode))
+    get: asyncio.Future | None = None
+    try:
+        while not (task.done() and queue.empty()):
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait([get, task], return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                yield get.result()
+            else:
+                get.cancel()
+    finally:
+        if get is not None:
+            get.cancel()
+        # a reader that stops early must not leave the encoder blocked on put
+        writer.stop()
+        while not queue.empty():
+            queue.get_nowait()
+        await asyncio.wait([task])
+        # an abandoned encode fails on its next write, which is expected
+        if not task.cancelled():
+            task.exception()
+    task.result()
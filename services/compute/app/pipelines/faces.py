@@ -0,0 +1,347 @@
+import hashlib
+import io
+import logging
+import math
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+MODELS_ROOT = "../external/face_swap/models/insightface"
+INSWAPPER_MODEL_PATH = f"{MODELS_ROOT}/inswapper_128.onnx"
+# face_swap loads FACE_BOOST_MODEL by name from here
+FACE_RESTORE_MODELS_ROOT = "../external/face_swap/models/facerestore_models"
+
+# inswapper_128 input normalisation, fixed so targets can be aligned
+# without loading the swap model
+INSWAPPER_INPUT_SIZE = (128, 128)
+INSWAPPER_INPUT_MEAN = 0.0
+INSWAPPER_INPUT_STD = 255.0
+
+_face_analyser = None
+_face_swapper = None
+_providers: list[str] | None = None
+_intra_op_threads = 0
+_swapper_model_path = INSWAPPER_MODEL_PATH
+
+
+@dataclass
+class FaceAnalysis:
+    bboxes: np.ndarray
+    kps: np.ndarray
+    det_scores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def face(self, index: int):
+        from insightface.app.common import Face
+
+        return Face(
+            bbox=self.bboxes[index],
+            kps=self.kps[index],
+            det_score=self.det_scores[index],
+        )
+
+
+@dataclass
+class TemplateAnalysis:
+    image: np.ndarray
+    faces: FaceAnalysis
+
+    @cached_property
+    def digest(self) -> str:
+        h = hashlib.sha256(np.ascontiguousarray(self.image))
+        h.update(np.ascontiguousarray(self.faces.kps))
+        return h.hexdigest()
+
+    def resized(self, max_size: int) -> "TemplateAnalysis":
+        height, width = self.image.shape[:2]
+        scale = max_size / max(height, width)
+        if scale >= 1:
+            return self
+
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = Image.fromarray(self.image).resize(size, Image.Resampling.BILINEAR)
+        return TemplateAnalysis(
+            image=np.asarray(image),
+            faces=FaceAnalysis(
+                bboxes=self.faces.bboxes * scale,
+                kps=self.faces.kps * scale,
+                det_scores=self.faces.det_scores,
+            ),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.image.nbytes
+            + self.faces.bboxes.nbytes
+            + self.faces.kps.nbytes
+            + self.faces.det_scores.nbytes
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            image=self.image,
+            bboxes=self.faces.bboxes,
+            kps=self.faces.kps,
+            det_scores=self.faces.det_scores,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TemplateAnalysis":
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(
+                image=arrays["image"],
+                faces=FaceAnalysis(
+                    bboxes=arrays["bboxes"],
+                    kps=arrays["kps"],
+                    det_scores=arrays["det_scores"],
+                ),
+            )
+
+
+def configure_sessions(
+    providers: list[str] | None = None,
+    intra_op_threads: int = 0,
+    swapper_model_path: str = INSWAPPER_MODEL_PATH,
+) -> None:
+    global _providers, _intra_op_threads, _swapper_model_path
+
+    _providers = providers
+    _intra_op_threads = intra_op_threads
+    _swapper_model_path = swapper_model_path
+
+
+def create_session(model_path: str):
+    import onnxruntime
+    from insightface.model_zoo.model_zoo import get_default_providers
+
+    options = onnxruntime.SessionOptions()
+    if _intra_op_threads:
+        options.intra_op_num_threads = _intra_op_threads
+        options.inter_op_num_threads = 1
+    if _providers:
+        # prepacking copies weights into private memory, which would undo
+        # sharing memory-mapped initializers between worker processes
+        options.add_session_config_entry("session.disable_prepacking", "1")
+
+    return onnxruntime.InferenceSession(
+        model_path,
+        sess_options=options,
+        providers=_providers or get_default_providers(),
+    )
+
+
+def get_face_analyser():
+    global _face_analyser
+
+    if _face_analyser is None:
+        import insightface
+
+        log.info("Loading face analysis model")
+        kwargs = {"providers": _providers} if _providers else {}
+        _face_analyser = insightface.app.FaceAnalysis(
+            name="buffalo_l",
+            root=MODELS_ROOT,
+            allowed_modules=["detection", "recognition"],
+            **kwargs,
+        )
+        # insightface doesn't forward session options, so rebuild the
+        # sessions when threads are capped for a worker process
+        if _intra_op_threads:
+            for model in _face_analyser.models.values():
+                model.session = create_session(model.model_file)
+        _face_analyser.prepare(ctx_id=0, det_size=(640, 640))
+
+    return _face_analyser
+
+
+def get_face_swapper():
+    global _face_swapper
+
+    if _face_swapper is None:
+        from insightface.model_zoo.inswapper import INSwapper
+
+        log.info(f"Loading face swap model from {_swapper_model_path}")
+        _face_swapper = INSwapper(
+            model_file=_swapper_model_path,
+            session=create_session(_swapper_model_path),
+        )
+
+    return _face_swapper
+
+
+class _BufferReader(io.RawIOBase):
+    # BytesIO copies anything that isn't bytes; this reads the buffer in place
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}
+        self._pos = max(0, base[whence] + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def open_image(data: bytes | bytearray | memoryview, max_size: int = 0) -> Image.Image:
+    image = Image.open(_BufferReader(data))
+    if max_size and max(image.size) > max_size:
+        # JPEGs decode straight at the smallest 1/2, 1/4 or 1/8 scale whose
+        # long side is still max_size; other formats ignore this
+        scale = max_size / max(image.size)
+        image.draft("RGB", tuple(math.ceil(side * scale) for side in image.size))
+
+    if image.mode == "RGB":
+        image.load()
+        return image
+    return image.convert("RGB")
+
+
+def decode_image(data: bytes | bytearray | memoryview) -> np.ndarray:
+    return np.asarray(open_image(data))
+
+
+def get_faces(image: np.ndarray) -> list:
+    # insightface works on BGR; faces are ordered left to right like face_swap
+    faces = get_face_analyser().get(np.ascontiguousarray(image[:, :, ::-1]))
+    return sorted(faces, key=lambda f: f.bbox[0])
+
+
+def analyse_template(data: bytes | bytearray | memoryview) -> TemplateAnalysis:
+    image = decode_image(data)
+    faces = get_faces(image)
+    return TemplateAnalysis(
+        image=image,
+        faces=FaceAnalysis(
+            bboxes=np.array([f.bbox for f in faces], dtype=np.float32).reshape(-1, 4),
+            kps=np.array([f.kps for f in faces], dtype=np.float32).reshape(-1, 5, 2),
+            det_scores=np.array([f.det_score for f in faces], dtype=np.float32),
+        ),
+    )
+
+
+@dataclass
+class SwapTarget:
+    image: np.ndarray
+    M: np.ndarray
+    blob: np.ndarray
+
+
+def prepare_target(template: TemplateAnalysis, face_index: int = 0) -> SwapTarget:
+    import cv2
+    from insightface.utils import face_align
+
+    if len(template.faces) <= face_index:
+        raise ValueError("No face found in template image")
+
+    image = np.ascontiguousarray(template.image[:, :, ::-1])
+    aimg, M = face_align.norm_crop2(
+        image, template.faces.kps[face_index], INSWAPPER_INPUT_SIZE[0]
+    )
+    blob = cv2.dnn.blobFromImage(
+        aimg,
+        1.0 / INSWAPPER_INPUT_STD,
+        INSWAPPER_INPUT_SIZE,
+        (INSWAPPER_INPUT_MEAN,) * 3,
+        swapRB=True,
+    )
+    return SwapTarget(image=image, M=M, blob=blob)
+
+
+def embed_source(source: np.ndarray) -> np.ndarray:
+    faces = get_faces(source)
+    if not faces:
+        raise ValueError("No face found in source image")
+    return faces[0].normed_embedding.astype(np.float32)
+
+
+def swap_faces(items: list[tuple[np.ndarray, SwapTarget]]) -> list[np.ndarray]:
+    swapper = get_face_swapper()
+    latents = []
+    for embedding, _ in items:
+        latent = np.dot(embedding.reshape((1, -1)), swapper.emap)
+        latents.append(latent / np.linalg.norm(latent))
+
+    return list(
+        run_swapper(
+            swapper,
+            np.concatenate([target.blob for _, target in items]),
+            np.concatenate(latents),
+        )
+    )
+
+
+def blend(target: SwapTarget, pred: np.ndarray) -> Image.Image:
+    bgr_fake = np.clip(255 * pred.transpose((1, 2, 0)), 0, 255)
+    bgr_fake = bgr_fake.astype(np.uint8)[:, :, ::-1]
+    merged = paste_back(target.image, bgr_fake, target.M)
+    return Image.fromarray(merged[:, :, ::-1])
+
+
+def run_swapper(swapper, blobs: np.ndarray, latents: np.ndarray) -> np.ndarray:
+    inputs = swapper.session.get_inputs()
+    batch_dim = inputs[0].shape[0]
+
+    # exported models with a fixed batch of 1 still run, just one at a time
+    if isinstance(batch_dim, int) and batch_dim != len(blobs):
+        return np.concatenate(
+            [
+                run_swapper(swapper, blobs[i : i + 1], latents[i : i + 1])
+                for i in range(len(blobs))
+            ]
+        )
+
+    return swapper.session.run(
+        swapper.output_names,
+        {inputs[0].name: blobs, inputs[1].name: latents.astype(np.float32)},
+    )[0]
+
+
+def paste_back(target: np.ndarray, bgr_fake: np.ndarray, M: np.ndarray) -> np.ndarray:
+    # same blending as insightface INSwapper.get(paste_back=True)
+    import cv2
+
+    size = (target.shape[1], target.shape[0])
+    IM = cv2.invertAffineTransform(M)
+    img_white = np.full(bgr_fake.shape[:2], 255, dtype=np.float32)
+    bgr_fake = cv2.warpAffine(bgr_fake, IM, size, borderValue=0.0)
+    img_white = cv2.warpAffine(img_white, IM, size, borderValue=0.0)
+    img_white[img_white > 20] = 255
+
+    img_mask = img_white
+    mask_h_inds, mask_w_inds = np.where(img_mask == 255)
+    mask_h = np.max(mask_h_inds) - np.min(mask_h_inds)
+    mask_w = np.max(mask_w_inds) - np.min(mask_w_inds)
+    mask_size = int(np.sqrt(mask_h * mask_w))
+
+    k = max(mask_size // 10, 10)
+    img_mask = cv2.erode(img_mask, np.ones((k, k), np.uint8), iterations=1)
+    k = max(mask_size // 20, 5)
+    img_mask = cv2.GaussianBlur(img_mask, (2 * k + 1, 2 * k + 1), 0)
+
+    img_mask = (img_mask / 255)[:, :, np.newaxis]
+    merged = img_mask * bgr_fake + (1 - img_mask) * target.astype(np.float32)
+    return merged.astype(np.uint8)
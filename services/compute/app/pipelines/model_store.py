@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from services.common.s3.client import S3Client
+
+log = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ModelStore:
+    def __init__(
+        self,
+        s3: S3Client,
+        bucket: str = "media",
+        prefix: str = "models",
+        part_size: int = 16 * 1024 * 1024,
+        concurrency: int = 8,
+    ):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = part_size
+        # shared by every model, so parallel downloads don't multiply it
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def ensure(self, relative_paths: list[str]) -> list[str]:
+        return list(
+            await asyncio.gather(*(self.ensure_model(p) for p in relative_paths))
+        )
+
+    async def ensure_model(self, relative_path: str) -> str:
+        path = os.path.abspath(relative_path)
+        s3_key = f"{self.prefix}/{os.path.basename(path)}"
+
+        try:
+            head = await self.s3.head_file(s3_bucket=self.bucket, s3_key=s3_key)
+        except Exception as e:
+            if os.path.exists(_manifest_path(path)):
+                log.warning(f"Using local {path}, failed to check {s3_key}: {e}")
+                return path
+            raise
+
+        remote = {
+            "etag": head["ETag"].strip('"'),
+            "size": head["ContentLength"],
+            "sha256": head.get("Metadata", {}).get("sha256"),
+        }
+
+        if await asyncio.to_thread(_is_current, path, remote):
+            log.info(f"Model {path} is up to date")
+            return path
+
+        await self._download(path, s3_key, remote)
+        return path
+
+    async def _download(self, path: str, s3_key: str, remote: dict) -> None:
+        part_path = f"{path}.part"
+        state_path = f"{path}.part.json"
+        size = remote["size"]
+
+        state = _read_json(state_path)
+        if (
+            state is None
+            or state.get("etag") != remote["etag"]
+            or state.get("part_size") != self.part_size
+            or not os.path.exists(part_path)
+        ):
+            state = {"etag": remote["etag"], "part_size": self.part_size, "done": []}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(part_path, "r+b" if os.path.exists(part_path) else "wb") as f:
+            f.truncate(size)
+
+        parts = [
+            (index, start, min(start + self.part_size, size) - 1)
+            for index, start in enumerate(range(0, size, self.part_size))
+        ]
+        done = set(state["done"])
+        pending = [part for part in parts if part[0] not in done]
+        log.info(
+            f"Downloading {s3_key}: {len(pending)} of {len(parts)} parts ({size} bytes)"
+        )
+
+        fd = os.open(part_path, os.O_RDWR)
+        try:
+            await asyncio.gather(
+                *(
+                    self._download_part(
+                        fd, s3_key, remote["etag"], part, state, state_path
+                    )
+                    for part in pending
+                )
+            )
+            await asyncio.to_thread(os.fsync, fd)
+        finally:
+            os.close(fd)
+
+        if not await asyncio.to_thread(_verify, part_path, remote):
+            os.remove(part_path)
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            raise ValueError(f"Checksum mismatch for {s3_key}")
+
+        os.replace(part_path, path)
+        _write_json(_manifest_path(path), remote)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        log.info(f"Downloaded {s3_key} to {path}")
+
+    async def _download_part(
+        self,
+        fd: int,
+        s3_key: str,
+        etag: str,
+        part: tuple[int, int, int],
+        state: dict,
+        state_path: str,
+    ) -> None:
+        index, start, end = part
+        async with self._semaphore:
+            # If-Match fails the range if the object changed mid-download
+            data = await self.s3.download_range(
+                s3_bucket=self.bucket, s3_key=s3_key, start=start, end=end, etag=etag
+            )
+            if len(data) != end - start + 1:
+                raise ValueError(f"Short read for {s3_key} part {index}")
+            await asyncio.to_thread(os.pwrite, fd, data, start)
+
+        # written from the event loop so parts never race on the file
+        state["done"].append(index)
+        _write_json(state_path, state)
+
+
+def _manifest_path(path: str) -> str:
+    return f"{path}.manifest.json"
+
+
+def _is_current(path: str, remote: dict) -> bool:
+    if not os.path.exists(path) or os.path.getsize(path) != remote["size"]:
+        return False
+
+    manifest = _read_json(_manifest_path(path))
+    if manifest is not None:
+        return manifest.get("etag") == remote["etag"]
+
+    # files from before the manifest existed are verified once
+    if not _verify(path, remote):
+        return False
+    _write_json(_manifest_path(path), remote)
+    return True
+
+
+def _verify(path: str, remote: dict) -> bool:
+    if os.path.getsize(path) != remote["size"]:
+        return False
+
+    if remote.get("sha256"):
+        return _file_digest(path, hashlib.sha256()) == remote["sha256"]
+    # multipart uploads have "<md5 of part md5s>-<parts>" ETags, size is all
+    # we can check for those
+    if "-" not in remote["etag"]:
+        return _file_digest(path, hashlib.md5()) == remote["etag"]
+    return True
+
+
+def _file_digest(path: str, digest) -> str:
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
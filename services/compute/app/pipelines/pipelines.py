@@ -1,42 +1,295 @@
-import io
+import hashlib
+import json
 import logging
+from dataclasses import asdict, replace
 
+import numpy as np
 from PIL import Image
 
+from services.compute.app.config import config
+from services.compute.app.pipelines.encoders import OutputSettings, output_settings
+from services.compute.app.pipelines.faces import (
+    SwapTarget,
+    TemplateAnalysis,
+    blend,
+    embed_source,
+    open_image,
+    prepare_target,
+    swap_faces,
+)
+from services.compute.app.pipelines.tiers import FULL_TIER, QualityTier
 from services.external.face_swap.reactor_api import swap_face_api
 
 log = logging.getLogger(__name__)
 
+# bump when output for the same inputs changes so cached results aren't reused
+RESULT_CACHE_VERSION = "v1"
+
+SWAP_PARAMS = {
+    "model": "inswapper_128.onnx",
+    "source_face_index": 0,
+    "target_face_index": 0,
+    "visibility": 1.0,
+}
+
 
 class Pipeline:
     def __init__(self):
         pass
 
+    def preprocess(self) -> None:
+        pass
+
     def run(self) -> dict:
         raise NotImplementedError
 
+    def postprocess(self, results: dict) -> dict:
+        return results
+
+    def preview(self) -> "Pipeline | None":
+        return None
+
 
 class RecastPipeline(Pipeline):
-    def __init__(self, source_image: bytes, target_image: bytes):
+    def __init__(
+        self,
+        source_image: bytes | memoryview,
+        target: TemplateAnalysis,
+        result_key: str | None = None,
+        source_embedding: np.ndarray | None = None,
+        is_preview: bool = False,
+        quality_tier: QualityTier = FULL_TIER,
+    ):
+        Pipeline.__init__(self)
+
+        self.source_image = source_image
+        self.target = target
+        self.result_key = result_key
+        self.source_embedding = source_embedding
+        self.is_preview = is_preview
+        self.quality_tier = quality_tier
+        self.source: Image.Image | None = None
+        self.source_array: np.ndarray | None = None
+        self.target_image: Image.Image | None = None
+        self.swap_target: SwapTarget | None = None
+
+    def __getstate__(self) -> dict:
+        # inference processes only need the prepared inputs
+        state = self.__dict__.copy()
+        state["source_image"] = None
+        state["target"] = None
+        if self.swap_target is not None:
+            state["swap_target"] = replace(self.swap_target, image=None)
+        return state
+
+    def preprocess(self) -> None:
+        if self.source is None:
+            self.source = decode_source(self.source_image)
+            self.source_array = np.asarray(self.source)
+
+        if self.face_boost:
+            self.target_image = Image.fromarray(self.target.image)
+        else:
+            self.swap_target = prepare_target(self.target)
+
+    @property
+    def face_boost(self) -> bool:
+        return (
+            bool(config.FACE_BOOST_MODEL)
+            and self.quality_tier.face_boost
+            and not self.is_preview
+        )
+
+    def preview(self) -> "RecastPipeline | None":
+        # without face boost the full result is about as fast as a preview
+        if not config.PREVIEW_ENABLED or not self.face_boost:
+            return None
+
+        preview = RecastPipeline(
+            self.source_image,
+            self.target.resized(config.PREVIEW_MAX_SIZE),
+            self.result_key,
+            self.source_embedding,
+            is_preview=True,
+        )
+        preview.source, preview.source_array = self.source, self.source_array
+        return preview
+
+    def run(self) -> dict:
+        result = run_pipelines([self])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def postprocess(self, results: dict) -> dict:
+        if "fake" in results:
+            image = blend(self.swap_target, results["fake"])
+        else:
+            image = results["image"]
+
+        # encoding streams into the upload, see encoders.encode_stream
+        return {
+            "image": image,
+            "key": self.result_key,
+            "embedding": results.get("embedding"),
+        }
+
+
+class RecastBatchPipeline(Pipeline):
+    def __init__(
+        self,
+        source_image: bytes | memoryview,
+        targets: list[TemplateAnalysis],
+        result_keys: list[str | None] | None = None,
+        source_embedding: np.ndarray | None = None,
+        quality_tier: QualityTier = FULL_TIER,
+    ):
         Pipeline.__init__(self)
 
         self.source_image = source_image
-        self.target_image = target_image
+        self.targets = targets
+        self.result_keys = result_keys or [None] * len(targets)
+        self.source_embedding = source_embedding
+        self.quality_tier = quality_tier
+        self.source: Image.Image | None = None
+        self.source_array: np.ndarray | None = None
+
+    def preprocess(self) -> None:
+        self.source = decode_source(self.source_image)
+        self.source_array = np.asarray(self.source)
+
+    def items(self) -> list[RecastPipeline]:
+        # items share the decoded source, so its faces are analysed once
+        items = []
+        for target, result_key in zip(self.targets, self.result_keys):
+            item = RecastPipeline(
+                self.source_image,
+                target,
+                result_key,
+                self.source_embedding,
+                quality_tier=self.quality_tier,
+            )
+            item.source, item.source_array = self.source, self.source_array
+            items.append(item)
+        return items
 
     def run(self) -> dict:
-        source = Image.open(io.BytesIO(self.source_image)).convert("RGB")
-        target = Image.open(io.BytesIO(self.target_image)).convert("RGB")
-
-        result, bboxes = swap_face_api(
-            source=source,
-            target=target,
-            model="inswapper_128.onnx",
-            source_face_index=0,
-            target_face_index=0,
-            face_boost_model="GFPGANv1.4.pth",
-            visibility=1.0,
+        items = self.items()
+        for item in items:
+            item.preprocess()
+        return {
+            "results": [
+                result if isinstance(result, Exception) else item.postprocess(result)
+                for item, result in zip(items, run_pipelines(items))
+            ]
+        }
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def result_key(
+    source_digest: str,
+    target: TemplateAnalysis,
+    output: OutputSettings | None = None,
+    quality_tier: QualityTier = FULL_TIER,
+) -> str:
+    # capped tiers change the target itself, and with it its digest
+    face_boost_model = config.FACE_BOOST_MODEL if quality_tier.face_boost else None
+    params = json.dumps(
+        {
+            **SWAP_PARAMS,
+            "face_boost_model": face_boost_model,
+            "source_max_dimension": config.SOURCE_MAX_DIMENSION,
+            "output": asdict(output or output_settings()),
+        },
+        sort_keys=True,
+    )
+    key = f"{RESULT_CACHE_VERSION}:{source_digest}:{target.digest}:{params}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def decode_source(data: bytes | memoryview) -> Image.Image:
+    # only the source face is used, so oversized uploads can decode smaller
+    return open_image(data, max_size=config.SOURCE_MAX_DIMENSION)
+
+
+def run_pipelines(pipelines: list[Pipeline]) -> list[dict | Exception]:
+    results: list[dict | Exception | None] = [None] * len(pipelines)
+
+    recast = [i for i, p in enumerate(pipelines) if isinstance(p, RecastPipeline)]
+    if recast:
+        for i, result in zip(
+            recast, run_recast_pipelines([pipelines[i] for i in recast])
+        ):
+            results[i] = result
+
+    for i, pipeline in enumerate(pipelines):
+        if results[i] is not None:
+            continue
+        try:
+            results[i] = pipeline.run()
+        except Exception as e:
+            results[i] = e
+
+    return results
+
+
+def run_recast_pipelines(pipelines: list[RecastPipeline]) -> list[dict | Exception]:
+    results: list[dict | Exception | None] = [None] * len(pipelines)
+
+    swap = [i for i, p in enumerate(pipelines) if not p.face_boost]
+    if swap:
+        for i, result in zip(swap, run_swap_pipelines([pipelines[i] for i in swap])):
+            results[i] = result
+
+    # face boost lives inside face_swap, which runs its own detection and
+    # one image at a time; back to back items still reuse its source faces
+    for i, pipeline in enumerate(pipelines):
+        if not pipeline.face_boost:
+            continue
+        try:
+            result, bboxes = swap_face_api(
+                source=pipeline.source,
+                target=pipeline.target_image,
+                face_boost_model=config.FACE_BOOST_MODEL,
+                **SWAP_PARAMS,
+            )
+            results[i] = {"image": result}
+        except Exception as e:
+            results[i] = e
+
+    return results
+
+
+def run_swap_pipelines(pipelines: list[RecastPipeline]) -> list[dict | Exception]:
+    results: list[dict | Exception | None] = [None] * len(pipelines)
+    # sources without a cached embedding are analysed once per decoded image
+    computed: dict[int, np.ndarray | Exception] = {}
+    ready = []
+
+    for i, pipeline in enumerate(pipelines):
+        embedding = pipeline.source_embedding
+        if embedding is None:
+            key = id(pipeline.source_array)
+            if key not in computed:
+                try:
+                    computed[key] = embed_source(pipeline.source_array)
+                except Exception as e:
+                    computed[key] = e
+            embedding = computed[key]
+
+        if isinstance(embedding, Exception):
+            results[i] = embedding
+            continue
+        ready.append((i, embedding, pipeline.source_embedding is None))
+
+    if ready:
+        fakes = swap_faces(
+            [(embedding, pipelines[i].swap_target) for i, embedding, _ in ready]
         )
+        for (i, embedding, is_new), fake in zip(ready, fakes):
+            results[i] = {"fake": fake, "embedding": embedding if is_new else None}
 
-        output_buffer = io.BytesIO()
-        result.save(output_buffer, format="PNG")
-        return {"image": output_buffer.getvalue()}
+    return results
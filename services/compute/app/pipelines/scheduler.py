@@ -0,0 +1,133 @@
+import asyncio
+import contextlib
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        run_batch: Callable[[list[Any]], list[Any]],
+        lock: asyncio.Lock | None = None,
+        max_batch_size: int = 8,
+        max_wait_ms: int = 10,
+        executor: Executor | None = None,
+        concurrency: int = 1,
+    ):
+        self.run_batch = run_batch
+        self.lock = lock
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self.concurrency = concurrency
+        self._queue: asyncio.Queue[tuple[Any, asyncio.Future]] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._task: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        log.info(
+            f"Starting inference scheduler: max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms}, concurrency={self.concurrency}"
+        )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for task in self._batches:
+            task.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference scheduler stopped"))
+
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+        log.info("Inference scheduler stopped")
+
+    async def submit(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[Any, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # jobs that queued up while the previous batch ran never wait
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # with a process pool, several batches run at once
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+
+        t1 = time.perf_counter()
+        try:
+            async with self.lock or contextlib.nullcontext():
+                wait_time = (time.perf_counter() - t1) * 1000
+                t1 = time.perf_counter()
+                results = await loop.run_in_executor(
+                    self.executor, self.run_batch, items
+                )
+        except asyncio.CancelledError:
+            results = [RuntimeError("Inference scheduler stopped")] * len(batch)
+        except Exception as e:
+            log.error(f"Inference batch failed: {e}", exc_info=True)
+            results = [e] * len(batch)
+        else:
+            log.info(
+                f"Inference batch of {len(batch)} took {(time.perf_counter() - t1) * 1000:.1f}ms, waited {wait_time:.1f}ms for GPU lock"
+            )
+        finally:
+            self._slots.release()
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
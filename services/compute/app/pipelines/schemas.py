@@ -1,19 +1,40 @@
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from services.compute.app.pipelines.encoders import OutputFormat
 
 
 class PipelineInput(BaseModel):
     pass
 
 
-class RecastPipelineInput(PipelineInput):
+class OutputInput(BaseModel):
+    # unset fields fall back to OUTPUT_FORMAT, OUTPUT_QUALITY and OUTPUT_EFFORT
+    output_format: OutputFormat | None = None
+    output_quality: int | None = Field(default=None, ge=1, le=100)
+    output_effort: int | None = Field(default=None, ge=0, le=9)
+
+
+class RecastPipelineInput(PipelineInput, OutputInput):
     source_image_bucket: str
     source_image_key: str
     template_image_bucket: str
     template_image_key: str
 
 
+class RecastBatchTemplate(BaseModel):
+    pipeline_id: str
+    template_image_bucket: str
+    template_image_key: str
+
+
+class RecastBatchPipelineInput(PipelineInput, OutputInput):
+    source_image_bucket: str
+    source_image_key: str
+    templates: list[RecastBatchTemplate]
+
+
 class Request(BaseModel):
     pipeline_name: str
     input: dict[str, Any]
@@ -1,51 +1,158 @@
 import asyncio
 import logging
 import time
+from contextlib import aclosing
+from typing import Awaitable, Callable
+from uuid import uuid4
 
+from PIL import Image
 from pydantic_core._pydantic_core import ValidationError
 
 from services.common.s3.client import S3Client
+from services.compute.app.config import config
+from services.compute.app.pipelines.cancellation import (
+    PipelineCancelled,
+    cancelled_pipelines,
+    check_cancelled,
+)
+from services.compute.app.pipelines.deadlines import NO_DEADLINE, Deadline
+from services.compute.app.pipelines.encoders import (
+    OutputSettings,
+    encode_stream,
+    output_settings,
+)
+from services.compute.app.pipelines.faces import (
+    FACE_RESTORE_MODELS_ROOT,
+    INSWAPPER_MODEL_PATH,
+    TemplateAnalysis,
+)
 from services.compute.app.pipelines.pipelines import (
     Pipeline,
+    RecastBatchPipeline,
     RecastPipeline,
+    content_digest,
+    result_key,
+    run_pipelines,
+)
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.schemas import (
+    PipelineInput,
+    RecastBatchPipelineInput,
+    RecastPipelineInput,
 )
-from services.compute.app.pipelines.schemas import PipelineInput, RecastPipelineInput
+from services.compute.app.pipelines.source_faces import SourceFaceCache
+from services.compute.app.pipelines.stages import PipelineEngine
+from services.compute.app.pipelines.templates import TemplateIndex
+from services.compute.app.pipelines.tiers import FULL_TIER, QualityTier
+from services.compute.app.pipelines.workers import create_inference_pool
 
 log = logging.getLogger(__name__)
 
-_recast_template_cache: dict[str, bytes] = {}
+RESULTS_FOLDER = "recast_results"
+PREVIEWS_FOLDER = "recast_previews"
+
 _inference_lock = asyncio.Lock()
+_template_index: TemplateIndex | None = None
+_engine: PipelineEngine | None = None
+_source_faces: SourceFaceCache | None = None
+
+# (pipeline_id, output, error) for every item of a batch
+ItemCallback = Callable[[str, dict | None, Exception | None], Awaitable[None]]
+# (pipeline_id, preview_url) once a preview is uploaded
+PreviewCallback = Callable[[str, str], Awaitable[None]]
+
+
+async def get_template_index(s3: S3Client) -> TemplateIndex:
+    global _template_index
+
+    if _template_index is None:
+        _template_index = TemplateIndex(
+            s3,
+            cache_dir=config.TEMPLATE_INDEX_DIR,
+            s3_prefix=config.TEMPLATE_INDEX_S3_PREFIX,
+            inference_lock=_inference_lock,
+            max_bytes=config.TEMPLATE_CACHE_MAX_BYTES,
+        )
+        await asyncio.to_thread(_template_index.warm)
+
+    return _template_index
+
+
+def get_source_face_cache() -> SourceFaceCache:
+    global _source_faces
+
+    if _source_faces is None:
+        _source_faces = SourceFaceCache(max_size=config.SOURCE_FACE_CACHE_SIZE)
+
+    return _source_faces
+
+
+async def get_pipeline_engine() -> PipelineEngine:
+    global _engine
+
+    if _engine is None:
+        if config.INFERENCE_PROCESSES:
+            # the GPU lock isn't needed when every batch gets its own process
+            scheduler = InferenceScheduler(
+                run_pipelines,
+                max_batch_size=config.INFERENCE_BATCH_SIZE,
+                max_wait_ms=config.INFERENCE_BATCH_WAIT_MS,
+                executor=create_inference_pool(
+                    config.INFERENCE_PROCESSES, config.INFERENCE_INTRA_OP_THREADS
+                ),
+                concurrency=config.INFERENCE_PROCESSES,
+            )
+        else:
+            scheduler = InferenceScheduler(
+                run_pipelines,
+                lock=_inference_lock,
+                max_batch_size=config.INFERENCE_BATCH_SIZE,
+                max_wait_ms=config.INFERENCE_BATCH_WAIT_MS,
+            )
+        _engine = PipelineEngine(
+            scheduler,
+            io_workers=config.STAGE_IO_WORKERS,
+            cpu_workers=config.STAGE_CPU_WORKERS,
+            encode_workers=config.STAGE_ENCODE_WORKERS,
+            queue_size=config.STAGE_QUEUE_SIZE,
+            report_interval_seconds=config.STAGE_REPORT_INTERVAL_SECONDS,
+        )
+        await _engine.start()
+
+    return _engine
+
+
+async def shutdown_pipeline_engine() -> None:
+    global _engine
+
+    if _engine:
+        await _engine.stop()
+
+    _engine = None
 
 
 class Service:
-    def __init__(self, id: str, s3: S3Client, pipeline_input: PipelineInput):
+    def __init__(
+        self,
+        id: str,
+        s3: S3Client,
+        pipeline_input: PipelineInput,
+        quality_tier: QualityTier = FULL_TIER,
+        deadline: Deadline = NO_DEADLINE,
+    ):
         self.id = id
         self.s3 = s3
         self.pipeline_input = pipeline_input
+        self.quality_tier = quality_tier
+        self.deadline = deadline
 
     @staticmethod
     async def initialize(s3: S3Client):
         pass
 
     @staticmethod
-    async def download_model(
-        s3: S3Client, relative_path: str, check_exists: bool = False
-    ) -> str:
-        import os
-
-        absolute_path = os.path.abspath(relative_path)
-        if check_exists and os.path.exists(absolute_path):
-            return absolute_path
-
-        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
-
-        name = os.path.basename(relative_path)
-        s3_key = f"models/{name}"
-        await s3.download_file_to_disc(
-            s3_bucket="media", s3_key=s3_key, path=absolute_path
-        )
-
-        return absolute_path
+    def required_models() -> list[str]:
+        return []
 
     async def prepare_pipeline(self) -> Pipeline:
         raise NotImplementedError
@@ -53,87 +160,378 @@ class Service:
     async def post_pipeline(self, results: dict) -> dict:
         raise NotImplementedError
 
-    async def run(self) -> dict:
+    async def get_cached_output(self, pipeline: Pipeline) -> dict | None:
+        return None
+
+    async def post_preview(self, results: dict) -> str:
+        raise NotImplementedError
+
+    async def start_preview(
+        self,
+        engine: PipelineEngine,
+        pipeline_id: str,
+        pipeline: Pipeline,
+        on_preview: PreviewCallback,
+    ) -> asyncio.Task | None:
+        preview = pipeline.preview()
+        if preview is None:
+            return None
+
+        t1 = time.perf_counter()
+        try:
+            await engine.cpu.submit(preview.preprocess)
+            # inferred on its own so it isn't batched with the slower full result
+            results = await engine.inference.submit(preview)
+        except Exception as e:
+            log.warning(f"[{self.id}] Preview for {pipeline_id} failed: {e}")
+            return None
+        # the full inference starts while the preview is encoded and published
+        return asyncio.create_task(
+            self.publish_preview(engine, pipeline_id, preview, results, on_preview, t1)
+        )
+
+    async def publish_preview(
+        self,
+        engine: PipelineEngine,
+        pipeline_id: str,
+        preview: Pipeline,
+        results: dict,
+        on_preview: PreviewCallback,
+        t1: float,
+    ) -> None:
+        try:
+            results = await engine.cpu.submit(preview.postprocess, results)
+            url = await engine.io.submit(self.post_preview, results)
+            await on_preview(pipeline_id, url)
+        except Exception as e:
+            # the full result still follows
+            log.warning(f"[{self.id}] Preview for {pipeline_id} failed: {e}")
+            return
+        log.info(f"Service.run preview took {(time.perf_counter() - t1) * 1000:.1f}ms")
+
+    @staticmethod
+    async def finish_preview(preview: asyncio.Task | None, failed: bool) -> None:
+        if preview is None:
+            return
+        # a failed job has no use for its preview; a finished one waits for
+        # it so the preview is published before the result
+        if failed:
+            preview.cancel()
+        await asyncio.gather(preview, return_exceptions=True)
+
+    async def run(self, on_preview: PreviewCallback | None = None) -> dict:
+        engine = await get_pipeline_engine()
+
+        await check_cancelled(self.id, "download")
         t1 = time.perf_counter()
         log.info(f"Starting pipeline {self.id}")
-        pipeline = await self.prepare_pipeline()
+        pipeline = await engine.io.submit(self.prepare_pipeline)
         log.info(
             f"Service.run prepare_pipeline took {(time.perf_counter() - t1) * 1000:.1f}ms"
         )
 
+        output = await engine.io.submit(self.get_cached_output, pipeline)
+        if output is not None:
+            log.info(f"Completed pipeline {self.id} from cached result")
+            return output
+
         t1 = time.perf_counter()
-        async with _inference_lock:
-            wait_time = (time.perf_counter() - t1) * 1000
-            log.info(f"[{self.id}] Waited {wait_time:.1f}ms for GPU lock")
+        await engine.cpu.submit(pipeline.preprocess)
+        log.info(
+            f"Service.run preprocess took {(time.perf_counter() - t1) * 1000:.1f}ms"
+        )
+
+        self.deadline.check("inference")
+        await check_cancelled(self.id, "inference")
+        preview = None
+        if on_preview is not None:
+            preview = await self.start_preview(engine, self.id, pipeline, on_preview)
 
+        try:
             t1 = time.perf_counter()
-            results = await asyncio.to_thread(lambda: pipeline.run())
+            results = await engine.inference.submit(pipeline)
             log.info(
-                f"Service.run pipeline.run took {(time.perf_counter() - t1) * 1000:.1f}ms"
+                f"Service.run inference took {(time.perf_counter() - t1) * 1000:.1f}ms"
             )
 
-        t1 = time.perf_counter()
-        output = await self.post_pipeline(results)
-        log.info(
-            f"Service.run post_pipeline took {(time.perf_counter() - t1) * 1000:.1f}ms"
-        )
+            t1 = time.perf_counter()
+            results = await engine.cpu.submit(pipeline.postprocess, results)
+            log.info(
+                f"Service.run postprocess took {(time.perf_counter() - t1) * 1000:.1f}ms"
+            )
+
+            await check_cancelled(self.id, "upload")
+            t1 = time.perf_counter()
+            output = await engine.io.submit(self.post_pipeline, results)
+            log.info(
+                f"Service.run post_pipeline took {(time.perf_counter() - t1) * 1000:.1f}ms"
+            )
+        except BaseException:
+            await self.finish_preview(preview, failed=True)
+            raise
+        await self.finish_preview(preview, failed=False)
         log.info(f"Completed pipeline {self.id}")
         return output
 
 
 class RecastService(Service):
-    def __init__(self, id: str, s3: S3Client, pipeline_input: PipelineInput):
-        Service.__init__(self, id, s3, pipeline_input)
+    def __init__(
+        self,
+        id: str,
+        s3: S3Client,
+        pipeline_input: PipelineInput,
+        quality_tier: QualityTier = FULL_TIER,
+        deadline: Deadline = NO_DEADLINE,
+    ):
+        Service.__init__(self, id, s3, pipeline_input, quality_tier, deadline)
+
+    @staticmethod
+    def required_models() -> list[str]:
+        models = [INSWAPPER_MODEL_PATH]
+        if config.FACE_BOOST_MODEL:
+            models.append(f"{FACE_RESTORE_MODELS_ROOT}/{config.FACE_BOOST_MODEL}")
+        return models
 
     @staticmethod
     async def initialize(s3: S3Client):
-        await Service.download_model(
-            s3,
-            relative_path="../external/face_swap/models/insightface/inswapper_128.onnx",
-            check_exists=True,
-        )
+        await get_template_index(s3)
 
     async def prepare_pipeline(self) -> Pipeline:
         if not isinstance(self.pipeline_input, RecastPipelineInput):
             raise ValueError("Invalid pipeline input for RecastService")
 
-        key = f"{self.pipeline_input.template_image_bucket}/{self.pipeline_input.template_image_key}"
-        if key in _recast_template_cache:
-            log.info(f"Using cached template image for key: {key}")
-            target_image = _recast_template_cache[key]
-            source_image = await self.s3.download_file(
+        template_index = await get_template_index(self.s3)
+        source_image, target = await asyncio.gather(
+            self.s3.download_buffer(
                 s3_bucket=self.pipeline_input.source_image_bucket,
                 s3_key=self.pipeline_input.source_image_key,
-            )
-            return RecastPipeline(source_image, target_image)
+            ),
+            template_index.get(
+                self.pipeline_input.template_image_bucket,
+                self.pipeline_input.template_image_key,
+            ),
+        )
 
-        source_image_task = self.s3.download_file(
-            s3_bucket=self.pipeline_input.source_image_bucket,
-            s3_key=self.pipeline_input.source_image_key,
+        target = await self.apply_quality_tier(target)
+        self.source_digest = await asyncio.to_thread(content_digest, source_image)
+        key = await asyncio.to_thread(
+            result_key, self.source_digest, target, self.output, self.quality_tier
         )
-        target_image_task = self.s3.download_file(
-            s3_bucket=self.pipeline_input.template_image_bucket,
-            s3_key=self.pipeline_input.template_image_key,
+        embedding = get_source_face_cache().get(self.source_digest)
+        return RecastPipeline(
+            source_image, target, key, embedding, quality_tier=self.quality_tier
         )
 
-        source_image, target_image = await asyncio.gather(
-            source_image_task, target_image_task
+    async def apply_quality_tier(self, target: TemplateAnalysis) -> TemplateAnalysis:
+        if not self.quality_tier.max_size:
+            return target
+        return await asyncio.to_thread(target.resized, self.quality_tier.max_size)
+
+    @property
+    def output(self) -> OutputSettings:
+        return output_settings(
+            self.pipeline_input.output_format,
+            self.pipeline_input.output_quality,
+            self.pipeline_input.output_effort,
         )
 
-        _recast_template_cache[key] = target_image
+    async def get_cached_output(self, pipeline: RecastPipeline) -> dict | None:
+        if not config.RESULT_CACHE_ENABLED or pipeline.result_key is None:
+            return None
 
-        return RecastPipeline(source_image, target_image)
+        s3_bucket = self.pipeline_input.source_image_bucket
+        s3_key = f"{RESULTS_FOLDER}/{pipeline.result_key}.{self.output.extension}"
+        try:
+            if not await self.s3.file_exists(s3_bucket=s3_bucket, s3_key=s3_key):
+                return None
+        except Exception as e:
+            log.warning(f"Result cache lookup failed for {s3_key}: {e}")
+            return None
+
+        return {"url": self.s3.public_url(s3_bucket, s3_key)}
 
     async def post_pipeline(self, results: dict) -> dict:
-        file_extension = self.pipeline_input.source_image_key.split(".")[-1].lower()
-        url = await self.s3.upload_file(
-            data_bytes=results["image"],
-            s3_bucket=self.pipeline_input.source_image_bucket,
-            s3_folder="recast_results",
-            file_extension=file_extension,
+        if results.get("embedding") is not None:
+            get_source_face_cache().put(self.source_digest, results["embedding"])
+
+        # identical jobs land on the same object, so retries find it
+        name = results.get("key") if config.RESULT_CACHE_ENABLED else None
+        url = await self.upload_image(
+            results["image"],
+            RESULTS_FOLDER,
+            name,
+            self.output,
+            metadata={"quality-tier": self.quality_tier.name},
         )
         return {"url": url}
 
+    async def post_preview(self, results: dict) -> str:
+        return await self.upload_image(
+            results["image"],
+            PREVIEWS_FOLDER,
+            results.get("key") if config.RESULT_CACHE_ENABLED else None,
+            output_settings("jpeg", config.PREVIEW_QUALITY, 0),
+        )
+
+    async def upload_image(
+        self,
+        image: Image.Image,
+        folder: str,
+        name: str | None,
+        output: OutputSettings,
+        metadata: dict[str, str] | None = None,
+    ) -> str:
+        engine = await get_pipeline_engine()
+        async with aclosing(
+            encode_stream(image, output, engine.encode.submit)
+        ) as chunks:
+            return await self.s3.upload_stream(
+                chunks,
+                s3_bucket=self.pipeline_input.source_image_bucket,
+                s3_key=f"{folder}/{name or uuid4().hex}.{output.extension}",
+                content_type=output.content_type,
+                metadata=metadata,
+            )
+
+
+class BatchService(Service):
+    @property
+    def item_ids(self) -> list[str]:
+        raise NotImplementedError
+
+    async def run_batch(
+        self, on_item: ItemCallback, on_preview: PreviewCallback | None = None
+    ) -> None:
+        raise NotImplementedError
+
+
+class RecastBatchService(BatchService, RecastService):
+    def __init__(
+        self,
+        id: str,
+        s3: S3Client,
+        pipeline_input: PipelineInput,
+        quality_tier: QualityTier = FULL_TIER,
+        deadline: Deadline = NO_DEADLINE,
+    ):
+        BatchService.__init__(self, id, s3, pipeline_input, quality_tier, deadline)
+
+    @property
+    def item_ids(self) -> list[str]:
+        return [t.pipeline_id for t in self.pipeline_input.templates]
+
+    async def prepare_pipeline(self) -> RecastBatchPipeline:
+        if not isinstance(self.pipeline_input, RecastBatchPipelineInput):
+            raise ValueError("Invalid pipeline input for RecastBatchService")
+
+        template_index = await get_template_index(self.s3)
+        source_image, *targets = await asyncio.gather(
+            self.s3.download_buffer(
+                s3_bucket=self.pipeline_input.source_image_bucket,
+                s3_key=self.pipeline_input.source_image_key,
+            ),
+            *(
+                template_index.get(t.template_image_bucket, t.template_image_key)
+                for t in self.pipeline_input.templates
+            ),
+        )
+
+        targets = [await self.apply_quality_tier(target) for target in targets]
+        self.source_digest = await asyncio.to_thread(content_digest, source_image)
+        keys = [
+            await asyncio.to_thread(
+                result_key, self.source_digest, target, self.output, self.quality_tier
+            )
+            for target in targets
+        ]
+        embedding = get_source_face_cache().get(self.source_digest)
+        return RecastBatchPipeline(
+            source_image, targets, keys, embedding, quality_tier=self.quality_tier
+        )
+
+    async def _run_item(
+        self,
+        engine: PipelineEngine,
+        pipeline_id: str,
+        pipeline: RecastPipeline,
+        on_item: ItemCallback,
+        on_preview: PreviewCallback | None = None,
+    ) -> None:
+        preview = None
+        try:
+            await engine.cpu.submit(pipeline.preprocess)
+            self.deadline.check("inference")
+            await check_cancelled(pipeline_id, "inference")
+            if on_preview is not None:
+                preview = await self.start_preview(
+                    engine, pipeline_id, pipeline, on_preview
+                )
+            results = await engine.inference.submit(pipeline)
+            results = await engine.cpu.submit(pipeline.postprocess, results)
+        except Exception as e:
+            log.error(f"[{self.id}] Item {pipeline_id} failed: {e}")
+            await self.finish_preview(preview, failed=True)
+            await on_item(pipeline_id, None, e)
+            return
+
+        # the upload overlaps with inference for the rest of the batch
+        try:
+            await check_cancelled(pipeline_id, "upload")
+            output = await engine.io.submit(self.post_pipeline, results)
+        except Exception as e:
+            await self.finish_preview(preview, failed=True)
+            await on_item(pipeline_id, None, e)
+            return
+        await self.finish_preview(preview, failed=False)
+        await on_item(pipeline_id, output, None)
+
+    async def run_batch(
+        self, on_item: ItemCallback, on_preview: PreviewCallback | None = None
+    ) -> None:
+        engine = await get_pipeline_engine()
+
+        cancelled = await cancelled_pipelines(self.item_ids)
+        if len(cancelled) == len(self.item_ids):
+            log.info(f"Batch {self.id} cancelled before download")
+            await asyncio.gather(
+                *(
+                    on_item(pipeline_id, None, PipelineCancelled("cancelled"))
+                    for pipeline_id in self.item_ids
+                )
+            )
+            return
+
+        t1 = time.perf_counter()
+        log.info(f"Starting batch {self.id} with {len(self.item_ids)} items")
+        pipeline = await engine.io.submit(self.prepare_pipeline)
+        cached = await asyncio.gather(
+            *(
+                engine.io.submit(self.get_cached_output, item)
+                for item in pipeline.items()
+            )
+        )
+        log.info(
+            f"RecastBatchService prepare_pipeline took {(time.perf_counter() - t1) * 1000:.1f}ms"
+        )
+
+        tasks = []
+        if any(output is None for output in cached):
+            await engine.cpu.submit(pipeline.preprocess)
+        for pipeline_id, item, output in zip(self.item_ids, pipeline.items(), cached):
+            if pipeline_id in cancelled:
+                tasks.append(on_item(pipeline_id, None, PipelineCancelled("cancelled")))
+            elif output is not None:
+                log.info(f"[{self.id}] Item {pipeline_id} completed from cached result")
+                tasks.append(on_item(pipeline_id, output, None))
+            else:
+                # items go through the stages together with other jobs' work
+                tasks.append(
+                    self._run_item(engine, pipeline_id, item, on_item, on_preview)
+                )
+
+        await asyncio.gather(*tasks)
+        log.info(f"Completed batch {self.id}")
+
 
 class PipelineType:
     def __init__(
@@ -157,11 +555,21 @@ pipeline_templates = {
         pipeline_type=RecastPipeline,
         input_type=RecastPipelineInput,
     ),
+    "recast_batch": PipelineType(
+        service_type=RecastBatchService,
+        pipeline_type=RecastBatchPipeline,
+        input_type=RecastBatchPipelineInput,
+    ),
 }
 
 
 def create_service(
-    pipeline_id: str, pipeline_name: str, pipeline_input: dict, s3_client: S3Client
+    pipeline_id: str,
+    pipeline_name: str,
+    pipeline_input: dict,
+    s3_client: S3Client,
+    quality_tier: QualityTier = FULL_TIER,
+    deadline: Deadline = NO_DEADLINE,
 ) -> Service:
     template = pipeline_templates.get(pipeline_name)
     if not template:
@@ -176,4 +584,6 @@ def create_service(
         id=pipeline_id,
         s3=s3_client,
         pipeline_input=validated_input,
+        quality_tier=quality_tier,
+        deadline=deadline,
     )
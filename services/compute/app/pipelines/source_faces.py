@@ -0,0 +1,24 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SourceFaceCache:
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: str) -> np.ndarray | None:
+        embedding = self._entries.get(digest)
+        if embedding is not None:
+            self._entries.move_to_end(digest)
+        return embedding
+
+    def put(self, digest: str, embedding: np.ndarray) -> None:
+        self._entries[digest] = np.asarray(embedding, dtype=np.float32)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
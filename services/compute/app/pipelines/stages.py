@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+
+log = logging.getLogger(__name__)
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        queue_size: int,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        self.name = name
+        self.workers = workers
+        self.executor = executor
+        self.active = 0
+        self._queue: asyncio.Queue[tuple[Callable, tuple, asyncio.Future]] = (
+            asyncio.Queue(maxsize=queue_size)
+        )
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError(f"Stage {self.name} stopped"))
+
+    async def submit(self, fn: Callable, *args: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        # a full queue holds the caller back instead of piling up work
+        await self._queue.put((fn, args, future))
+        return await future
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            fn, args, future = await self._queue.get()
+            self.active += 1
+            try:
+                if self.executor:
+                    result = await loop.run_in_executor(self.executor, fn, *args)
+                else:
+                    result = await fn(*args)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Stage {self.name} stopped"))
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.active -= 1
+
+
+class PipelineEngine:
+    def __init__(
+        self,
+        scheduler: InferenceScheduler,
+        io_workers: int = 8,
+        cpu_workers: int = 4,
+        encode_workers: int = 4,
+        queue_size: int = 32,
+        report_interval_seconds: int = 30,
+    ):
+        self.io = Stage("io", io_workers, queue_size)
+        self.cpu = Stage(
+            "cpu",
+            cpu_workers,
+            queue_size,
+            executor=ThreadPoolExecutor(cpu_workers, thread_name_prefix="cpu-stage"),
+        )
+        # encoders wait on the upload they stream into, so they get their own
+        # threads instead of holding cpu slots while the network catches up
+        self.encode = Stage(
+            "encode",
+            encode_workers,
+            queue_size,
+            executor=ThreadPoolExecutor(
+                encode_workers, thread_name_prefix="encode-stage"
+            ),
+        )
+        self.inference = scheduler
+        self.report_interval_seconds = report_interval_seconds
+        self._report_task: asyncio.Task | None = None
+
+    def depths(self) -> dict[str, int]:
+        return {
+            "io": self.io.depth,
+            "cpu": self.cpu.depth,
+            "encode": self.encode.depth,
+            "inference": self.inference.depth,
+        }
+
+    async def start(self) -> None:
+        log.info(
+            f"Starting pipeline engine: io_workers={self.io.workers}, "
+            f"cpu_workers={self.cpu.workers}, encode_workers={self.encode.workers}"
+        )
+        await self.io.start()
+        await self.cpu.start()
+        await self.encode.start()
+        await self.inference.start()
+        self._report_task = asyncio.create_task(self._report_loop())
+
+    async def stop(self) -> None:
+        if self._report_task:
+            self._report_task.cancel()
+            try:
+                await self._report_task
+            except asyncio.CancelledError:
+                pass
+            self._report_task = None
+
+        await self.io.stop()
+        await self.cpu.stop()
+        await self.encode.stop()
+        await self.inference.stop()
+        self.cpu.executor.shutdown(wait=False, cancel_futures=True)
+        self.encode.executor.shutdown(wait=False, cancel_futures=True)
+
+        log.info("Pipeline engine stopped")
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval_seconds)
+            depths = self.depths()
+            if any(depths.values()):
+                log.info(
+                    "Stage queue depths: "
+                    + ", ".join(f"{name}={depth}" for name, depth in depths.items())
+                )
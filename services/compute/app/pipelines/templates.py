@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+from services.common.s3.client import S3Client
+from services.compute.app.pipelines.faces import TemplateAnalysis, analyse_template
+
+log = logging.getLogger(__name__)
+
+# bump when the artifact layout changes so stale indexes are recomputed
+INDEX_VERSION = "v1"
+
+
+class TemplateCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, TemplateAnalysis] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def get(self, name: str) -> TemplateAnalysis | None:
+        entry = self._entries.get(name)
+        if entry is not None:
+            self._entries.move_to_end(name)
+        return entry
+
+    def fits(self, entry: TemplateAnalysis) -> bool:
+        return self.size + entry.nbytes <= self.max_bytes
+
+    def put(self, name: str, entry: TemplateAnalysis) -> None:
+        if entry.nbytes > self.max_bytes:
+            log.warning(
+                f"Template {name} ({entry.nbytes} bytes) exceeds the cache budget"
+            )
+            return
+
+        previous = self._entries.pop(name, None)
+        if previous is not None:
+            self.size -= previous.nbytes
+
+        while self._entries and self.size + entry.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.nbytes
+
+        self._entries[name] = entry
+        self.size += entry.nbytes
+
+
+class TemplateIndex:
+    def __init__(
+        self,
+        s3: S3Client,
+        cache_dir: str,
+        s3_prefix: str,
+        inference_lock: asyncio.Lock,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.s3 = s3
+        self.cache_dir = cache_dir
+        self.s3_prefix = s3_prefix
+        self.inference_lock = inference_lock
+        self._cache = TemplateCache(max_bytes)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def artifact_name(bucket: str, key: str) -> str:
+        digest = hashlib.sha256(f"{bucket}/{key}".encode()).hexdigest()[:32]
+        return f"{INDEX_VERSION}-{digest}"
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.npz")
+
+    def warm(self) -> None:
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        names = [
+            name
+            for name, extension in map(os.path.splitext, os.listdir(self.cache_dir))
+            if extension == ".npz" and name.startswith(f"{INDEX_VERSION}-")
+        ]
+        # most recently used first, disk reads refresh mtime
+        names.sort(key=lambda name: os.path.getmtime(self._path(name)), reverse=True)
+
+        for name in names:
+            try:
+                entry = TemplateAnalysis.from_bytes(_read_file(self._path(name)))
+            except Exception as e:
+                log.warning(f"Skipping unreadable template index {name}: {e}")
+                continue
+            if not self._cache.fits(entry):
+                break
+            self._cache.put(name, entry)
+
+        log.info(
+            f"Loaded {len(self._cache)} template indexes ({self._cache.size} bytes) from {self.cache_dir}"
+        )
+
+    async def get(self, bucket: str, key: str) -> TemplateAnalysis:
+        name = self.artifact_name(bucket, key)
+        entry = self._cache.get(name)
+        if entry is not None:
+            return entry
+
+        # one download/analysis per template even when jobs arrive together
+        task = self._inflight.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load(name, bucket, key))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+
+        return await asyncio.shield(task)
+
+    async def _load(self, name: str, bucket: str, key: str) -> TemplateAnalysis:
+        entry = await self._fetch(name, bucket, key)
+        self._cache.put(name, entry)
+        return entry
+
+    async def _fetch(self, name: str, bucket: str, key: str) -> TemplateAnalysis:
+        path = self._path(name)
+        if os.path.exists(path):
+            log.info(f"Using template index from disk for {bucket}/{key}")
+            data = await asyncio.to_thread(_read_file, path)
+            await asyncio.to_thread(os.utime, path)
+            return TemplateAnalysis.from_bytes(data)
+
+        try:
+            data = await self.s3.download_file(
+                s3_bucket=bucket, s3_key=f"{self.s3_prefix}/{name}.npz"
+            )
+            analysis = TemplateAnalysis.from_bytes(data)
+            log.info(f"Using template index from S3 for {bucket}/{key}")
+            await asyncio.to_thread(_write_file, path, data)
+            return analysis
+        except Exception as e:
+            log.info(f"No stored template index for {bucket}/{key}: {e}")
+
+        image = await self.s3.download_buffer(s3_bucket=bucket, s3_key=key)
+        async with self.inference_lock:
+            analysis = await asyncio.to_thread(analyse_template, image)
+        log.info(f"Analysed template {bucket}/{key}: {len(analysis.faces)} faces")
+
+        data = await asyncio.to_thread(analysis.to_bytes)
+        await asyncio.to_thread(_write_file, path, data)
+        try:
+            await self.s3.upload_file(
+                data_bytes=data,
+                s3_bucket=bucket,
+                s3_folder=self.s3_prefix,
+                file_extension="npz",
+                file_name=name,
+            )
+        except Exception as e:
+            log.warning(f"Failed to upload template index for {bucket}/{key}: {e}")
+
+        return analysis
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
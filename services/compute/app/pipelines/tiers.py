@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from services.compute.app.pipelines.deadlines import parse_timestamp
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    name: str
+    face_boost: bool = True
+    # long side the template is capped to, 0 keeps full resolution
+    max_size: int = 0
+
+
+FULL_TIER = QualityTier("full")
+
+
+class QualityPolicy:
+    def __init__(
+        self,
+        fast_backlog: int,
+        fast_wait_seconds: float,
+        economy_backlog: int,
+        economy_wait_seconds: float,
+        economy_max_size: int,
+    ):
+        self.fast_backlog = fast_backlog
+        self.fast_wait_seconds = fast_wait_seconds
+        self.economy_backlog = economy_backlog
+        self.economy_wait_seconds = economy_wait_seconds
+        self.fast = QualityTier("fast", face_boost=False)
+        self.economy = QualityTier(
+            "economy", face_boost=False, max_size=economy_max_size
+        )
+
+    def select(self, backlog: int, wait_seconds: float) -> QualityTier:
+        if backlog >= self.economy_backlog or wait_seconds >= self.economy_wait_seconds:
+            return self.economy
+        if backlog >= self.fast_backlog or wait_seconds >= self.fast_wait_seconds:
+            return self.fast
+        return FULL_TIER
+
+
+class LoadMonitor:
+    def __init__(
+        self,
+        get_queue_length: Callable[[], Awaitable[int]],
+        interval_seconds: float = 5,
+    ):
+        self.get_queue_length = get_queue_length
+        self.interval_seconds = interval_seconds
+        self.queue_length = 0
+        # jobs this worker holds, the queue only counts unacked ones out
+        self.in_flight = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def backlog(self) -> int:
+        return self.queue_length + self.in_flight
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                self.queue_length = await self.get_queue_length()
+            except Exception as e:
+                log.warning(f"Failed to read queue length: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+def wait_seconds(enqueued_at: str | None) -> float:
+    enqueued = parse_timestamp(enqueued_at)
+    if enqueued is None:
+        return 0.0
+    return max(0.0, (datetime.now(timezone.utc) - enqueued).total_seconds())
@@ -0,0 +1,97 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.compute.app.pipelines import faces
+
+log = logging.getLogger(__name__)
+
+# onnxruntime only memory-maps external initializers at page-aligned offsets
+PAGE_SIZE = 4096
+MIN_EXTERNAL_BYTES = 1024
+
+
+def shared_model_path(path: str) -> str:
+    root, _ = os.path.splitext(path)
+    return f"{root}.shared.onnx"
+
+
+def share_model_weights(path: str) -> str:
+    # initializers move to a side file that every worker process maps
+    # read-only, so the page cache holds one copy of the weights
+    shared_path = shared_model_path(path)
+    # the model store replaces models in place when they change upstream
+    if os.path.exists(shared_path) and os.path.getmtime(
+        shared_path
+    ) >= os.path.getmtime(path):
+        return shared_path
+
+    import onnx
+    from onnx import numpy_helper
+    from onnx.external_data_helper import set_external_data
+
+    log.info(f"Writing shared weights for {path}")
+    model = onnx.load(path)
+    data_path = f"{shared_path}.data"
+    tmp_path = f"{shared_path}.tmp"
+
+    with open(f"{data_path}.tmp", "wb") as f:
+        for tensor in model.graph.initializer:
+            array = numpy_helper.to_array(tensor)
+            if array.nbytes < MIN_EXTERNAL_BYTES:
+                continue
+
+            f.write(b"\0" * (-f.tell() % PAGE_SIZE))
+            offset = f.tell()
+            f.write(array.tobytes())
+
+            tensor.CopyFrom(numpy_helper.from_array(array, tensor.name))
+            set_external_data(
+                tensor,
+                location=os.path.basename(data_path),
+                offset=offset,
+                length=array.nbytes,
+            )
+            tensor.data_location = onnx.TensorProto.EXTERNAL
+            tensor.ClearField("raw_data")
+
+    onnx.save_model(model, tmp_path)
+    os.replace(f"{data_path}.tmp", data_path)
+    os.replace(tmp_path, shared_path)
+    return shared_path
+
+
+def init_worker(intra_op_threads: int, swapper_model_path: str) -> None:
+    faces.configure_sessions(
+        providers=["CPUExecutionProvider"],
+        intra_op_threads=intra_op_threads,
+        swapper_model_path=swapper_model_path,
+    )
+
+    if intra_op_threads:
+        try:
+            import torch
+
+            torch.set_num_threads(intra_op_threads)
+        except ImportError:
+            pass
+
+    # load up front so the first batch doesn't pay for it
+    faces.get_face_swapper()
+    faces.get_face_analyser()
+    log.info(f"Inference worker {os.getpid()} ready")
+
+
+def create_inference_pool(processes: int, intra_op_threads: int) -> ProcessPoolExecutor:
+    swapper_model_path = share_model_weights(faces.INSWAPPER_MODEL_PATH)
+    log.info(
+        f"Starting {processes} inference processes with {intra_op_threads or 'default'} intra-op threads"
+    )
+    # spawn, not fork: onnxruntime thread pools don't survive a fork
+    return ProcessPoolExecutor(
+        processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(intra_op_threads, swapper_model_path),
+    )
@@ -6,6 +6,24 @@ from unittest.mock import AsyncMock
 def mock_s3_client(mocker):
     client = mocker.MagicMock()
     client.download_file = AsyncMock(return_value=b"fake-image-data")
+    client.download_buffer = AsyncMock(
+        return_value=memoryview(bytearray(b"fake-image-data"))
+    )
     client.upload_file = AsyncMock(return_value="https://example.com/result.png")
+    client.upload_stream = AsyncMock(return_value="https://example.com/result.png")
     client.download_file_to_disc = AsyncMock(return_value="/tmp/model.onnx")
+    client.file_exists = AsyncMock(return_value=False)
+    client.public_url = lambda bucket, key: f"https://example.com/{bucket}/{key}"
     return client
+
+
+@pytest.fixture(autouse=True)
+def no_cancelled_pipelines(mocker):
+    # cancellation checks are on by default, keep them off the network
+    from services.compute.app.pipelines import cancellation
+
+    mocker.patch.object(cancellation, "_retry_at", 0.0)
+    return mocker.patch(
+        "services.common.redis.get_cancelled_pipelines",
+        AsyncMock(return_value=set()),
+    )
@@ -0,0 +1,40 @@
+import pytest
+
+from services.compute.app.config import config
+from services.compute.app.pipelines.cancellation import (
+    PipelineCancelled,
+    cancelled_pipelines,
+    check_cancelled,
+)
+
+
+@pytest.fixture
+def cancelled(no_cancelled_pipelines):
+    no_cancelled_pipelines.return_value = {"a"}
+    return no_cancelled_pipelines
+
+
+async def test_cancelled_pipelines_are_read_from_redis(cancelled):
+    assert await cancelled_pipelines(["a", "b"]) == {"a"}
+    cancelled.assert_awaited_once_with(["a", "b"])
+
+    with pytest.raises(PipelineCancelled, match="before upload"):
+        await check_cancelled("a", "upload")
+    await check_cancelled("b", "upload")
+
+
+async def test_disabled_cancellation_skips_redis(cancelled, mocker):
+    mocker.patch.object(config, "PIPELINE_CANCELLATION_ENABLED", False)
+
+    assert await cancelled_pipelines(["a"]) == set()
+    cancelled.assert_not_awaited()
+
+
+async def test_failed_lookup_runs_the_job_and_pauses_lookups(cancelled):
+    cancelled.side_effect = ConnectionError("redis down")
+
+    assert await cancelled_pipelines(["a"]) == set()
+
+    cancelled.side_effect = None
+    assert await cancelled_pipelines(["a"]) == set()
+    cancelled.assert_awaited_once()
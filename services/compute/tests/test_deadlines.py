@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.compute.app.pipelines.deadlines import (
+    NO_DEADLINE,
+    Deadline,
+    DeadlineExceeded,
+)
+
+
+def test_deadline_is_read_from_message():
+    at = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    assert Deadline.from_message({"deadline": at.isoformat()}).at == at
+    assert Deadline.from_message({"deadline": None}) == NO_DEADLINE
+    assert Deadline.from_message({"deadline": "soon"}) == NO_DEADLINE
+    assert Deadline.from_message({}) == NO_DEADLINE
+
+
+def test_naive_deadline_is_utc():
+    at = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    deadline = Deadline.from_message({"deadline": at.replace(tzinfo=None).isoformat()})
+
+    assert deadline.at == at
+    assert deadline.expired
+
+
+def test_check_raises_once_deadline_passed():
+    Deadline(datetime.now(timezone.utc) + timedelta(minutes=1)).check("download")
+    NO_DEADLINE.check("download")
+
+    with pytest.raises(DeadlineExceeded, match="before inference"):
+        Deadline(datetime.now(timezone.utc) - timedelta(seconds=1)).check("inference")
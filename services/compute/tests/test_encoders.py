@@ -0,0 +1,98 @@
+import asyncio
+import io
+import os
+from contextlib import aclosing
+
+import pytest
+from PIL import Image
+
+from services.compute.app.pipelines import encoders
+from services.compute.app.pipelines.encoders import (
+    ENCODERS,
+    encode_stream,
+    output_settings,
+)
+
+
+async def run_in_thread(fn):
+    return await asyncio.to_thread(fn)
+
+
+async def collect(image, output) -> bytes:
+    return b"".join([c async for c in encode_stream(image, output, run_in_thread)])
+
+
+@pytest.mark.parametrize("format", ["webp", "jpeg", "png", "avif"])
+async def test_encode_stream_produces_format(format):
+    output = output_settings(format, quality=80, effort=2)
+    if not output.encoder.is_supported():
+        pytest.skip(f"Pillow built without {format}")
+
+    data = await collect(Image.new("RGB", (64, 48), (200, 10, 10)), output)
+
+    decoded = Image.open(io.BytesIO(data))
+    assert decoded.format == ENCODERS[format].format
+    assert decoded.size == (64, 48)
+
+
+async def test_encode_stream_streams_large_images_in_chunks():
+    image = Image.frombytes("RGB", (512, 512), bytes(range(256)) * 3 * 1024)
+    output = output_settings("png", effort=0)
+
+    chunks = [c async for c in encode_stream(image, output, run_in_thread)]
+
+    assert len(chunks) > 1
+    assert Image.open(io.BytesIO(b"".join(chunks))).size == (512, 512)
+
+
+def noise(size: int) -> Image.Image:
+    return Image.frombytes("RGB", (size, size), os.urandom(size * size * 3))
+
+
+async def test_encode_stream_holds_encoder_back_for_slow_readers(mocker):
+    write = mocker.spy(encoders._ChunkWriter, "write")
+    chunks = []
+
+    async for chunk in encode_stream(
+        noise(1024), output_settings("png", effort=0), run_in_thread, max_chunks=2
+    ):
+        if not chunks:
+            await asyncio.sleep(0.2)
+            written = write.call_count
+        chunks.append(chunk)
+
+    assert written <= 4
+    assert len(chunks) > 10
+    assert Image.open(io.BytesIO(b"".join(chunks))).size == (1024, 1024)
+
+
+async def test_encode_stream_stops_encoder_when_reader_stops():
+    encodes = []
+
+    async def run(fn):
+        encodes.append(asyncio.ensure_future(asyncio.to_thread(fn)))
+        return await encodes[0]
+
+    async def read_first_chunk():
+        stream = encode_stream(noise(1024), output_settings("png", effort=0), run, 1)
+        async with aclosing(stream) as chunks:
+            async for _ in chunks:
+                break
+
+    await asyncio.wait_for(read_first_chunk(), timeout=5)
+
+    with pytest.raises(OSError, match="closed"):
+        encodes[0].result()
+
+
+async def test_encode_stream_raises_encoder_errors():
+    with pytest.raises(OSError):
+        await collect(Image.new("I;16", (8, 8)), output_settings("jpeg"))
+
+
+def test_output_settings_default_to_config():
+    output = output_settings()
+
+    assert output.extension == "webp"
+    assert output.content_type == "image/webp"
+    assert output_settings("jpeg").extension == "jpg"
@@ -0,0 +1,135 @@
+import hashlib
+import json
+
+import pytest
+
+from services.compute.app.pipelines.model_store import ModelStore
+
+MODEL = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def s3(mocker):
+    client = mocker.MagicMock()
+    client.objects = {"models/model.onnx": MODEL}
+
+    async def head_file(s3_bucket, s3_key):
+        data = client.objects[s3_key]
+        return {
+            "ETag": f'"{hashlib.md5(data).hexdigest()}"',
+            "ContentLength": len(data),
+            "Metadata": {},
+        }
+
+    async def download_range(s3_bucket, s3_key, start, end, etag=None):
+        return client.objects[s3_key][start : end + 1]
+
+    client.head_file = mocker.AsyncMock(side_effect=head_file)
+    client.download_range = mocker.AsyncMock(side_effect=download_range)
+    return client
+
+
+def make_store(s3) -> ModelStore:
+    return ModelStore(s3, part_size=1000, concurrency=3)
+
+
+async def test_downloads_model_in_parts(s3, tmp_path):
+    path = tmp_path / "models" / "model.onnx"
+
+    await make_store(s3).ensure([str(path)])
+
+    assert path.read_bytes() == MODEL
+    assert s3.download_range.await_count == 11
+    assert s3.download_range.await_args.kwargs["etag"] == hashlib.md5(MODEL).hexdigest()
+    assert not (tmp_path / "models" / "model.onnx.part").exists()
+
+
+async def test_resumes_interrupted_download(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    part = bytearray(len(MODEL))
+    part[:2000] = MODEL[:2000]
+    (tmp_path / "model.onnx.part").write_bytes(part)
+    (tmp_path / "model.onnx.part.json").write_text(
+        json.dumps(
+            {
+                "etag": hashlib.md5(MODEL).hexdigest(),
+                "part_size": 1000,
+                "done": [0, 1],
+            }
+        )
+    )
+
+    await make_store(s3).ensure_model(str(path))
+
+    assert path.read_bytes() == MODEL
+    assert s3.download_range.await_count == 9
+    assert min(c.kwargs["start"] for c in s3.download_range.await_args_list) == 2000
+
+
+async def test_checksum_mismatch_raises(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    s3.download_range.side_effect = lambda s3_bucket, s3_key, start, end, etag=None: (
+        b"x" * (end - start + 1)
+    )
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        await make_store(s3).ensure_model(str(path))
+
+    assert not path.exists()
+    assert not (tmp_path / "model.onnx.part").exists()
+
+
+async def test_sha256_metadata_is_preferred(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    s3.head_file.side_effect = None
+    s3.head_file.return_value = {
+        "ETag": '"abc-2"',
+        "ContentLength": len(MODEL),
+        "Metadata": {"sha256": hashlib.sha256(b"other").hexdigest()},
+    }
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        await make_store(s3).ensure_model(str(path))
+
+
+async def test_current_model_is_not_downloaded_again(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    await make_store(s3).ensure_model(str(path))
+    s3.download_range.reset_mock()
+
+    await make_store(s3).ensure_model(str(path))
+
+    s3.download_range.assert_not_awaited()
+
+
+async def test_legacy_model_is_verified_once(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    path.write_bytes(MODEL)
+
+    await make_store(s3).ensure_model(str(path))
+
+    s3.download_range.assert_not_awaited()
+    assert (tmp_path / "model.onnx.manifest.json").exists()
+
+
+async def test_changed_model_is_replaced(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    await make_store(s3).ensure_model(str(path))
+    s3.objects["models/model.onnx"] = MODEL[::-1]
+
+    await make_store(s3).ensure_model(str(path))
+
+    assert path.read_bytes() == MODEL[::-1]
+
+
+async def test_local_model_is_used_when_s3_is_unreachable(s3, tmp_path):
+    path = tmp_path / "model.onnx"
+    await make_store(s3).ensure_model(str(path))
+    s3.head_file.side_effect = ConnectionError("s3 down")
+
+    assert await make_store(s3).ensure_model(str(path)) == str(path)
+
+    path.unlink()
+    (tmp_path / "model.onnx.manifest.json").unlink()
+    with pytest.raises(ConnectionError):
+        await make_store(s3).ensure_model(str(path))
@@ -0,0 +1,139 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.compute.app.config import config
+from services.compute.app.pipelines.faces import FaceAnalysis, TemplateAnalysis
+from services.compute.app.pipelines.pipelines import RecastPipeline
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.service import create_service
+from services.compute.app.pipelines.stages import PipelineEngine
+
+
+def make_template() -> TemplateAnalysis:
+    return TemplateAnalysis(
+        image=np.zeros((1024, 1024, 3), dtype=np.uint8),
+        faces=FaceAnalysis(
+            bboxes=np.array([[100, 100, 300, 300]], dtype=np.float32),
+            kps=np.ones((1, 5, 2), dtype=np.float32),
+            det_scores=np.array([0.9], dtype=np.float32),
+        ),
+    )
+
+
+@pytest.fixture
+async def engine(mocker):
+    run_batch = mocker.MagicMock(
+        side_effect=lambda items: [{"preview": item.is_preview} for item in items]
+    )
+    engine = PipelineEngine(InferenceScheduler(run_batch, max_wait_ms=1))
+    engine.run_batch = run_batch
+    await engine.start()
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_pipeline_engine",
+        mocker.AsyncMock(return_value=engine),
+    )
+    template_index = mocker.MagicMock()
+    template_index.get = mocker.AsyncMock(return_value=make_template())
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_template_index",
+        mocker.AsyncMock(return_value=template_index),
+    )
+    mocker.patch.object(RecastPipeline, "preprocess")
+    mocker.patch.object(
+        RecastPipeline,
+        "postprocess",
+        side_effect=lambda results: {"image": results, "key": None},
+    )
+    yield engine
+    await engine.stop()
+
+
+def make_service(mock_s3_client):
+    return create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "template_image_bucket": "bucket2",
+            "template_image_key": "template.jpg",
+        },
+        s3_client=mock_s3_client,
+    )
+
+
+def test_preview_swaps_a_small_target_without_face_boost(mocker):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+    pipeline = RecastPipeline(b"", make_template(), "key")
+
+    preview = pipeline.preview()
+
+    assert preview.is_preview and not preview.face_boost
+    assert preview.target.image.shape == (512, 512, 3)
+    assert preview.result_key == "key"
+
+    mocker.patch.object(config, "FACE_BOOST_MODEL", None)
+    assert pipeline.preview() is None
+
+
+async def test_preview_is_published_before_the_full_result(
+    mock_s3_client, engine, mocker
+):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+    mocker.patch.object(config, "RESULT_CACHE_ENABLED", False)
+    events = []
+    mock_s3_client.upload_stream.side_effect = lambda chunks, **kwargs: (
+        events.append(kwargs["s3_key"]) or f"https://example.com/{kwargs['s3_key']}"
+    )
+    on_preview = mocker.AsyncMock(
+        side_effect=lambda pipeline_id, url: events.append(("preview", url))
+    )
+
+    output = await make_service(mock_s3_client).run(on_preview)
+
+    assert [
+        batch.args[0][0].is_preview for batch in engine.run_batch.call_args_list
+    ] == [
+        True,
+        False,
+    ]
+    on_preview.assert_awaited_once()
+    assert on_preview.await_args.args[0] == "test-id"
+    assert events[0].startswith("recast_previews/") and events[0].endswith(".jpg")
+    assert events[1][0] == "preview"
+    assert output["url"].startswith("https://example.com/recast_results/")
+
+
+async def test_full_inference_does_not_wait_for_preview_upload(
+    mock_s3_client, engine, mocker
+):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+    mocker.patch.object(config, "RESULT_CACHE_ENABLED", False)
+
+    async def upload_stream(chunks, **kwargs):
+        if kwargs["s3_key"].startswith("recast_previews/"):
+            # finishes only once the full result went through inference
+            async with asyncio.timeout(1):
+                while engine.run_batch.call_count < 2:
+                    await asyncio.sleep(0.01)
+        return f"https://example.com/{kwargs['s3_key']}"
+
+    mock_s3_client.upload_stream.side_effect = upload_stream
+    on_preview = mocker.AsyncMock()
+
+    output = await make_service(mock_s3_client).run(on_preview)
+
+    on_preview.assert_awaited_once()
+    assert output["url"].startswith("https://example.com/recast_results/")
+
+
+async def test_failed_preview_does_not_fail_the_job(mock_s3_client, engine, mocker):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+    on_preview = mocker.AsyncMock(side_effect=RuntimeError("publish failed"))
+
+    output = await make_service(mock_s3_client).run(on_preview)
+
+    assert output == {"url": "https://example.com/result.png"}
+    assert engine.run_batch.call_count == 2
@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from services.compute.app.config import config
+from services.compute.app.pipelines.cancellation import PipelineCancelled
+from services.compute.app.pipelines.deadlines import Deadline, DeadlineExceeded
+from services.compute.app.pipelines.encoders import output_settings
+from services.compute.app.pipelines.faces import FaceAnalysis, TemplateAnalysis
+from services.compute.app.pipelines.pipelines import (
+    RecastBatchPipeline,
+    RecastPipeline,
+    content_digest,
+    result_key,
+)
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.service import create_service
+from services.compute.app.pipelines.stages import PipelineEngine
+from services.compute.app.pipelines.tiers import QualityTier
+
+
+def make_template(value: int = 0) -> TemplateAnalysis:
+    return TemplateAnalysis(
+        image=np.full((4, 6, 3), value, dtype=np.uint8),
+        faces=FaceAnalysis(
+            bboxes=np.array([[1, 1, 3, 3]], dtype=np.float32),
+            kps=np.ones((1, 5, 2), dtype=np.float32),
+            det_scores=np.array([0.9], dtype=np.float32),
+        ),
+    )
+
+
+@pytest.fixture
+async def engine(mocker):
+    run_batch = mocker.MagicMock(side_effect=lambda items: [{} for _ in items])
+    engine = PipelineEngine(InferenceScheduler(run_batch, max_wait_ms=1))
+    engine.run_batch = run_batch
+    await engine.start()
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_pipeline_engine",
+        mocker.AsyncMock(return_value=engine),
+    )
+    template_index = mocker.MagicMock()
+    template_index.get = mocker.AsyncMock(return_value=make_template())
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_template_index",
+        mocker.AsyncMock(return_value=template_index),
+    )
+    mocker.patch.object(RecastPipeline, "preprocess")
+    mocker.patch.object(
+        RecastPipeline,
+        "postprocess",
+        autospec=True,
+        side_effect=lambda self, r: {"image": b"png", "key": self.result_key},
+    )
+    yield engine
+    await engine.stop()
+
+
+def make_service(mock_s3_client):
+    return create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "template_image_bucket": "bucket2",
+            "template_image_key": "template.jpg",
+        },
+        s3_client=mock_s3_client,
+    )
+
+
+def test_result_key_covers_source_template_and_params(mocker):
+    source = content_digest(b"selfie")
+    key = result_key(source, make_template())
+
+    assert key == result_key(source, make_template())
+    assert key != result_key(content_digest(b"other selfie"), make_template())
+    assert key != result_key(source, make_template(1))
+
+    assert key != result_key(source, make_template(), output_settings("png"))
+
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "codeformer.pth")
+    assert key != result_key(source, make_template())
+
+
+def test_result_key_covers_quality_tier(mocker):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+    source = content_digest(b"selfie")
+    fast = QualityTier("fast", face_boost=False)
+
+    assert result_key(source, make_template()) != result_key(
+        source, make_template(), quality_tier=fast
+    )
+
+    mocker.patch.object(config, "FACE_BOOST_MODEL", None)
+    assert result_key(source, make_template()) == result_key(
+        source, make_template(), quality_tier=fast
+    )
+
+
+async def test_cache_hit_skips_inference(mock_s3_client, engine):
+    mock_s3_client.file_exists.return_value = True
+    key = result_key(content_digest(b"fake-image-data"), make_template())
+
+    output = await make_service(mock_s3_client).run()
+
+    assert output == {"url": f"https://example.com/bucket1/recast_results/{key}.webp"}
+    engine.run_batch.assert_not_called()
+    mock_s3_client.upload_stream.assert_not_called()
+
+
+async def test_cache_miss_stores_result_under_content_key(mock_s3_client, engine):
+    key = result_key(content_digest(b"fake-image-data"), make_template())
+
+    await make_service(mock_s3_client).run()
+
+    engine.run_batch.assert_called_once()
+    mock_s3_client.file_exists.assert_awaited_once_with(
+        s3_bucket="bucket1", s3_key=f"recast_results/{key}.webp"
+    )
+    upload = mock_s3_client.upload_stream.await_args.kwargs
+    assert upload["s3_key"] == f"recast_results/{key}.webp"
+    assert upload["content_type"] == "image/webp"
+
+
+async def test_quality_tier_caps_target_and_is_recorded(mock_s3_client, engine):
+    tier = QualityTier("economy", face_boost=False, max_size=3)
+    service = create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "template_image_bucket": "bucket2",
+            "template_image_key": "template.jpg",
+        },
+        s3_client=mock_s3_client,
+        quality_tier=tier,
+    )
+
+    await service.run()
+
+    [pipeline] = engine.run_batch.call_args.args[0]
+    assert pipeline.target.image.shape == (2, 3, 3)
+    assert not pipeline.face_boost
+    upload = mock_s3_client.upload_stream.await_args.kwargs
+    assert upload["metadata"] == {"quality-tier": "economy"}
+
+
+async def test_expired_deadline_skips_inference(mock_s3_client, engine):
+    service = make_service(mock_s3_client)
+    service.deadline = Deadline(datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    with pytest.raises(DeadlineExceeded, match="before inference"):
+        await service.run()
+
+    engine.run_batch.assert_not_called()
+    mock_s3_client.upload_stream.assert_not_called()
+
+
+async def test_cancelled_pipeline_stops_before_upload(
+    mock_s3_client, engine, no_cancelled_pipelines
+):
+    no_cancelled_pipelines.side_effect = [set(), set(), {"test-id"}]
+
+    with pytest.raises(PipelineCancelled, match="before upload"):
+        await make_service(mock_s3_client).run()
+
+    engine.run_batch.assert_called_once()
+    mock_s3_client.upload_stream.assert_not_called()
+
+
+async def test_failed_lookup_falls_back_to_inference(mock_s3_client, engine):
+    mock_s3_client.file_exists.side_effect = RuntimeError("s3 down")
+
+    output = await make_service(mock_s3_client).run()
+
+    assert output == {"url": "https://example.com/result.png"}
+    engine.run_batch.assert_called_once()
+
+
+async def test_batch_only_runs_uncached_items(mock_s3_client, engine, mocker):
+    service = create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast_batch",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "templates": [
+                {
+                    "pipeline_id": f"id-{i}",
+                    "template_image_bucket": "bucket2",
+                    "template_image_key": f"template{i}.jpg",
+                }
+                for i in range(2)
+            ],
+        },
+        s3_client=mock_s3_client,
+    )
+    mocker.patch.object(RecastBatchPipeline, "preprocess")
+    mock_s3_client.file_exists.side_effect = [True, False]
+    on_item = mocker.AsyncMock()
+
+    await service.run_batch(on_item)
+
+    reported = {call.args[0]: call.args[1:] for call in on_item.await_args_list}
+    assert reported["id-0"][0]["url"].startswith(
+        "https://example.com/bucket1/recast_results/"
+    )
+    assert reported["id-1"] == ({"url": "https://example.com/result.png"}, None)
+    assert [len(call.args[0]) for call in engine.run_batch.call_args_list] == [1]
+
+
+async def test_batch_uses_output_settings_from_core_payload(
+    mock_s3_client, engine, mocker
+):
+    # shaped like core's build_submit_payloads output for two png jobs
+    service = create_service(
+        pipeline_id="id-0",
+        pipeline_name="recast_batch",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "output_format": "png",
+            "output_effort": 1,
+            "templates": [
+                {
+                    "pipeline_id": f"id-{i}",
+                    "template_image_bucket": "bucket2",
+                    "template_image_key": f"template{i}.jpg",
+                }
+                for i in range(2)
+            ],
+        },
+        s3_client=mock_s3_client,
+    )
+    mocker.patch.object(RecastBatchPipeline, "preprocess")
+
+    await service.run_batch(mocker.AsyncMock())
+
+    assert service.output == output_settings("png", effort=1)
+    uploads = [call.kwargs for call in mock_s3_client.upload_stream.await_args_list]
+    assert len(uploads) == 2
+    assert all(u["s3_key"].endswith(".png") for u in uploads)
+    assert all(u["content_type"] == "image/png" for u in uploads)
@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from services.common.s3.client import S3Client
+
+
+def make_client(mocker):
+    client = S3Client()
+    opened = []
+
+    @asynccontextmanager
+    async def create_client():
+        s3 = mocker.MagicMock()
+        s3.upload_fileobj = mocker.AsyncMock()
+        s3.head_object = mocker.AsyncMock()
+        opened.append(s3)
+        yield s3
+
+    client._create_client = create_client
+    return client, opened
+
+
+async def test_started_client_reuses_one_connection_pool(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+
+    await client.upload_file(b"data", "bucket", "folder", "png")
+    await client.file_exists("bucket", "folder/key.png")
+
+    assert len(opened) == 1
+    assert opened[0].upload_fileobj.await_count == 1
+    assert opened[0].head_object.await_count == 1
+    await client.close()
+
+
+async def test_client_without_start_opens_per_call(mocker):
+    client, opened = make_client(mocker)
+
+    await client.upload_file(b"data", "bucket", "folder", "png")
+    await client.upload_file(b"data", "bucket", "folder", "png")
+
+    assert len(opened) == 2
+
+
+def make_response(mocker, data: bytes, content_length: int | None = None) -> dict:
+    chunks = [data[i : i + 3] for i in range(0, len(data), 3)] + [b""]
+    body = mocker.MagicMock()
+    body.read = mocker.AsyncMock(side_effect=chunks)
+    return {"ContentLength": content_length or len(data), "Body": body}
+
+
+async def test_download_buffer_fills_preallocated_buffer(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+    opened[0].get_object = mocker.AsyncMock(
+        return_value=make_response(mocker, b"image-bytes")
+    )
+
+    buffer = await client.download_buffer("bucket", "source.jpg")
+
+    assert isinstance(buffer, memoryview)
+    assert buffer.tobytes() == b"image-bytes"
+    await client.close()
+
+
+async def test_download_buffer_rejects_short_body(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+    opened[0].get_object = mocker.AsyncMock(
+        return_value=make_response(mocker, b"image", content_length=10)
+    )
+
+    with pytest.raises(IOError):
+        await client.download_buffer("bucket", "source.jpg")
+    await client.close()
+
+
+async def chunks_of(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_upload_stream_puts_small_objects(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+    s3 = opened[0]
+    s3.put_object = mocker.AsyncMock()
+    s3.create_multipart_upload = mocker.AsyncMock()
+
+    await client.upload_stream(
+        chunks_of(b"ab", b"cd"), "bucket", "out/a.webp", "image/webp", part_size=10
+    )
+
+    s3.create_multipart_upload.assert_not_awaited()
+    assert s3.put_object.await_args.kwargs["Body"] == b"abcd"
+    assert s3.put_object.await_args.kwargs["ContentType"] == "image/webp"
+    await client.close()
+
+
+async def test_upload_stream_sends_parts_while_streaming(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+    s3 = opened[0]
+    s3.create_multipart_upload = mocker.AsyncMock(return_value={"UploadId": "u1"})
+    s3.upload_part = mocker.AsyncMock(
+        side_effect=lambda **kwargs: {"ETag": f"e{kwargs['PartNumber']}"}
+    )
+    s3.complete_multipart_upload = mocker.AsyncMock()
+
+    await client.upload_stream(
+        chunks_of(b"abc", b"def", b"g"), "bucket", "out/a.png", "image/png", part_size=4
+    )
+
+    assert [c.kwargs["Body"] for c in s3.upload_part.await_args_list] == [
+        b"abcdef",
+        b"g",
+    ]
+    assert s3.create_multipart_upload.await_args.kwargs["ContentType"] == "image/png"
+    assert s3.complete_multipart_upload.await_args.kwargs["MultipartUpload"] == {
+        "Parts": [{"ETag": "e1", "PartNumber": 1}, {"ETag": "e2", "PartNumber": 2}]
+    }
+    await client.close()
+
+
+async def test_upload_stream_aborts_failed_multipart_upload(mocker):
+    client, opened = make_client(mocker)
+    await client.start()
+    s3 = opened[0]
+    s3.create_multipart_upload = mocker.AsyncMock(return_value={"UploadId": "u1"})
+    s3.upload_part = mocker.AsyncMock(return_value={"ETag": "e1"})
+    s3.abort_multipart_upload = mocker.AsyncMock()
+
+    async def failing_chunks():
+        yield b"abcdef"
+        raise OSError("encoder failed")
+
+    with pytest.raises(OSError):
+        await client.upload_stream(
+            failing_chunks(), "bucket", "out/a.png", "image/png", part_size=4
+        )
+
+    s3.abort_multipart_upload.assert_awaited_once_with(
+        Bucket="bucket", Key="out/a.png", UploadId="u1"
+    )
+    await client.close()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+
+
+@pytest.fixture
+def batches():
+    return []
+
+
+async def make_scheduler(batches, run_batch=None, **kwargs) -> InferenceScheduler:
+    def record(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    scheduler = InferenceScheduler(run_batch or record, asyncio.Lock(), **kwargs)
+    await scheduler.start()
+    return scheduler
+
+
+async def test_concurrent_jobs_share_a_batch(batches):
+    scheduler = await make_scheduler(batches, max_batch_size=8, max_wait_ms=50)
+
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+    await scheduler.stop()
+
+    assert results == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+async def test_batches_are_capped_at_max_size(batches):
+    scheduler = await make_scheduler(batches, max_batch_size=2, max_wait_ms=50)
+
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+    await scheduler.stop()
+
+    assert results == [0, 10, 20, 30, 40]
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+async def test_lone_job_runs_after_deadline(batches):
+    scheduler = await make_scheduler(batches, max_batch_size=8, max_wait_ms=5)
+
+    assert await scheduler.submit(1) == 10
+    assert await scheduler.submit(2) == 20
+    await scheduler.stop()
+
+    assert batches == [[1], [2]]
+
+
+async def test_item_errors_go_to_their_job(batches):
+    def run_batch(items):
+        return [ValueError("no face") if item == 1 else item for item in items]
+
+    scheduler = await make_scheduler(batches, run_batch, max_wait_ms=50)
+
+    results = await asyncio.gather(
+        *(scheduler.submit(i) for i in range(3)), return_exceptions=True
+    )
+    await scheduler.stop()
+
+    assert results[0] == 0
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 2
+
+
+async def test_batch_failure_fails_every_job(batches):
+    def run_batch(items):
+        raise RuntimeError("out of memory")
+
+    scheduler = await make_scheduler(batches, run_batch, max_wait_ms=50)
+
+    results = await asyncio.gather(
+        *(scheduler.submit(i) for i in range(2)), return_exceptions=True
+    )
+
+    await scheduler.stop()
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_batches_wait_for_the_inference_lock():
+    lock = asyncio.Lock()
+    scheduler = InferenceScheduler(lambda items: items, lock, max_wait_ms=1)
+    await scheduler.start()
+
+    async with lock:
+        job = asyncio.create_task(scheduler.submit(1))
+        await asyncio.sleep(0.05)
+        assert not job.done()
+
+    assert await job == 1
+    await scheduler.stop()
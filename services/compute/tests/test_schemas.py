@@ -3,6 +3,7 @@ from pydantic import ValidationError
 
 from services.compute.app.pipelines.schemas import (
     PipelineInput,
+    RecastBatchPipelineInput,
     RecastPipelineInput,
 )
 
@@ -43,3 +44,45 @@ def test_recast_pipeline_input_extra_fields():
     )
 
     assert not hasattr(input_data, "extra_field")
+
+
+def test_recast_batch_pipeline_input_valid():
+    input_data = RecastBatchPipelineInput(
+        source_image_bucket="bucket1",
+        source_image_key="image.jpg",
+        templates=[
+            {
+                "pipeline_id": f"id-{i}",
+                "template_image_bucket": "bucket2",
+                "template_image_key": f"template{i}.jpg",
+            }
+            for i in range(3)
+        ],
+    )
+
+    assert [t.pipeline_id for t in input_data.templates] == ["id-0", "id-1", "id-2"]
+    assert input_data.templates[1].template_image_key == "template1.jpg"
+
+
+def test_recast_batch_pipeline_input_missing_templates():
+    with pytest.raises(ValidationError):
+        RecastBatchPipelineInput(
+            source_image_bucket="bucket1",
+            source_image_key="image.jpg",
+        )
+
+
+def test_recast_pipeline_input_output_settings():
+    fields = {
+        "source_image_bucket": "bucket1",
+        "source_image_key": "image.jpg",
+        "template_image_bucket": "bucket2",
+        "template_image_key": "template.jpg",
+    }
+
+    assert RecastPipelineInput(**fields).output_format is None
+    assert RecastPipelineInput(**fields, output_format="avif").output_format == "avif"
+    with pytest.raises(ValidationError):
+        RecastPipelineInput(**fields, output_format="gif")
+    with pytest.raises(ValidationError):
+        RecastPipelineInput(**fields, output_quality=0)
@@ -1,9 +1,23 @@
+import asyncio
+
 import pytest
 
+from services.compute.app.config import config
+from services.compute.app.pipelines.faces import (
+    FACE_RESTORE_MODELS_ROOT,
+    INSWAPPER_MODEL_PATH,
+)
 from services.compute.app.pipelines.service import (
     create_service,
+    RecastBatchService,
     RecastService,
 )
+from services.compute.app.pipelines.pipelines import (
+    RecastBatchPipeline,
+    RecastPipeline,
+)
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.stages import PipelineEngine
 from services.compute.app.pipelines.schemas import RecastPipelineInput
 
 
@@ -25,6 +39,105 @@ def test_create_service_recast_pipeline(mock_s3_client):
     assert isinstance(service.pipeline_input, RecastPipelineInput)
 
 
+def test_create_service_recast_batch_pipeline(mock_s3_client):
+    service = create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast_batch",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "templates": [
+                {
+                    "pipeline_id": f"id-{i}",
+                    "template_image_bucket": "bucket2",
+                    "template_image_key": f"template{i}.jpg",
+                }
+                for i in range(2)
+            ],
+        },
+        s3_client=mock_s3_client,
+    )
+
+    assert isinstance(service, RecastBatchService)
+    assert service.item_ids == ["id-0", "id-1"]
+
+
+@pytest.mark.asyncio
+async def test_recast_batch_reports_every_item(mock_s3_client, mocker):
+    service = create_service(
+        pipeline_id="test-id",
+        pipeline_name="recast_batch",
+        pipeline_input={
+            "source_image_bucket": "bucket1",
+            "source_image_key": "source.jpg",
+            "templates": [
+                {
+                    "pipeline_id": f"id-{i}",
+                    "template_image_bucket": "bucket2",
+                    "template_image_key": f"batch{i}.jpg",
+                }
+                for i in range(3)
+            ],
+        },
+        s3_client=mock_s3_client,
+    )
+    template_index = mocker.MagicMock()
+    template_index.get = mocker.AsyncMock(return_value=mocker.MagicMock())
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_template_index",
+        mocker.AsyncMock(return_value=template_index),
+    )
+    mocker.patch.object(RecastBatchPipeline, "preprocess")
+    mocker.patch.object(RecastPipeline, "preprocess")
+    mocker.patch.object(RecastPipeline, "postprocess", side_effect=lambda r: r)
+    batches = []
+
+    def run_batch(items):
+        batches.append(items)
+        return [{"image": b"1"}, ValueError("no face"), {"image": b"3"}]
+
+    engine = PipelineEngine(
+        InferenceScheduler(run_batch, asyncio.Lock(), max_wait_ms=50)
+    )
+    await engine.start()
+    mocker.patch(
+        "services.compute.app.pipelines.service.get_pipeline_engine",
+        mocker.AsyncMock(return_value=engine),
+    )
+    on_item = mocker.AsyncMock()
+
+    await service.run_batch(on_item)
+    await engine.stop()
+
+    reported = {call.args[0]: call.args for call in on_item.await_args_list}
+    assert reported["id-0"][1] == {"url": "https://example.com/result.png"}
+    assert isinstance(reported["id-1"][2], ValueError)
+    assert reported["id-2"][2] is None
+    source_downloads = [
+        call
+        for call in mock_s3_client.download_buffer.await_args_list
+        if call.kwargs["s3_key"] == "source.jpg"
+    ]
+    assert len(source_downloads) == 1
+    assert [len(b) for b in batches] == [3]
+
+
+def test_recast_requires_face_boost_model(mocker):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", "GFPGANv1.4.pth")
+
+    assert RecastService.required_models() == [
+        INSWAPPER_MODEL_PATH,
+        f"{FACE_RESTORE_MODELS_ROOT}/GFPGANv1.4.pth",
+    ]
+    assert RecastBatchService.required_models() == RecastService.required_models()
+
+
+def test_recast_without_face_boost_only_requires_swap_model(mocker):
+    mocker.patch.object(config, "FACE_BOOST_MODEL", None)
+
+    assert RecastService.required_models() == [INSWAPPER_MODEL_PATH]
+
+
 def test_create_service_invalid_pipeline_name(mock_s3_client):
     with pytest.raises(ValueError, match="Invalid pipeline type"):
         create_service(
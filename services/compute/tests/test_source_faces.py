@@ -0,0 +1,67 @@
+import numpy as np
+
+from services.compute.app.pipelines import pipelines
+from services.compute.app.pipelines.pipelines import RecastPipeline
+from services.compute.app.pipelines.source_faces import SourceFaceCache
+
+
+def make_pipeline(source_array, embedding=None) -> RecastPipeline:
+    pipeline = RecastPipeline(b"", None, source_embedding=embedding)
+    pipeline.source_array = source_array
+    pipeline.swap_target = object()
+    return pipeline
+
+
+def test_cache_is_bounded_lru():
+    cache = SourceFaceCache(max_size=2)
+    cache.put("a", np.zeros(4))
+    cache.put("b", np.ones(4))
+    cache.get("a")
+    cache.put("c", np.ones(4))
+
+    assert len(cache) == 2
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+
+
+def test_source_is_analysed_once_per_batch(mocker):
+    embed = mocker.patch.object(
+        pipelines, "embed_source", return_value=np.ones(4, dtype=np.float32)
+    )
+    mocker.patch.object(
+        pipelines, "swap_faces", side_effect=lambda items: [0] * len(items)
+    )
+    source = np.zeros((2, 2, 3), dtype=np.uint8)
+
+    results = pipelines.run_swap_pipelines(
+        [make_pipeline(source), make_pipeline(source)]
+    )
+
+    embed.assert_called_once()
+    assert all(np.array_equal(r["embedding"], np.ones(4)) for r in results)
+
+
+def test_cached_embedding_skips_detection(mocker):
+    embed = mocker.patch.object(pipelines, "embed_source")
+    swap = mocker.patch.object(
+        pipelines, "swap_faces", side_effect=lambda items: [0] * len(items)
+    )
+    cached = np.full(4, 0.5, dtype=np.float32)
+
+    results = pipelines.run_swap_pipelines([make_pipeline(np.zeros((2, 2, 3)), cached)])
+
+    embed.assert_not_called()
+    assert swap.call_args.args[0][0][0] is cached
+    assert results == [{"fake": 0, "embedding": None}]
+
+
+def test_source_without_face_fails_its_items(mocker):
+    mocker.patch.object(
+        pipelines, "embed_source", side_effect=ValueError("No face found")
+    )
+    swap = mocker.patch.object(pipelines, "swap_faces")
+
+    results = pipelines.run_swap_pipelines([make_pipeline(np.zeros((2, 2, 3)))])
+
+    assert isinstance(results[0], ValueError)
+    swap.assert_not_called()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.stages import PipelineEngine, Stage
+
+
+async def test_async_stage_runs_coroutines():
+    stage = Stage("io", workers=2, queue_size=4)
+    await stage.start()
+
+    async def double(x):
+        return x * 2
+
+    assert await asyncio.gather(*(stage.submit(double, i) for i in range(3))) == [
+        0,
+        2,
+        4,
+    ]
+    await stage.stop()
+
+
+async def test_cpu_stage_runs_in_executor_and_reports_errors():
+    stage = Stage("cpu", workers=1, queue_size=4, executor=ThreadPoolExecutor(1))
+    await stage.start()
+
+    def fail():
+        raise ValueError("bad image")
+
+    assert await stage.submit(sum, [1, 2]) == 3
+    with pytest.raises(ValueError, match="bad image"):
+        await stage.submit(fail)
+    await stage.stop()
+    stage.executor.shutdown()
+
+
+async def test_stage_queue_is_bounded_and_reports_depth():
+    stage = Stage("io", workers=1, queue_size=1)
+    release = asyncio.Event()
+
+    async def block():
+        await release.wait()
+
+    await stage.start()
+    first = asyncio.create_task(stage.submit(block))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(stage.submit(block))
+    third = asyncio.create_task(stage.submit(block))
+    await asyncio.sleep(0.01)
+
+    assert stage.active == 1
+    assert stage.depth == 1
+    # the third job waits for room in the queue
+    assert not third.done()
+
+    release.set()
+    await asyncio.gather(first, second, third)
+    assert stage.depth == 0
+    await stage.stop()
+
+
+async def test_stop_fails_queued_jobs():
+    stage = Stage("io", workers=1, queue_size=4)
+    await stage.start()
+
+    job = asyncio.create_task(stage.submit(asyncio.sleep, 10))
+    queued = asyncio.create_task(stage.submit(asyncio.sleep, 10))
+    await asyncio.sleep(0.01)
+    await stage.stop()
+
+    for task in (job, queued):
+        with pytest.raises(RuntimeError, match="stopped"):
+            await task
+
+
+async def test_waiting_encoder_does_not_hold_cpu_stage():
+    engine = PipelineEngine(
+        InferenceScheduler(lambda items: items, asyncio.Lock()),
+        io_workers=1,
+        cpu_workers=1,
+        encode_workers=1,
+    )
+    await engine.start()
+    upload_ready = threading.Event()
+
+    encoding = asyncio.create_task(engine.encode.submit(upload_ready.wait))
+    await asyncio.sleep(0.01)
+
+    assert await asyncio.wait_for(engine.cpu.submit(sum, [1, 2]), timeout=1) == 3
+    upload_ready.set()
+    await encoding
+    await engine.stop()
+
+
+async def test_engine_reports_stage_depths():
+    engine = PipelineEngine(
+        InferenceScheduler(lambda items: items, asyncio.Lock()),
+        io_workers=1,
+        cpu_workers=1,
+    )
+    await engine.start()
+
+    assert engine.depths() == {"io": 0, "cpu": 0, "encode": 0, "inference": 0}
+    assert await engine.inference.submit(1) == 1
+    await engine.stop()
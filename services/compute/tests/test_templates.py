@@ -0,0 +1,180 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.compute.app.pipelines import templates
+from services.compute.app.pipelines.faces import (
+    FaceAnalysis,
+    TemplateAnalysis,
+    open_image,
+)
+
+
+def make_analysis() -> TemplateAnalysis:
+    return TemplateAnalysis(
+        image=np.zeros((4, 6, 3), dtype=np.uint8),
+        faces=FaceAnalysis(
+            bboxes=np.array([[1, 1, 3, 3]], dtype=np.float32),
+            kps=np.ones((1, 5, 2), dtype=np.float32),
+            det_scores=np.array([0.9], dtype=np.float32),
+        ),
+    )
+
+
+@pytest.fixture
+def analyse(mocker):
+    return mocker.patch.object(
+        templates, "analyse_template", return_value=make_analysis()
+    )
+
+
+def make_index(s3, tmp_path) -> templates.TemplateIndex:
+    return templates.TemplateIndex(
+        s3,
+        cache_dir=str(tmp_path),
+        s3_prefix="template_index",
+        inference_lock=asyncio.Lock(),
+    )
+
+
+def test_template_analysis_round_trip():
+    analysis = make_analysis()
+
+    restored = TemplateAnalysis.from_bytes(analysis.to_bytes())
+
+    assert np.array_equal(restored.image, analysis.image)
+    assert np.array_equal(restored.faces.kps, analysis.faces.kps)
+    assert len(restored.faces) == 1
+
+
+def encode(image: Image.Image, format: str) -> memoryview:
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return memoryview(bytearray(buffer.getvalue()))
+
+
+def test_open_image_reads_buffer_in_place():
+    image = open_image(encode(Image.new("L", (6, 4), 128), "PNG"))
+
+    assert image.mode == "RGB"
+    assert image.size == (6, 4)
+
+
+def test_open_image_drafts_oversized_jpegs():
+    data = encode(Image.new("RGB", (1600, 800), (10, 20, 30)), "JPEG")
+
+    assert open_image(data).size == (1600, 800)
+    assert open_image(data, max_size=400).size == (400, 200)
+    assert open_image(data, max_size=500).size == (800, 400)
+
+
+@pytest.mark.asyncio
+async def test_template_index_analyses_once_and_persists(
+    mock_s3_client, tmp_path, analyse
+):
+    mock_s3_client.download_file.side_effect = KeyError("NoSuchKey")
+    mock_s3_client.download_buffer.return_value = b"image"
+    index = make_index(mock_s3_client, tmp_path)
+
+    first, second = await asyncio.gather(
+        index.get("templates", "a.jpg"), index.get("templates", "a.jpg")
+    )
+
+    assert first is second
+    analyse.assert_called_once_with(b"image")
+    mock_s3_client.upload_file.assert_awaited_once()
+    name = templates.TemplateIndex.artifact_name("templates", "a.jpg")
+    assert (tmp_path / f"{name}.npz").exists()
+
+
+@pytest.mark.asyncio
+async def test_template_index_warms_from_disk(mock_s3_client, tmp_path, analyse):
+    await make_index(mock_s3_client, tmp_path).get("templates", "a.jpg")
+    mock_s3_client.download_file.reset_mock()
+    mock_s3_client.download_buffer.reset_mock()
+    analyse.reset_mock()
+
+    index = make_index(mock_s3_client, tmp_path)
+    index.warm()
+    analysis = await index.get("templates", "a.jpg")
+
+    assert len(analysis.faces) == 1
+    analyse.assert_not_called()
+    mock_s3_client.download_file.assert_not_called()
+    mock_s3_client.download_buffer.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_template_index_uses_stored_artifact(mock_s3_client, tmp_path, analyse):
+    mock_s3_client.download_file.return_value = make_analysis().to_bytes()
+    index = make_index(mock_s3_client, tmp_path)
+
+    analysis = await index.get("templates", "a.jpg")
+
+    assert len(analysis.faces) == 1
+    analyse.assert_not_called()
+
+
+def test_template_cache_evicts_least_recently_used():
+    entry = make_analysis()
+    cache = templates.TemplateCache(max_bytes=entry.nbytes * 2)
+
+    cache.put("a", entry)
+    cache.put("b", make_analysis())
+    cache.get("a")
+    cache.put("c", make_analysis())
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.size == entry.nbytes * 2
+
+
+def test_template_cache_skips_entries_over_budget():
+    entry = make_analysis()
+    cache = templates.TemplateCache(max_bytes=entry.nbytes - 1)
+
+    cache.put("a", entry)
+
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+@pytest.mark.asyncio
+async def test_template_index_warm_respects_budget(mock_s3_client, tmp_path, analyse):
+    index = make_index(mock_s3_client, tmp_path)
+    await index.get("templates", "a.jpg")
+    await index.get("templates", "b.jpg")
+
+    budget = make_analysis().nbytes
+    warmed = templates.TemplateIndex(
+        mock_s3_client,
+        cache_dir=str(tmp_path),
+        s3_prefix="template_index",
+        inference_lock=asyncio.Lock(),
+        max_bytes=budget,
+    )
+    warmed.warm()
+
+    assert len(warmed._cache) == 1
+
+
+def test_template_analysis_resized_scales_faces():
+    analysis = TemplateAnalysis(
+        image=np.zeros((400, 800, 3), dtype=np.uint8),
+        faces=FaceAnalysis(
+            bboxes=np.array([[100, 100, 300, 300]], dtype=np.float32),
+            kps=np.full((1, 5, 2), 200, dtype=np.float32),
+            det_scores=np.array([0.9], dtype=np.float32),
+        ),
+    )
+
+    small = analysis.resized(200)
+
+    assert small.image.shape == (100, 200, 3)
+    assert np.allclose(small.faces.bboxes, [[25, 25, 75, 75]])
+    assert np.allclose(small.faces.kps, 50)
+    assert analysis.resized(1000) is analysis
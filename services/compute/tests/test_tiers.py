@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from services.compute.app.pipelines.tiers import (
+    FULL_TIER,
+    LoadMonitor,
+    QualityPolicy,
+    wait_seconds,
+)
+
+
+def make_policy() -> QualityPolicy:
+    return QualityPolicy(
+        fast_backlog=10,
+        fast_wait_seconds=30,
+        economy_backlog=50,
+        economy_wait_seconds=120,
+        economy_max_size=1024,
+    )
+
+
+def test_policy_steps_down_with_backlog_or_wait():
+    policy = make_policy()
+
+    assert policy.select(backlog=0, wait_seconds=0) is FULL_TIER
+    assert policy.select(backlog=10, wait_seconds=0).name == "fast"
+    assert policy.select(backlog=0, wait_seconds=45).name == "fast"
+    assert policy.select(backlog=50, wait_seconds=0).name == "economy"
+    assert policy.select(backlog=0, wait_seconds=600).max_size == 1024
+    assert not policy.select(backlog=10, wait_seconds=0).face_boost
+
+
+async def test_load_monitor_polls_queue_length(mocker):
+    get_queue_length = mocker.AsyncMock(side_effect=[RuntimeError("closed"), 7, 7])
+    monitor = LoadMonitor(get_queue_length, interval_seconds=0.01)
+    monitor.in_flight = 2
+
+    await monitor.start()
+    while get_queue_length.await_count < 2:
+        await asyncio.sleep(0.01)
+    await monitor.stop()
+
+    assert monitor.backlog == 9
+
+
+def test_wait_seconds_from_enqueued_at():
+    enqueued_at = datetime.now(timezone.utc) - timedelta(seconds=90)
+
+    assert 89 < wait_seconds(enqueued_at.isoformat()) < 95
+    assert wait_seconds(None) == 0
+    assert wait_seconds("not a date") == 0
@@ -0,0 +1,93 @@
+import asyncio
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from services.compute.app.pipelines.faces import SwapTarget
+from services.compute.app.pipelines.pipelines import RecastPipeline
+from services.compute.app.pipelines.scheduler import InferenceScheduler
+from services.compute.app.pipelines.workers import PAGE_SIZE, share_model_weights
+
+
+def slow_batch(items):
+    time.sleep(0.1)
+    return items
+
+
+async def test_scheduler_runs_batches_concurrently_on_executor():
+    scheduler = InferenceScheduler(
+        slow_batch,
+        max_batch_size=1,
+        max_wait_ms=1,
+        executor=ThreadPoolExecutor(4),
+        concurrency=4,
+    )
+    await scheduler.start()
+
+    t1 = time.perf_counter()
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(4)))
+    elapsed = time.perf_counter() - t1
+    await scheduler.stop()
+
+    assert results == [0, 1, 2, 3]
+    assert elapsed < 0.3
+
+
+def test_recast_pipeline_pickles_only_inference_inputs():
+    pipeline = RecastPipeline(b"source-bytes", object())
+    pipeline.source_array = np.zeros((2, 2, 3), dtype=np.uint8)
+    pipeline.swap_target = SwapTarget(
+        image=np.zeros((64, 64, 3), dtype=np.uint8),
+        M=np.eye(2, 3),
+        blob=np.ones((1, 3, 128, 128), dtype=np.float32),
+    )
+
+    restored = pickle.loads(pickle.dumps(pipeline))
+
+    assert restored.source_image is None
+    assert restored.target is None
+    assert restored.swap_target.image is None
+    assert np.array_equal(restored.swap_target.blob, pipeline.swap_target.blob)
+    # the parent still has everything postprocess needs
+    assert pipeline.swap_target.image is not None
+
+
+def test_share_model_weights_writes_aligned_external_data(tmp_path):
+    onnx = pytest.importorskip("onnx")
+    onnxruntime = pytest.importorskip("onnxruntime")
+    from onnx import TensorProto, helper, numpy_helper
+
+    weights = np.random.rand(64, 256).astype(np.float32)
+    bias = np.random.rand(256).astype(np.float32)
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["x", "w"], ["xw"]),
+            helper.make_node("Add", ["xw", "b"], ["y"]),
+        ],
+        "g",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 64])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 256])],
+        [numpy_helper.from_array(weights, "w"), numpy_helper.from_array(bias, "b")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    path = str(tmp_path / "model.onnx")
+    onnx.save(model, path)
+
+    shared_path = share_model_weights(path)
+
+    shared = onnx.load(shared_path, load_external_data=False)
+    for tensor in shared.graph.initializer:
+        assert tensor.data_location == TensorProto.EXTERNAL
+        offset = {e.key: e.value for e in tensor.external_data}["offset"]
+        assert int(offset) % PAGE_SIZE == 0
+
+    x = np.random.rand(3, 64).astype(np.float32)
+    session = onnxruntime.InferenceSession(
+        shared_path, providers=["CPUExecutionProvider"]
+    )
+    assert np.allclose(session.run(None, {"x": x})[0], x @ weights + bias)
+    assert share_model_weights(path) == shared_path
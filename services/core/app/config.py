@@ -11,8 +11,31 @@ class Config(BaseSettings):
     SUPABASE_URL: str
     ALLOWED_ORIGINS: str
 
-    RATE_LIMIT_QUEUE_PER_MINUTE: int = 5
+    RATE_LIMIT_QUEUE_JOBS_PER_MINUTE: int = 30
+    RATE_LIMIT_QUEUE_BURST: int = 6
     RATE_LIMIT_STATUS_PER_MINUTE: int = 600
+    RATE_LIMIT_STATUS_STREAM_PER_MINUTE: int = 30
+    RATE_LIMIT_CANCEL_PER_MINUTE: int = 30
+
+    STATUS_STREAM_CHANNEL: str = "pipelines:status"
+    STATUS_STREAM_HEARTBEAT_SECONDS: int = 15
+    STATUS_STREAM_TIMEOUT_SECONDS: int = 600
+
+    PIPELINE_STATUS_CACHE_TTL_SECONDS: int = 3600
+
+    PIPELINE_UPDATE_BATCH_SIZE: int = 100
+    PIPELINE_UPDATE_BATCH_WAIT_MS: int = 50
+
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_MS: int = 1000
+
+    # 0 disables deadlines
+    PIPELINE_DEADLINE_SECONDS: int = 300
+    PIPELINE_EXPIRY_GRACE_SECONDS: int = 60
+    PIPELINE_CANCEL_TTL_SECONDS: int = 3600
+
+    TEMPLATES_CACHE_TTL_SECONDS: int = 3600
+    TEMPLATES_LOCAL_CACHE_TTL_SECONDS: int = 5
 
     MAX_PIPELINES_PER_REQUEST: int = 6
 
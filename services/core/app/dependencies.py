@@ -10,16 +10,22 @@ from services.common.rabbitmq.config import rabbitmq_config
 from services.common.auth import (
     create_get_current_user,
     create_get_current_user_optional,
+    init_jwks,
+    shutdown_jwks,
 )
 from services.common.redis import get_redis_client, close_redis_client
 
 from services.core.app.config import config
+from services.core.app.pipelines.events import PipelineStatusBroadcaster
+from services.core.app.pipelines.outbox import PipelineOutboxRelay
 
 log = logging.getLogger(__name__)
 
 _rabbitmq_connection: Optional[RabbitMQConnection] = None
 _rabbitmq_publisher: Optional[RabbitMQPublisher] = None
 _rabbitmq_consumer: Optional[RabbitMQConsumer] = None
+_status_broadcaster: Optional[PipelineStatusBroadcaster] = None
+_outbox_relay: Optional[PipelineOutboxRelay] = None
 
 get_current_user = create_get_current_user(config.SUPABASE_URL)
 get_current_user_optional = create_get_current_user_optional(config.SUPABASE_URL)
@@ -41,12 +47,40 @@ async def init_rabbitmq() -> None:
     log.info("RabbitMQ initialized successfully")
 
 
+async def init_outbox_relay() -> None:
+    global _outbox_relay
+
+    _outbox_relay = PipelineOutboxRelay(
+        await get_rabbitmq_publisher(),
+        batch_size=config.OUTBOX_BATCH_SIZE,
+        poll_interval_ms=config.OUTBOX_POLL_INTERVAL_MS,
+        expiry_grace_seconds=config.PIPELINE_EXPIRY_GRACE_SECONDS,
+    )
+    await _outbox_relay.start()
+
+
+async def init_auth() -> None:
+    log.info("Initializing JWKS")
+    await init_jwks(config.SUPABASE_URL)
+
+
+async def shutdown_auth() -> None:
+    await shutdown_jwks()
+
+
 async def init_redis() -> None:
     log.info("Initializing Redis connection")
     await get_redis_client()
     log.info("Redis initialized successfully")
 
 
+async def init_status_broadcaster() -> None:
+    global _status_broadcaster
+
+    _status_broadcaster = PipelineStatusBroadcaster(config.STATUS_STREAM_CHANNEL)
+    await _status_broadcaster.start()
+
+
 async def get_rabbitmq_connection() -> RabbitMQConnection:
     if _rabbitmq_connection is None:
         raise RuntimeError("RabbitMQ connection not initialized")
@@ -65,6 +99,27 @@ async def get_rabbitmq_consumer() -> RabbitMQConsumer:
     return _rabbitmq_consumer
 
 
+async def get_status_broadcaster() -> PipelineStatusBroadcaster:
+    if _status_broadcaster is None:
+        raise RuntimeError("Status broadcaster not initialized")
+    return _status_broadcaster
+
+
+async def get_outbox_relay() -> PipelineOutboxRelay:
+    if _outbox_relay is None:
+        raise RuntimeError("Outbox relay not initialized")
+    return _outbox_relay
+
+
+async def shutdown_outbox_relay() -> None:
+    global _outbox_relay
+
+    if _outbox_relay:
+        await _outbox_relay.stop()
+
+    _outbox_relay = None
+
+
 async def shutdown_rabbitmq() -> None:
     global _rabbitmq_connection, _rabbitmq_publisher, _rabbitmq_consumer
 
@@ -87,3 +142,12 @@ async def shutdown_redis() -> None:
     log.info("Shutting down Redis")
     await close_redis_client()
     log.info("Redis shutdown complete")
+
+
+async def shutdown_status_broadcaster() -> None:
+    global _status_broadcaster
+
+    if _status_broadcaster:
+        await _status_broadcaster.stop()
+
+    _status_broadcaster = None
@@ -0,0 +1,121 @@
+import logging
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.common.domain.enums import PipelineStatus
+from services.common.redis import get_redis_client
+from services.core.app.config import config
+
+from .schemas import PipelineStatusItem
+from . import service
+
+log = logging.getLogger(__name__)
+
+STATUS_KEY_PREFIX = "pipeline:status:"
+
+_LUA_RANKS = ", ".join(f"{s.value} = {s.rank}" for s in PipelineStatus)
+_LUA_TERMINAL = ", ".join(f"{s.value} = true" for s in PipelineStatus if s.is_terminal)
+
+# KEYS = status keys, ARGV = TTL seconds, then a status and item JSON per key.
+# A cached status is only replaced by one it can transition to, so updates
+# that replicas write out of order never move a pipeline back.
+_SET_STATUSES_SCRIPT = f"""
+local ranks = {{{_LUA_RANKS}}}
+local terminal = {{{_LUA_TERMINAL}}}
+local ttl = ARGV[1]
+
+for i, key in ipairs(KEYS) do
+    local status = ARGV[2 * i]
+    local current = redis.call('GET', key)
+    local current_status = current and cjson.decode(current)['status']
+    if not current_status
+        or (not terminal[current_status]
+            and ranks[status] >= (ranks[current_status] or 0)) then
+        redis.call('SET', key, ARGV[2 * i + 1], 'EX', ttl)
+    end
+end
+"""
+
+_set_statuses_script: Any = None
+
+
+def _status_key(pipeline_id: UUID) -> str:
+    return f"{STATUS_KEY_PREFIX}{pipeline_id}"
+
+
+async def cache_pipeline_statuses(
+    items: list[PipelineStatusItem], only_missing: bool = False
+) -> None:
+    global _set_statuses_script
+
+    if not items:
+        return
+
+    redis_client = await get_redis_client()
+    if only_missing:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for item in items:
+                pipe.set(
+                    _status_key(item.id),
+                    item.model_dump_json(),
+                    ex=config.PIPELINE_STATUS_CACHE_TTL_SECONDS,
+                    nx=True,
+                )
+            await pipe.execute()
+        return
+
+    if _set_statuses_script is None:
+        _set_statuses_script = redis_client.register_script(_SET_STATUSES_SCRIPT)
+
+    args: list[Any] = [config.PIPELINE_STATUS_CACHE_TTL_SECONDS]
+    for item in items:
+        args += [item.status.value, item.model_dump_json()]
+    await _set_statuses_script(
+        keys=[_status_key(item.id) for item in items],
+        args=args,
+        client=redis_client,
+    )
+
+
+async def get_cached_pipeline_statuses(
+    pipeline_ids: list[UUID],
+) -> dict[UUID, PipelineStatusItem]:
+    if not pipeline_ids:
+        return {}
+
+    redis_client = await get_redis_client()
+    values = await redis_client.mget([_status_key(pid) for pid in pipeline_ids])
+
+    return {
+        pipeline_id: PipelineStatusItem.model_validate_json(value)
+        for pipeline_id, value in zip(pipeline_ids, values)
+        if value is not None
+    }
+
+
+async def load_pipeline_statuses(
+    db: AsyncSession, pipeline_ids: list[UUID]
+) -> list[PipelineStatusItem]:
+    pipeline_ids = list(dict.fromkeys(pipeline_ids))
+
+    try:
+        statuses = await get_cached_pipeline_statuses(pipeline_ids)
+    except Exception as e:
+        log.warning(f"Failed to read pipeline status cache: {e}")
+        statuses = {}
+
+    missing = [pid for pid in pipeline_ids if pid not in statuses]
+    if missing:
+        pipelines = await service.get_pipelines_by_ids(db, missing)
+        loaded = [PipelineStatusItem.model_validate(p) for p in pipelines]
+        statuses.update({item.id: item for item in loaded})
+
+        # never overwrite a fresher write-through from the update consumer
+        try:
+            await cache_pipeline_statuses(loaded, only_missing=True)
+        except Exception as e:
+            log.warning(f"Failed to backfill pipeline status cache: {e}")
+
+    return [statuses[pid] for pid in pipeline_ids if pid in statuses]
@@ -1,42 +1,49 @@
 import logging
-from typing import Any, Dict
-from uuid import UUID
 
 from services.common.rabbitmq import RabbitMQConsumer
 from services.common.rabbitmq.config import rabbitmq_config
-from services.common.domain.enums import PipelineStatus
 from services.common.database.core import async_session_maker
-from . import service
-
 from services.common.logging.config import context_trace_id, context_pipeline_id
+from services.core.app.config import config
+from . import cache, events, service
+from .schemas import PipelineStatusItem, PipelineUpdate
 
 log = logging.getLogger(__name__)
 
 
-async def handle_pipeline_update(message: Dict[str, Any]) -> None:
-    trace_id = message.get("trace_id")
-    pipeline_id = UUID(message["pipeline_id"])
-    status = PipelineStatus(message["status"])
-    result_url = message.get("result_url")
-    error_message = message.get("message")
+async def handle_pipeline_updates(messages: list[PipelineUpdate]) -> None:
+    for message in messages:
+        context_trace_id.set(message.trace_id)
+        context_pipeline_id.set(str(message.pipeline_id))
+        log.info(f"Received pipeline update: status={message.status.value}")
+    context_trace_id.set(None)
+    context_pipeline_id.set(None)
 
-    context_trace_id.set(str(trace_id))
-    context_pipeline_id.set(str(pipeline_id))
+    updates = service.coalesce_pipeline_updates(messages)
 
-    log.info(f"Received pipeline update: status={status}")
+    log.info(f"Received {len(messages)} pipeline updates for {len(updates)} pipelines")
     async with async_session_maker() as db:
-        await service.update_pipeline_status(
-            db=db,
-            pipeline_id=pipeline_id,
-            status=status,
-            result_url=result_url,
-            message=error_message,
-        )
+        pipelines = await service.apply_pipeline_updates(db=db, updates=updates)
+
+    items = [PipelineStatusItem.model_validate(p) for p in pipelines]
+
+    try:
+        await cache.cache_pipeline_statuses(items)
+    except Exception as e:
+        log.warning(f"Failed to cache pipeline statuses: {e}")
+
+    try:
+        await events.publish_pipeline_statuses(items)
+    except Exception as e:
+        log.warning(f"Failed to publish pipeline status events: {e}")
 
 
 async def start_pipeline_update_consumer(consumer: RabbitMQConsumer) -> None:
     log.info("Starting pipeline update consumer")
-    await consumer.consume(
+    await consumer.consume_batch(
         queue_name=rabbitmq_config.queue_update,
-        callback=handle_pipeline_update,
+        callback=handle_pipeline_updates,
+        validate=PipelineUpdate.model_validate,
+        max_batch_size=config.PIPELINE_UPDATE_BATCH_SIZE,
+        max_wait_ms=config.PIPELINE_UPDATE_BATCH_WAIT_MS,
     )
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import AsyncIterator
+from uuid import UUID
+
+from starlette.requests import Request
+
+from services.common.redis import get_redis_client
+from services.core.app.config import config
+
+from .schemas import PipelineStatusItem
+
+log = logging.getLogger(__name__)
+
+
+async def publish_pipeline_statuses(items: list[PipelineStatusItem]) -> None:
+    if not items:
+        return
+
+    redis_client = await get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for item in items:
+            pipe.publish(config.STATUS_STREAM_CHANNEL, item.model_dump_json())
+        await pipe.execute()
+
+
+class PipelineStatusBroadcaster:
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._subscribers: dict[UUID, set[asyncio.Queue]] = defaultdict(set)
+        self._listener_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        log.info(f"Starting status broadcaster for channel: {self.channel}")
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+        log.info("Status broadcaster stopped")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                redis_client = await get_redis_client()
+                async with redis_client.pubsub(
+                    ignore_subscribe_messages=True
+                ) as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    log.info(f"Subscribed to {self.channel}")
+
+                    while True:
+                        message = await pubsub.get_message(timeout=1.0)
+                        if message is None:
+                            continue
+                        self.dispatch(
+                            PipelineStatusItem.model_validate_json(message["data"])
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(
+                    f"Subscription to {self.channel} failed: {e}. Retrying in 1 second..."
+                )
+                await asyncio.sleep(1)
+
+    def dispatch(self, item: PipelineStatusItem) -> None:
+        for queue in self._subscribers.get(item.id, ()):
+            queue.put_nowait(item)
+
+    def subscribe(self, pipeline_ids: list[UUID]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for pipeline_id in pipeline_ids:
+            self._subscribers[pipeline_id].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, pipeline_ids: list[UUID]) -> None:
+        for pipeline_id in pipeline_ids:
+            subscribers = self._subscribers.get(pipeline_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[pipeline_id]
+
+
+def format_status_event(item: PipelineStatusItem) -> str:
+    return f"event: status\ndata: {item.model_dump_json()}\n\n"
+
+
+async def stream_pipeline_statuses(
+    request: Request,
+    broadcaster: PipelineStatusBroadcaster,
+    queue: asyncio.Queue,
+    pipeline_ids: list[UUID],
+    snapshot: list[PipelineStatusItem],
+) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.STATUS_STREAM_TIMEOUT_SECONDS
+
+    try:
+        # unknown ids are dropped, same as POST /status
+        pending = {item.id for item in snapshot if not item.status.is_terminal}
+        for item in snapshot:
+            yield format_status_event(item)
+
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or await request.is_disconnected():
+                break
+
+            try:
+                item = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=min(config.STATUS_STREAM_HEARTBEAT_SECONDS, remaining),
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield format_status_event(item)
+            if item.status.is_terminal:
+                pending.discard(item.id)
+    finally:
+        broadcaster.unsubscribe(queue, pipeline_ids)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Text
-from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime, timezone
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from services.common.database import Base, TimeStampMixin
 
@@ -12,4 +13,22 @@ class Pipeline(Base, TimeStampMixin):
     pipeline_name = Column(Text, nullable=False)
     status = Column(Text, nullable=False)
     result_url = Column(Text, nullable=True)
+    preview_url = Column(Text, nullable=True)
     message = Column(Text, nullable=True)
+
+
+class PipelineOutboxMessage(Base):
+    __tablename__ = "pipeline_outbox"
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    routing_key = Column(Text, nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
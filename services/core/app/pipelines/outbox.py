@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.common.database.core import async_session_maker
+from services.common.rabbitmq import RabbitMQPublisher
+
+from .models import PipelineOutboxMessage
+from .service import submit_expiration
+
+log = logging.getLogger(__name__)
+
+
+class PipelineOutboxRelay:
+    def __init__(
+        self,
+        publisher: RabbitMQPublisher,
+        batch_size: int = 100,
+        poll_interval_ms: int = 1000,
+        session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+        expiry_grace_seconds: float = 60,
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval_ms = poll_interval_ms
+        self.expiry_grace_seconds = expiry_grace_seconds
+        self.session_maker = session_maker
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        log.info("Starting outbox relay")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        log.info("Outbox relay stopped")
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while await self.relay_batch() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Outbox relay failed: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def relay_batch(self) -> int:
+        async with self.session_maker() as db:
+            # rows locked by another replica are skipped, not waited on
+            result = await db.execute(
+                select(PipelineOutboxMessage)
+                .order_by(PipelineOutboxMessage.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = list(result.scalars().all())
+            if not messages:
+                return 0
+
+            by_routing_key: dict[str, list[dict]] = defaultdict(list)
+            for message in messages:
+                by_routing_key[message.routing_key].append(message.payload)
+
+            now = datetime.now(timezone.utc)
+            for routing_key, payloads in by_routing_key.items():
+                await self.publisher.publish_many(
+                    routing_key=routing_key,
+                    messages=payloads,
+                    expirations=[
+                        submit_expiration(p, now, self.expiry_grace_seconds)
+                        for p in payloads
+                    ],
+                )
+
+            await db.execute(
+                delete(PipelineOutboxMessage).where(
+                    PipelineOutboxMessage.id.in_([m.id for m in messages])
+                )
+            )
+            await db.commit()
+
+        log.info(f"Relayed {len(messages)} outbox messages")
+
+        return len(messages)
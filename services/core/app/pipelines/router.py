@@ -1,23 +1,30 @@
+import asyncio
 import logging
-from datetime import datetime
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 
 from services.common.database import DbSession
-from services.common.rabbitmq import RabbitMQPublisher, RabbitMQConnection
+from services.common.rabbitmq import RabbitMQConnection
 from services.common.rabbitmq.config import rabbitmq_config
-from services.common.redis import rate_limit
+from services.common.redis import (
+    RateLimitAlgorithm,
+    mark_pipelines_cancelled,
+    rate_limit,
+)
 from services.common.auth import User
-from services.core.app.dependencies import get_current_user
+from services.core.app.dependencies import get_current_user, get_status_broadcaster
 from services.core.app.config import config
 
 from .schemas import (
+    PipelineCancelRequest,
     QueuePipelinesRequest,
     QueuePipelinesResponse,
     PipelineStatusRequest,
     PipelineStatusResponse,
     PipelineStatusItem,
 )
-from . import service
+from . import cache, events, service
+from .outbox import PipelineOutboxRelay
 
 log = logging.getLogger(__name__)
 
@@ -30,10 +37,19 @@ async def get_connection() -> RabbitMQConnection:
     return await get_rabbitmq_connection()
 
 
-async def get_publisher() -> RabbitMQPublisher:
-    from services.core.app.dependencies import get_rabbitmq_publisher
+async def queue_cost(request: Request) -> int:
+    try:
+        body = await request.json()
+        return max(len(body.get("jobs") or []), 1)
+    except Exception:
+        # malformed bodies are rejected by validation, charge them as one call
+        return 1
+
 
-    return await get_rabbitmq_publisher()
+async def get_relay() -> PipelineOutboxRelay:
+    from services.core.app.dependencies import get_outbox_relay
+
+    return await get_outbox_relay()
 
 
 @router.post(
@@ -43,10 +59,13 @@ async def get_publisher() -> RabbitMQPublisher:
         Depends(
             rate_limit(
                 "queue",
-                config.RATE_LIMIT_QUEUE_PER_MINUTE,
+                config.RATE_LIMIT_QUEUE_JOBS_PER_MINUTE,
                 60,
                 get_current_user,
                 config.TEST_USER_EMAIL,
+                algorithm=RateLimitAlgorithm.TOKEN_BUCKET,
+                burst=config.RATE_LIMIT_QUEUE_BURST,
+                cost=queue_cost,
             )
         )
     ],
@@ -60,7 +79,6 @@ async def queue_pipelines(
     from services.common.logging.config import (
         context_trace_id,
         context_user_id,
-        context_pipeline_id,
     )
 
     trace_id = request.trace_id
@@ -96,42 +114,25 @@ async def queue_pipelines(
             )
 
         connection = await get_connection()
-        queue_length = await connection.get_queue_length(rabbitmq_config.queue_main)
-
-        pipeline_ids = []
-        publisher = await get_publisher()
+        relay = await get_relay()
 
-        for job in request.jobs:
-            pipeline_id = job.pipeline_id
-            pipeline_name = job.pipeline_name
+        log.info(f"Creating {len(request.jobs)} pipelines")
 
-            context_pipeline_id.set(str(pipeline_id))
-
-            log.info(f"Creating pipeline: {pipeline_name}")
-
-            await service.create_pipeline(
-                db=db,
-                pipeline_id=pipeline_id,
-                trace_id=trace_id,
-                pipeline_name=pipeline_name,
-            )
+        pipelines, queue_length = await asyncio.gather(
+            service.create_pipelines(db=db, trace_id=trace_id, jobs=request.jobs),
+            connection.get_queue_length(rabbitmq_config.queue_main),
+        )
+        pipeline_ids = [job.pipeline_id for job in request.jobs]
 
-            message = {
-                "trace_id": str(trace_id),
-                "pipeline_id": str(pipeline_id),
-                "pipeline_name": pipeline_name,
-                "input": job.input,
-                "enqueued_at": datetime.utcnow().isoformat(),
-            }
-
-            await publisher.publish(
-                routing_key=rabbitmq_config.routing_submit,
-                message=message,
-                trace_id=str(trace_id),
-                pipeline_id=str(pipeline_id),
+        try:
+            await cache.cache_pipeline_statuses(
+                [PipelineStatusItem.model_validate(p) for p in pipelines],
+                only_missing=True,
             )
+        except Exception as e:
+            log.warning(f"Failed to cache pipeline statuses: {e}")
 
-            pipeline_ids.append(pipeline_id)
+        relay.notify()
 
         log.info(
             f"Successfully queued {len(pipeline_ids)} pipelines, queue_length={queue_length}"
@@ -164,8 +165,106 @@ async def get_pipeline_status(
     db: DbSession,
     current_user: User = Depends(get_current_user),
 ) -> PipelineStatusResponse:
-    pipelines = await service.get_pipelines_by_ids(db, request.pipeline_ids)
+    pipelines = await cache.load_pipeline_statuses(db, request.pipeline_ids)
+
+    return PipelineStatusResponse(pipelines=pipelines)
 
-    return PipelineStatusResponse(
-        pipelines=[PipelineStatusItem.model_validate(p) for p in pipelines]
+
+@router.post(
+    "/status/stream",
+    dependencies=[
+        Depends(
+            rate_limit(
+                "status_stream",
+                config.RATE_LIMIT_STATUS_STREAM_PER_MINUTE,
+                60,
+                get_current_user,
+                config.TEST_USER_EMAIL,
+            )
+        )
+    ],
+)
+async def stream_pipeline_status(
+    request: PipelineStatusRequest,
+    http_request: Request,
+    db: DbSession,
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    broadcaster = await get_status_broadcaster()
+
+    # subscribe before reading the snapshot so no update falls in between
+    queue = broadcaster.subscribe(request.pipeline_ids)
+    try:
+        snapshot = await cache.load_pipeline_statuses(db, request.pipeline_ids)
+    except Exception:
+        broadcaster.unsubscribe(queue, request.pipeline_ids)
+        raise
+
+    return StreamingResponse(
+        events.stream_pipeline_statuses(
+            request=http_request,
+            broadcaster=broadcaster,
+            queue=queue,
+            pipeline_ids=request.pipeline_ids,
+            snapshot=snapshot,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+@router.post(
+    "/cancel",
+    response_model=PipelineStatusResponse,
+    dependencies=[
+        Depends(
+            rate_limit(
+                "cancel",
+                config.RATE_LIMIT_CANCEL_PER_MINUTE,
+                60,
+                get_current_user,
+                config.TEST_USER_EMAIL,
+            )
+        )
+    ],
+)
+async def cancel_pipelines(
+    request: PipelineCancelRequest,
+    db: DbSession,
+    current_user: User = Depends(get_current_user),
+) -> PipelineStatusResponse:
+    if len(request.pipeline_ids) > config.MAX_PIPELINES_PER_REQUEST:
+        from fastapi import HTTPException, status
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid number of pipelines in request: {len(request.pipeline_ids)}. "
+            f"Must be at most {config.MAX_PIPELINES_PER_REQUEST}.",
+        )
+
+    pipelines = await service.cancel_pipelines(db, request.pipeline_ids)
+    items = [PipelineStatusItem.model_validate(p) for p in pipelines]
+    log.info(f"Cancelled {len(items)}/{len(request.pipeline_ids)} pipelines")
+
+    # the database is authoritative, late worker updates are dropped there; the
+    # set only lets workers stop early
+    try:
+        await mark_pipelines_cancelled(
+            [item.id for item in items], config.PIPELINE_CANCEL_TTL_SECONDS
+        )
+    except Exception as e:
+        log.warning(f"Failed to record cancelled pipelines: {e}")
+
+    try:
+        await cache.cache_pipeline_statuses(items)
+    except Exception as e:
+        log.warning(f"Failed to cache pipeline statuses: {e}")
+
+    try:
+        await events.publish_pipeline_statuses(items)
+    except Exception as e:
+        log.warning(f"Failed to publish pipeline status events: {e}")
+
+    pipelines = await cache.load_pipeline_statuses(db, request.pipeline_ids)
+
+    return PipelineStatusResponse(pipelines=pipelines)
@@ -25,10 +25,15 @@ class PipelineStatusRequest(BaseModel):
     pipeline_ids: list[UUID]
 
 
+class PipelineCancelRequest(BaseModel):
+    pipeline_ids: list[UUID]
+
+
 class PipelineStatusItem(BaseModel):
     id: UUID
     status: PipelineStatus
     result_url: str | None = None
+    preview_url: str | None = None
     message: str | None = None
 
     model_config = {"from_attributes": True}
@@ -36,3 +41,12 @@ class PipelineStatusItem(BaseModel):
 
 class PipelineStatusResponse(BaseModel):
     pipelines: list[PipelineStatusItem]
+
+
+class PipelineUpdate(BaseModel):
+    pipeline_id: UUID
+    trace_id: str | None = None
+    status: PipelineStatus
+    result_url: str | None = None
+    preview_url: str | None = None
+    message: str | None = None
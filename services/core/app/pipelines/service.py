@@ -1,34 +1,148 @@
+import json
 import logging
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import Text, case, column, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.common.domain.enums import PipelineStatus
-from .models import Pipeline
+from services.common.rabbitmq.config import rabbitmq_config
+from services.core.app.config import config
+from .models import Pipeline, PipelineOutboxMessage
+from .schemas import PipelineJobInput, PipelineUpdate
 
 log = logging.getLogger(__name__)
 
+TEMPLATE_INPUT_FIELDS = ("template_image_bucket", "template_image_key")
 
-async def create_pipeline(
+
+def build_submit_payloads(
+    trace_id: UUID,
+    jobs: list[PipelineJobInput],
+    enqueued_at: datetime,
+    deadline: datetime | None = None,
+) -> list[dict]:
+    payloads = []
+    timing = {
+        "enqueued_at": enqueued_at.isoformat(),
+        "deadline": deadline.isoformat() if deadline else None,
+    }
+    batches: dict[str, list[PipelineJobInput]] = {}
+
+    # recast jobs sharing a source and settings go out as one recast_batch
+    # message, so the worker downloads and analyses the source face once
+    for job in jobs:
+        shared = {k: v for k, v in job.input.items() if k not in TEMPLATE_INPUT_FIELDS}
+        if (
+            job.pipeline_name == "recast"
+            and shared.get("source_image_bucket")
+            and shared.get("source_image_key")
+        ):
+            batches.setdefault(json.dumps(shared, sort_keys=True), []).append(job)
+            continue
+        payloads.append(
+            {
+                "trace_id": str(trace_id),
+                "pipeline_id": str(job.pipeline_id),
+                "pipeline_name": job.pipeline_name,
+                "input": job.input,
+                **timing,
+            }
+        )
+
+    for shared, batch in batches.items():
+        if len(batch) == 1:
+            pipeline_name, pipeline_input = "recast", batch[0].input
+        else:
+            pipeline_name = "recast_batch"
+            pipeline_input = {
+                **json.loads(shared),
+                "templates": [
+                    {
+                        "pipeline_id": str(job.pipeline_id),
+                        "template_image_bucket": job.input.get("template_image_bucket"),
+                        "template_image_key": job.input.get("template_image_key"),
+                    }
+                    for job in batch
+                ],
+            }
+        payloads.append(
+            {
+                "trace_id": str(trace_id),
+                "pipeline_id": str(batch[0].pipeline_id),
+                "pipeline_name": pipeline_name,
+                "input": pipeline_input,
+                **timing,
+            }
+        )
+
+    return payloads
+
+
+def submit_deadline(enqueued_at: datetime) -> datetime | None:
+    if not config.PIPELINE_DEADLINE_SECONDS:
+        return None
+    return enqueued_at + timedelta(seconds=config.PIPELINE_DEADLINE_SECONDS)
+
+
+def submit_expiration(
+    payload: dict, now: datetime, grace_seconds: float
+) -> float | None:
+    # the broker drops messages only once the grace period is over too, so a
+    # worker normally gets to report them as EXPIRED first
+    if not payload.get("deadline"):
+        return None
+    deadline = datetime.fromisoformat(payload["deadline"])
+    return max((deadline - now).total_seconds(), 0) + grace_seconds
+
+
+async def create_pipelines(
     db: AsyncSession,
-    pipeline_id: UUID,
     trace_id: UUID,
-    pipeline_name: str,
-) -> Pipeline:
-    pipeline = Pipeline(
-        id=pipeline_id,
-        trace_id=trace_id,
-        pipeline_name=pipeline_name,
-        status=PipelineStatus.PENDING,
+    jobs: list[PipelineJobInput],
+) -> list[Pipeline]:
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        insert(Pipeline)
+        .values(
+            [
+                {
+                    "id": job.pipeline_id,
+                    "trace_id": trace_id,
+                    "pipeline_name": job.pipeline_name,
+                    "status": PipelineStatus.PENDING,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for job in jobs
+            ]
+        )
+        .returning(Pipeline)
+    )
+    pipelines = list(result.scalars().all())
+
+    # submit messages are committed together with the rows, the outbox relay
+    # publishes them afterwards
+    await db.execute(
+        insert(PipelineOutboxMessage).values(
+            [
+                {
+                    "routing_key": rabbitmq_config.routing_submit,
+                    "payload": payload,
+                    "created_at": now,
+                }
+                for payload in build_submit_payloads(
+                    trace_id, jobs, now, submit_deadline(now)
+                )
+            ]
+        )
     )
-    db.add(pipeline)
-    await db.flush()
     await db.commit()
-    await db.refresh(pipeline)
 
-    log.info(f"Pipeline created with status {PipelineStatus.PENDING}")
+    log.info(f"{len(pipelines)} pipelines created with status {PipelineStatus.PENDING}")
 
-    return pipeline
+    return pipelines
 
 
 async def get_pipelines_by_ids(
@@ -39,31 +153,137 @@ async def get_pipelines_by_ids(
     return list(result.scalars().all())
 
 
-async def update_pipeline_status(
+async def cancel_pipelines(
     db: AsyncSession,
-    pipeline_id: UUID,
-    status: PipelineStatus,
-    result_url: str | None = None,
-    message: str | None = None,
-) -> Pipeline | None:
-    result = await db.execute(select(Pipeline).where(Pipeline.id == pipeline_id))
-    pipeline = result.scalar_one_or_none()
-
-    if not pipeline:
-        return None
+    pipeline_ids: list[UUID],
+) -> list[Pipeline]:
+    # finished pipelines keep their status, only the cancelled ones come back
+    return await apply_pipeline_updates(
+        db,
+        [
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.CANCELLED,
+                message="cancelled",
+            )
+            for pipeline_id in dict.fromkeys(pipeline_ids)
+        ],
+    )
+
+
+def coalesce_pipeline_updates(updates: list[PipelineUpdate]) -> list[PipelineUpdate]:
+    merged: dict[UUID, PipelineUpdate] = {}
+
+    for incoming in updates:
+        current = merged.get(incoming.pipeline_id)
+        if current is None:
+            merged[incoming.pipeline_id] = incoming
+            continue
+
+        if not current.status.can_transition_to(incoming.status):
+            log.info(
+                f"Dropping stale update for pipeline {incoming.pipeline_id}: "
+                f"{current.status} -> {incoming.status}"
+            )
+            continue
+
+        merged[incoming.pipeline_id] = PipelineUpdate(
+            pipeline_id=incoming.pipeline_id,
+            trace_id=incoming.trace_id or current.trace_id,
+            status=incoming.status,
+            result_url=(
+                incoming.result_url
+                if incoming.result_url is not None
+                else current.result_url
+            ),
+            preview_url=(
+                incoming.preview_url
+                if incoming.preview_url is not None
+                else current.preview_url
+            ),
+            message=incoming.message
+            if incoming.message is not None
+            else current.message,
+        )
+
+    return list(merged.values())
+
 
-    pipeline.status = status
+def _status_rank(status_column):
+    return case(
+        {status.value: status.rank for status in PipelineStatus},
+        value=status_column,
+    )
+
+
+def _can_transition(new_status_rank):
+    terminal = [status.value for status in PipelineStatus if status.is_terminal]
+    return Pipeline.status.not_in(terminal) & (
+        _status_rank(Pipeline.status) <= new_status_rank
+    )
+
+
+async def apply_pipeline_updates(
+    db: AsyncSession,
+    updates: list[PipelineUpdate],
+) -> list[Pipeline]:
+    if not updates:
+        return []
 
-    if result_url is not None:
-        pipeline.result_url = result_url
+    now = datetime.now(timezone.utc)
 
-    if message is not None:
-        pipeline.message = message
+    if db.get_bind().dialect.name == "postgresql":
+        rows = values(
+            column("id", PgUUID(as_uuid=True)),
+            column("status", Text),
+            column("result_url", Text),
+            column("preview_url", Text),
+            column("message", Text),
+            name="updates",
+        ).data(
+            [
+                (u.pipeline_id, u.status.value, u.result_url, u.preview_url, u.message)
+                for u in updates
+            ]
+        )
+        result = await db.execute(
+            update(Pipeline)
+            .where(
+                Pipeline.id == rows.c.id, _can_transition(_status_rank(rows.c.status))
+            )
+            .values(
+                status=rows.c.status,
+                result_url=func.coalesce(rows.c.result_url, Pipeline.result_url),
+                preview_url=func.coalesce(rows.c.preview_url, Pipeline.preview_url),
+                message=func.coalesce(rows.c.message, Pipeline.message),
+                updated_at=now,
+            )
+            .returning(Pipeline),
+            execution_options={"synchronize_session": False},
+        )
+        pipelines = list(result.scalars().all())
+    else:
+        # UPDATE ... FROM (VALUES ...) is postgres-only, fall back to one
+        # statement per pipeline inside the same transaction
+        pipelines = []
+        for u in updates:
+            result = await db.execute(
+                update(Pipeline)
+                .where(Pipeline.id == u.pipeline_id, _can_transition(u.status.rank))
+                .values(
+                    status=u.status.value,
+                    result_url=func.coalesce(u.result_url, Pipeline.result_url),
+                    preview_url=func.coalesce(u.preview_url, Pipeline.preview_url),
+                    message=func.coalesce(u.message, Pipeline.message),
+                    updated_at=now,
+                )
+                .returning(Pipeline),
+                execution_options={"synchronize_session": False},
+            )
+            pipelines.extend(result.scalars().all())
 
-    await db.flush()
     await db.commit()
-    await db.refresh(pipeline)
 
-    log.info(f"Pipeline status updated to {status}")
+    log.info(f"Applied {len(pipelines)}/{len(updates)} pipeline status updates")
 
-    return pipeline
+    return pipelines
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.common.redis import get_redis_client
+from services.core.app.config import config
+
+from .schemas import RecastTemplateRead
+from . import service
+
+log = logging.getLogger(__name__)
+
+TEMPLATES_VERSION_KEY = "recast:templates:version"
+# one serialized template per line, exactly as served
+TEMPLATES_KEY_PREFIX = "recast:templates:lines:"
+
+
+@dataclass
+class TemplateIndex:
+    version: str
+    fragments: list[bytes]
+    by_id: dict[int, bytes] = field(default_factory=dict)
+    digest: str = ""
+
+    @classmethod
+    def from_fragments(cls, version: str, fragments: list[bytes]) -> "TemplateIndex":
+        body = b"[" + b",".join(fragments) + b"]"
+        return cls(
+            version=version,
+            fragments=fragments,
+            by_id={json.loads(f)["id"]: f for f in fragments},
+            digest=hashlib.sha256(body).hexdigest()[:16],
+        )
+
+    def render(self, seed: str | None = None) -> bytes:
+        fragments = list(self.fragments)
+        random.Random(seed).shuffle(fragments)
+        return b"[" + b",".join(fragments) + b"]"
+
+    def etag(self, seed: str | None = None) -> str:
+        # unseeded responses are the same set in a different order
+        if seed is None:
+            return f'W/"{self.digest}"'
+        return f'"{self.digest}-{hashlib.sha256(seed.encode()).hexdigest()[:8]}"'
+
+
+_local_index: TemplateIndex | None = None
+_local_checked_at = 0.0
+
+
+def _serialize(templates) -> list[bytes]:
+    return [
+        RecastTemplateRead.model_validate(t).model_dump_json().encode()
+        for t in templates
+    ]
+
+
+async def _load_from_redis(version: str) -> list[bytes] | None:
+    redis_client = await get_redis_client()
+    value = await redis_client.get(f"{TEMPLATES_KEY_PREFIX}{version}")
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode()
+    return value.split(b"\n") if value else []
+
+
+async def _store_in_redis(index: TemplateIndex) -> None:
+    redis_client = await get_redis_client()
+    await redis_client.set(
+        f"{TEMPLATES_KEY_PREFIX}{index.version}",
+        b"\n".join(index.fragments),
+        ex=config.TEMPLATES_CACHE_TTL_SECONDS,
+    )
+
+
+async def _get_version() -> str:
+    redis_client = await get_redis_client()
+    version = await redis_client.get(TEMPLATES_VERSION_KEY)
+    if version is None:
+        await redis_client.set(TEMPLATES_VERSION_KEY, 1, nx=True)
+        version = await redis_client.get(TEMPLATES_VERSION_KEY)
+    return version.decode() if isinstance(version, bytes) else str(version)
+
+
+async def load_template_index(db: AsyncSession) -> TemplateIndex:
+    global _local_index, _local_checked_at
+
+    now = time.monotonic()
+    if (
+        _local_index is not None
+        and now - _local_checked_at < config.TEMPLATES_LOCAL_CACHE_TTL_SECONDS
+    ):
+        return _local_index
+
+    try:
+        version = await _get_version()
+        if _local_index is not None and _local_index.version == version:
+            _local_checked_at = now
+            return _local_index
+
+        fragments = await _load_from_redis(version)
+    except Exception as e:
+        log.warning(f"Failed to read templates cache: {e}")
+        version, fragments = None, None
+
+    loaded_from_db = fragments is None
+    if loaded_from_db:
+        templates = await service.get_all_templates(db)
+        fragments = _serialize(templates)
+
+    index = TemplateIndex.from_fragments(version or "local", fragments)
+
+    if loaded_from_db and version is not None:
+        try:
+            await _store_in_redis(index)
+        except Exception as e:
+            log.warning(f"Failed to store templates cache: {e}")
+
+    _local_index = index
+    _local_checked_at = now
+
+    return index
+
+
+async def invalidate_templates() -> None:
+    global _local_index
+
+    redis_client = await get_redis_client()
+    await redis_client.incr(TEMPLATES_VERSION_KEY)
+    _local_index = None
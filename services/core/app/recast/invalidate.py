@@ -0,0 +1,21 @@
+import asyncio
+import logging
+
+from services.common.redis import close_redis_client
+
+from .cache import invalidate_templates
+
+log = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    try:
+        await invalidate_templates()
+        log.info("Templates cache invalidated")
+    finally:
+        await close_redis_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,28 +1,51 @@
 import logging
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 
 from services.common.database import DbSession
 
 from .schemas import RecastTemplateRead
-from . import service
+from . import cache
 
 log = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
 @router.get("/templates", response_model=list[RecastTemplateRead])
-async def get_templates(db: DbSession):
-    templates = await service.get_all_templates(db)
-    return templates
+async def get_templates(request: Request, db: DbSession, seed: str | None = None):
+    index = await cache.load_template_index(db)
+
+    etag = index.etag(seed)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=index.render(seed), media_type="application/json", headers=headers
+    )
 
 
 @router.get("/templates/{template_id}", response_model=RecastTemplateRead)
 async def get_template(template_id: int, db: DbSession):
-    template = await service.get_template_by_id(db, template_id)
+    index = await cache.load_template_index(db)
+
+    # template writes bump the cache version, so a miss is a missing template
+    template = index.by_id.get(template_id)
     if not template:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"template with id {template_id} not found",
         )
-    return template
+
+    return Response(content=template, media_type="application/json")
@@ -21,6 +21,12 @@ from services.core.app.dependencies import (
     get_rabbitmq_consumer,
     init_redis,
     shutdown_redis,
+    init_status_broadcaster,
+    shutdown_status_broadcaster,
+    init_outbox_relay,
+    shutdown_outbox_relay,
+    init_auth,
+    shutdown_auth,
 )
 from services.core.app.pipelines.consumer import start_pipeline_update_consumer
 
@@ -53,8 +59,11 @@ if config.SENTRY_DSN:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log.info("Starting up core service")
+    await init_auth()
     await init_redis()
+    await init_status_broadcaster()
     await init_rabbitmq()
+    await init_outbox_relay()
 
     consumer = await get_rabbitmq_consumer()
     asyncio.create_task(start_pipeline_update_consumer(consumer))
@@ -62,8 +71,11 @@ async def lifespan(app: FastAPI):
     yield
 
     log.info("Shutting down core service")
+    await shutdown_outbox_relay()
     await shutdown_rabbitmq()
+    await shutdown_status_broadcaster()
     await shutdown_redis()
+    await shutdown_auth()
 
 
 app = FastAPI(
@@ -0,0 +1,105 @@
+import time
+import pytest
+import jwt
+from jwt import PyJWK
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from services.common.auth import jwks
+
+SUPABASE_URL = "https://example.supabase.co"
+
+
+@pytest.fixture
+def signing_key(mocker):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = jwt.algorithms.RSAAlgorithm.to_jwk(
+        private_key.public_key(), as_dict=True
+    )
+    public_jwk.update(kid="test-key", alg="RS256", use="sig")
+
+    manager = jwks.JWKSManager(jwks.get_jwks_url(SUPABASE_URL))
+    manager._keys = {"test-key": PyJWK.from_dict(public_jwk)}
+    manager._fetched_at = time.time()
+    mocker.patch.object(jwks, "_jwks_manager", manager)
+    mocker.patch.object(jwks, "_token_cache", jwks.VerifiedTokenCache(max_size=2))
+
+    return private_key
+
+
+def make_token(private_key, **claims) -> str:
+    payload = {"sub": "user-id", "exp": int(time.time()) + 3600, **claims}
+    return jwt.encode(
+        payload, private_key, algorithm="RS256", headers={"kid": "test-key"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_verify_jwt_caches_payload(signing_key, mocker):
+    token = make_token(signing_key)
+    decode = mocker.spy(jwks.jwt, "decode")
+
+    first = await jwks.verify_jwt_with_jwks(token, SUPABASE_URL)
+    second = await jwks.verify_jwt_with_jwks(token, SUPABASE_URL)
+
+    assert first == second
+    assert first["sub"] == "user-id"
+    assert decode.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_verify_jwt_rejects_unknown_kid(signing_key):
+    from fastapi import HTTPException
+
+    token = jwt.encode(
+        {"sub": "user-id", "exp": int(time.time()) + 3600},
+        signing_key,
+        algorithm="RS256",
+        headers={"kid": "rotated-key"},
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await jwks.verify_jwt_with_jwks(token, SUPABASE_URL)
+
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", ["<html>bad gateway</html>", "[]", '{"keys": 1}'])
+async def test_refresh_rejects_invalid_jwks_response(mocker, body):
+    import httpx
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+    client = httpx.AsyncClient
+    mocker.patch.object(
+        jwks.httpx,
+        "AsyncClient",
+        lambda **kwargs: client(transport=transport, **kwargs),
+    )
+    manager = jwks.JWKSManager(jwks.get_jwks_url(SUPABASE_URL))
+
+    with pytest.raises(jwt.PyJWKClientError, match="Invalid JWKS response"):
+        await manager.refresh()
+
+
+def test_token_cache_evicts_expired_and_least_recent():
+    cache = jwks.VerifiedTokenCache(max_size=2)
+    now = time.time()
+
+    cache.put("expired", {"exp": now - 1})
+    cache.put("a", {"exp": now + 60})
+    cache.put("b", {"exp": now + 60})
+    cache.get("a")
+    cache.put("c", {"exp": now + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_token_cache_skips_tokens_without_exp():
+    cache = jwks.VerifiedTokenCache()
+
+    cache.put("token", {"sub": "user-id"})
+
+    assert cache.get("token") is None
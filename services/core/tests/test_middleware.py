@@ -0,0 +1,104 @@
+import pytest
+from uuid import UUID, uuid4
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.common.domain.enums import PipelineStatus
+from services.common.database import DatabaseMiddleware, DbSession
+from services.common.database import dependencies as db_dependencies
+from services.common.middleware.exception import ExceptionMiddleware
+from services.core.app.pipelines import service
+from services.core.app.pipelines.models import Pipeline
+
+
+@pytest.fixture
+def session_maker(engine, mocker):
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    return mocker.patch.object(
+        db_dependencies, "async_session_maker", mocker.Mock(wraps=session_maker)
+    )
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/pipelines/{pipeline_id}")
+    async def create(pipeline_id: UUID, db: DbSession, fail: str | None = None):
+        db.add(
+            Pipeline(
+                id=pipeline_id,
+                trace_id=uuid4(),
+                pipeline_name="test",
+                status=PipelineStatus.PENDING,
+            )
+        )
+        await db.flush()
+        if fail == "http":
+            raise HTTPException(status_code=400, detail="bad request")
+        if fail == "value":
+            raise ValueError("bad value")
+        return {"id": pipeline_id}
+
+    app.add_middleware(ExceptionMiddleware)
+    app.add_middleware(DatabaseMiddleware)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        yield ac
+
+
+@pytest.mark.asyncio
+async def test_get_db_requires_middleware(session_maker):
+    app = FastAPI()
+
+    @app.get("/db")
+    async def read(db: DbSession):
+        return {}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        with pytest.raises(RuntimeError, match="DatabaseMiddleware"):
+            await ac.get("/db")
+
+    session_maker.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_session_not_opened_without_db(client, session_maker):
+    response = await client.get("/health")
+
+    assert response.status_code == 200
+    session_maker.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_session_committed_on_success(client, session_maker, db_session):
+    pipeline_id = uuid4()
+
+    response = await client.post(f"/pipelines/{pipeline_id}")
+
+    assert response.status_code == 200
+    assert len(await service.get_pipelines_by_ids(db_session, [pipeline_id])) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail, status_code", [("http", 400), ("value", 422)])
+async def test_session_rolled_back_on_error(
+    client, session_maker, db_session, fail, status_code
+):
+    pipeline_id = uuid4()
+
+    response = await client.post(f"/pipelines/{pipeline_id}", params={"fail": fail})
+
+    assert response.status_code == status_code
+    assert await service.get_pipelines_by_ids(db_session, [pipeline_id]) == []
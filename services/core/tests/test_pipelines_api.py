@@ -40,3 +40,58 @@ async def test_get_pipeline_status_unauthorized(client):
     )
 
     assert response.status_code in [401, 403]
+
+
+@pytest.mark.asyncio
+async def test_stream_pipeline_status_unauthorized(client):
+    response = await client.post(
+        "/api/v1/pipelines/status/stream",
+        json={"pipeline_ids": [str(uuid4())]},
+    )
+
+    assert response.status_code in [401, 403]
+
+
+@pytest.mark.asyncio
+async def test_cancel_pipelines_unauthorized(client):
+    response = await client.post(
+        "/api/v1/pipelines/cancel",
+        json={"pipeline_ids": [str(uuid4())]},
+    )
+
+    assert response.status_code in [401, 403]
+
+
+@pytest.mark.asyncio
+async def test_queue_pipelines_charges_rate_limit_per_job(client, mock_user, mocker):
+    import sys
+    from services.common.redis import RateLimitExceeded
+    from services.core.app.dependencies import get_current_user
+
+    # the package re-exports rate_limit(), which shadows the submodule
+    rate_limit_module = sys.modules["services.common.redis.rate_limit"]
+    check = mocker.patch.object(
+        rate_limit_module,
+        "check_rate_limit",
+        side_effect=RateLimitExceeded(retry_after=7),
+    )
+    app.dependency_overrides[get_current_user] = lambda: mock_user
+
+    try:
+        response = await client.post(
+            "/api/v1/pipelines/queue",
+            json={
+                "trace_id": str(uuid4()),
+                "jobs": [
+                    {"pipeline_id": str(uuid4()), "pipeline_name": "test", "input": {}}
+                    for _ in range(3)
+                ],
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert check.call_args.kwargs["cost"] == 3
+    assert check.call_args.kwargs["key"] == f"queue:token_bucket:{mock_user.id}"
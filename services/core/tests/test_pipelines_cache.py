@@ -0,0 +1,176 @@
+import pytest
+from uuid import uuid4
+
+from services.common.domain.enums import PipelineStatus
+from services.core.app.pipelines import cache, service
+from services.core.app.pipelines.schemas import PipelineJobInput, PipelineStatusItem
+
+
+class FakePipeline:
+    def __init__(self, store: dict):
+        self.store = store
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def set(self, key, value, ex=None, nx=False):
+        self.commands.append((key, value, nx))
+
+    async def execute(self):
+        for key, value, nx in self.commands:
+            if nx and key in self.store:
+                continue
+            self.store[key] = value
+
+
+class FakeSetStatusesScript:
+    # same rule as the Lua script: only move a cached status forward
+    async def __call__(self, keys, args, client):
+        for i, key in enumerate(keys):
+            status, value = PipelineStatus(args[1 + 2 * i]), args[2 + 2 * i]
+            current = client.store.get(key)
+            if current is not None:
+                current_status = PipelineStatusItem.model_validate_json(current).status
+                if not current_status.can_transition_to(status):
+                    continue
+            client.store[key] = value
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def register_script(self, script):
+        return FakeSetStatusesScript()
+
+    async def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    redis_client = FakeRedis()
+    mocker.patch.object(cache, "_set_statuses_script", None)
+    mocker.patch.object(
+        cache, "get_redis_client", mocker.AsyncMock(return_value=redis_client)
+    )
+    return redis_client
+
+
+@pytest.mark.asyncio
+async def test_load_pipeline_statuses_backfills_cache(db_session, fake_redis):
+    pipeline_id = uuid4()
+    await service.create_pipelines(
+        db_session,
+        uuid4(),
+        [PipelineJobInput(pipeline_id=pipeline_id, pipeline_name="test", input={})],
+    )
+
+    statuses = await cache.load_pipeline_statuses(db_session, [pipeline_id])
+
+    assert [item.id for item in statuses] == [pipeline_id]
+    assert statuses[0].status == PipelineStatus.PENDING
+    assert f"{cache.STATUS_KEY_PREFIX}{pipeline_id}" in fake_redis.store
+
+
+@pytest.mark.asyncio
+async def test_load_pipeline_statuses_skips_db_on_hit(db_session, fake_redis, mocker):
+    item = PipelineStatusItem(
+        id=uuid4(),
+        status=PipelineStatus.COMPLETED,
+        result_url="https://example.com/result.png",
+    )
+    await cache.cache_pipeline_statuses([item])
+    get_pipelines = mocker.spy(service, "get_pipelines_by_ids")
+
+    statuses = await cache.load_pipeline_statuses(db_session, [item.id])
+
+    assert statuses == [item]
+    get_pipelines.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_backfill_does_not_overwrite_newer_status(fake_redis):
+    pipeline_id = uuid4()
+    await cache.cache_pipeline_statuses(
+        [PipelineStatusItem(id=pipeline_id, status=PipelineStatus.RUNNING)]
+    )
+
+    await cache.cache_pipeline_statuses(
+        [PipelineStatusItem(id=pipeline_id, status=PipelineStatus.PENDING)],
+        only_missing=True,
+    )
+
+    cached = await cache.get_cached_pipeline_statuses([pipeline_id])
+    assert cached[pipeline_id].status == PipelineStatus.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_updates_keep_newer_status(fake_redis):
+    pipeline_id = uuid4()
+    completed = PipelineStatusItem(id=pipeline_id, status=PipelineStatus.COMPLETED)
+
+    await cache.cache_pipeline_statuses(
+        [PipelineStatusItem(id=pipeline_id, status=PipelineStatus.PREVIEW)]
+    )
+    await cache.cache_pipeline_statuses([completed])
+    await cache.cache_pipeline_statuses(
+        [PipelineStatusItem(id=pipeline_id, status=PipelineStatus.RUNNING)]
+    )
+
+    cached = await cache.get_cached_pipeline_statuses([pipeline_id])
+    assert cached[pipeline_id] == completed
+
+
+@pytest.mark.asyncio
+async def test_set_statuses_script_runs_on_redis(mocker):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    mocker.patch.object(cache, "_set_statuses_script", None)
+    mocker.patch.object(
+        cache, "get_redis_client", mocker.AsyncMock(return_value=redis_client)
+    )
+    first, second = uuid4(), uuid4()
+
+    await cache.cache_pipeline_statuses(
+        [
+            PipelineStatusItem(id=first, status=PipelineStatus.COMPLETED),
+            PipelineStatusItem(id=second, status=PipelineStatus.RUNNING),
+        ]
+    )
+    await cache.cache_pipeline_statuses(
+        [
+            PipelineStatusItem(id=first, status=PipelineStatus.RUNNING),
+            PipelineStatusItem(id=second, status=PipelineStatus.PREVIEW),
+        ]
+    )
+
+    cached = await cache.get_cached_pipeline_statuses([first, second])
+    assert cached[first].status == PipelineStatus.COMPLETED
+    assert cached[second].status == PipelineStatus.PREVIEW
+    assert 0 < await redis_client.ttl(f"{cache.STATUS_KEY_PREFIX}{first}")
+
+
+@pytest.mark.asyncio
+async def test_load_pipeline_statuses_falls_back_when_redis_fails(db_session, mocker):
+    mocker.patch.object(
+        cache, "get_redis_client", mocker.AsyncMock(side_effect=ConnectionError)
+    )
+    pipeline_id = uuid4()
+    await service.create_pipelines(
+        db_session,
+        uuid4(),
+        [PipelineJobInput(pipeline_id=pipeline_id, pipeline_name="test", input={})],
+    )
+
+    statuses = await cache.load_pipeline_statuses(db_session, [pipeline_id])
+
+    assert [item.id for item in statuses] == [pipeline_id]
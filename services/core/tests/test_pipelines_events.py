@@ -0,0 +1,95 @@
+import pytest
+from uuid import uuid4
+
+from services.common.domain.enums import PipelineStatus
+from services.core.app.pipelines import events
+from services.core.app.pipelines.schemas import PipelineStatusItem
+
+
+@pytest.fixture
+def http_request(mocker):
+    request = mocker.MagicMock()
+    request.is_disconnected = mocker.AsyncMock(return_value=False)
+    return request
+
+
+def test_broadcaster_dispatch_to_subscribers():
+    broadcaster = events.PipelineStatusBroadcaster("test")
+    pipeline_id = uuid4()
+
+    queue = broadcaster.subscribe([pipeline_id])
+    other_queue = broadcaster.subscribe([uuid4()])
+
+    broadcaster.dispatch(
+        PipelineStatusItem(id=pipeline_id, status=PipelineStatus.RUNNING)
+    )
+
+    assert queue.qsize() == 1
+    assert other_queue.qsize() == 0
+
+
+def test_broadcaster_unsubscribe():
+    broadcaster = events.PipelineStatusBroadcaster("test")
+    pipeline_id = uuid4()
+
+    queue = broadcaster.subscribe([pipeline_id])
+    broadcaster.unsubscribe(queue, [pipeline_id])
+    broadcaster.dispatch(
+        PipelineStatusItem(id=pipeline_id, status=PipelineStatus.RUNNING)
+    )
+
+    assert queue.qsize() == 0
+    assert pipeline_id not in broadcaster._subscribers
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_pipelines_are_terminal(http_request):
+    broadcaster = events.PipelineStatusBroadcaster("test")
+    pipeline_id = uuid4()
+    queue = broadcaster.subscribe([pipeline_id])
+
+    broadcaster.dispatch(
+        PipelineStatusItem(
+            id=pipeline_id,
+            status=PipelineStatus.COMPLETED,
+            result_url="https://example.com/result.png",
+        )
+    )
+
+    chunks = [
+        chunk
+        async for chunk in events.stream_pipeline_statuses(
+            request=http_request,
+            broadcaster=broadcaster,
+            queue=queue,
+            pipeline_ids=[pipeline_id],
+            snapshot=[
+                PipelineStatusItem(id=pipeline_id, status=PipelineStatus.PENDING)
+            ],
+        )
+    ]
+
+    assert len(chunks) == 2
+    assert '"status":"PENDING"' in chunks[0]
+    assert '"status":"COMPLETED"' in chunks[1]
+    assert pipeline_id not in broadcaster._subscribers
+
+
+@pytest.mark.asyncio
+async def test_stream_skips_unknown_pipelines(http_request):
+    broadcaster = events.PipelineStatusBroadcaster("test")
+    pipeline_id = uuid4()
+    queue = broadcaster.subscribe([pipeline_id])
+
+    chunks = [
+        chunk
+        async for chunk in events.stream_pipeline_statuses(
+            request=http_request,
+            broadcaster=broadcaster,
+            queue=queue,
+            pipeline_ids=[pipeline_id],
+            snapshot=[],
+        )
+    ]
+
+    assert chunks == []
@@ -0,0 +1,197 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.common.rabbitmq.config import rabbitmq_config
+from services.core.app.pipelines import service
+from services.core.app.pipelines.models import PipelineOutboxMessage
+from services.core.app.pipelines.outbox import PipelineOutboxRelay
+from services.core.app.pipelines.schemas import PipelineJobInput
+
+
+def make_jobs(count: int) -> list[PipelineJobInput]:
+    return [
+        PipelineJobInput(pipeline_id=uuid4(), pipeline_name=f"test{i}", input={})
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def session_maker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_create_pipelines_writes_outbox(db_session):
+    trace_id = uuid4()
+    jobs = make_jobs(2)
+
+    await service.create_pipelines(db=db_session, trace_id=trace_id, jobs=jobs)
+
+    result = await db_session.execute(
+        select(PipelineOutboxMessage).order_by(PipelineOutboxMessage.id)
+    )
+    messages = result.scalars().all()
+
+    assert [m.routing_key for m in messages] == [rabbitmq_config.routing_submit] * 2
+    assert [m.payload["pipeline_id"] for m in messages] == [
+        str(job.pipeline_id) for job in jobs
+    ]
+    assert all(m.payload["trace_id"] == str(trace_id) for m in messages)
+    enqueued_at = datetime.fromisoformat(messages[0].payload["enqueued_at"])
+    deadline = datetime.fromisoformat(messages[0].payload["deadline"])
+    assert deadline - enqueued_at == timedelta(seconds=300)
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_and_deletes(
+    db_session, session_maker, mock_rabbitmq_publisher
+):
+    jobs = make_jobs(3)
+    await service.create_pipelines(db=db_session, trace_id=uuid4(), jobs=jobs)
+
+    relay = PipelineOutboxRelay(
+        mock_rabbitmq_publisher, batch_size=2, session_maker=session_maker
+    )
+
+    assert await relay.relay_batch() == 2
+    assert await relay.relay_batch() == 1
+    assert await relay.relay_batch() == 0
+
+    published = [
+        message["pipeline_id"]
+        for call in mock_rabbitmq_publisher.publish_many.await_args_list
+        for message in call.kwargs["messages"]
+    ]
+    assert published == [str(job.pipeline_id) for job in jobs]
+    expirations = [
+        expiration
+        for call in mock_rabbitmq_publisher.publish_many.await_args_list
+        for expiration in call.kwargs["expirations"]
+    ]
+    assert all(300 < expiration <= 360 for expiration in expirations)
+
+    result = await db_session.execute(select(PipelineOutboxMessage))
+    assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_messages_when_publish_fails(
+    db_session, session_maker, mock_rabbitmq_publisher
+):
+    await service.create_pipelines(db=db_session, trace_id=uuid4(), jobs=make_jobs(1))
+    mock_rabbitmq_publisher.publish_many.side_effect = ConnectionError
+
+    relay = PipelineOutboxRelay(mock_rabbitmq_publisher, session_maker=session_maker)
+
+    with pytest.raises(ConnectionError):
+        await relay.relay_batch()
+
+    result = await db_session.execute(select(PipelineOutboxMessage))
+    assert len(result.scalars().all()) == 1
+
+
+def test_build_submit_payloads_batches_recast_jobs_by_source():
+    def recast_job(source_key: str, template_key: str) -> PipelineJobInput:
+        return PipelineJobInput(
+            pipeline_id=uuid4(),
+            pipeline_name="recast",
+            input={
+                "source_image_bucket": "uploads",
+                "source_image_key": source_key,
+                "template_image_bucket": "templates",
+                "template_image_key": template_key,
+            },
+        )
+
+    jobs = [
+        recast_job("a.jpg", "1.jpg"),
+        recast_job("a.jpg", "2.jpg"),
+        recast_job("b.jpg", "1.jpg"),
+    ]
+
+    payloads = service.build_submit_payloads(uuid4(), jobs, datetime.now(timezone.utc))
+
+    by_name = {p["pipeline_name"]: p for p in payloads}
+    assert len(payloads) == 2
+    assert by_name["recast"]["pipeline_id"] == str(jobs[2].pipeline_id)
+    batch = by_name["recast_batch"]
+    assert batch["input"]["source_image_key"] == "a.jpg"
+    assert [t["pipeline_id"] for t in batch["input"]["templates"]] == [
+        str(jobs[0].pipeline_id),
+        str(jobs[1].pipeline_id),
+    ]
+
+
+def test_submit_expiration_outlasts_deadline():
+    now = datetime.now(timezone.utc)
+    deadline = now + timedelta(seconds=30)
+
+    assert service.submit_expiration({"deadline": deadline.isoformat()}, now, 60) == 90
+    assert (
+        service.submit_expiration(
+            {"deadline": (now - timedelta(seconds=5)).isoformat()}, now, 60
+        )
+        == 60
+    )
+    assert service.submit_expiration({"deadline": None}, now, 60) is None
+
+
+def test_build_submit_payloads_keeps_per_job_settings():
+    def recast_job(template_key: str, **settings) -> PipelineJobInput:
+        return PipelineJobInput(
+            pipeline_id=uuid4(),
+            pipeline_name="recast",
+            input={
+                "source_image_bucket": "uploads",
+                "source_image_key": "a.jpg",
+                "template_image_bucket": "templates",
+                "template_image_key": template_key,
+                **settings,
+            },
+        )
+
+    jobs = [
+        recast_job("1.jpg", output_format="png", strength=0.5),
+        recast_job("2.jpg", strength=0.5, output_format="png"),
+        recast_job("3.jpg", output_format="jpeg", strength=0.5),
+    ]
+
+    payloads = service.build_submit_payloads(uuid4(), jobs, datetime.now(timezone.utc))
+
+    by_name = {p["pipeline_name"]: p["input"] for p in payloads}
+    assert len(payloads) == 2
+    batch = by_name["recast_batch"]
+    assert batch["output_format"] == "png"
+    assert batch["strength"] == 0.5
+    assert [t["template_image_key"] for t in batch["templates"]] == ["1.jpg", "2.jpg"]
+    assert by_name["recast"] == jobs[2].input
+
+
+def test_build_submit_payloads_splits_batches_by_output_settings():
+    jobs = [
+        PipelineJobInput(
+            pipeline_id=uuid4(),
+            pipeline_name="recast",
+            input={
+                "source_image_bucket": "uploads",
+                "source_image_key": "a.jpg",
+                "template_image_bucket": "templates",
+                "template_image_key": f"{i}.jpg",
+                "output_format": "webp",
+                "output_quality": quality,
+                "output_effort": 2,
+            },
+        )
+        for i, quality in enumerate([60, 60, 95, 95])
+    ]
+
+    payloads = service.build_submit_payloads(uuid4(), jobs, datetime.now(timezone.utc))
+
+    assert [p["pipeline_name"] for p in payloads] == ["recast_batch"] * 2
+    assert [
+        (p["input"]["output_quality"], p["input"]["output_effort"]) for p in payloads
+    ] == [(60, 2), (95, 2)]
+    assert [len(p["input"]["templates"]) for p in payloads] == [2, 2]
@@ -2,90 +2,274 @@ import pytest
 from uuid import uuid4
 
 from services.common.domain.enums import PipelineStatus
-from services.core.app.pipelines import service
+from services.common.logging.config import context_trace_id, context_pipeline_id
+from services.core.app.pipelines import consumer, service
+from services.core.app.pipelines.schemas import PipelineJobInput, PipelineUpdate
+
+
+async def create_pipeline(db, pipeline_id, trace_id=None, pipeline_name="test"):
+    [pipeline] = await service.create_pipelines(
+        db,
+        trace_id or uuid4(),
+        [
+            PipelineJobInput(
+                pipeline_id=pipeline_id, pipeline_name=pipeline_name, input={}
+            )
+        ],
+    )
+    return pipeline
 
 
 @pytest.mark.asyncio
-async def test_create_pipeline(db_session):
-    pipeline_id = uuid4()
+async def test_create_pipelines(db_session):
     trace_id = uuid4()
-    pipeline_name = "test_pipeline"
+    jobs = [
+        PipelineJobInput(pipeline_id=uuid4(), pipeline_name=f"test{i}", input={})
+        for i in range(3)
+    ]
+
+    pipelines = await service.create_pipelines(
+        db=db_session, trace_id=trace_id, jobs=jobs
+    )
 
-    pipeline = await service.create_pipeline(
+    assert {p.id for p in pipelines} == {job.pipeline_id for job in jobs}
+    assert all(p.trace_id == trace_id for p in pipelines)
+    assert all(p.status == PipelineStatus.PENDING for p in pipelines)
+    assert all(p.result_url is None and p.message is None for p in pipelines)
+
+    stored = await service.get_pipelines_by_ids(
+        db_session, [job.pipeline_id for job in jobs]
+    )
+    assert len(stored) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_pipelines_by_ids(db_session):
+    pipeline_id_1 = uuid4()
+    pipeline_id_2 = uuid4()
+    trace_id = uuid4()
+
+    await create_pipeline(db_session, pipeline_id_1, trace_id, "test1")
+    await create_pipeline(db_session, pipeline_id_2, trace_id, "test2")
+
+    pipelines = await service.get_pipelines_by_ids(
         db=db_session,
-        pipeline_id=pipeline_id,
-        trace_id=trace_id,
-        pipeline_name=pipeline_name,
+        pipeline_ids=[pipeline_id_1, pipeline_id_2],
     )
 
-    assert pipeline.id == pipeline_id
-    assert pipeline.trace_id == trace_id
-    assert pipeline.pipeline_name == pipeline_name
-    assert pipeline.status == PipelineStatus.PENDING
-    assert pipeline.result_url is None
-    assert pipeline.message is None
+    assert len(pipelines) == 2
+    assert {p.id for p in pipelines} == {pipeline_id_1, pipeline_id_2}
 
 
 @pytest.mark.asyncio
-async def test_update_pipeline_status(db_session):
+async def test_get_pipelines_by_ids_empty(db_session):
+    pipelines = await service.get_pipelines_by_ids(
+        db=db_session,
+        pipeline_ids=[uuid4()],
+    )
+
+    assert len(pipelines) == 0
+
+
+def test_coalesce_pipeline_updates_keeps_latest_valid_status():
     pipeline_id = uuid4()
+
+    updates = service.coalesce_pipeline_updates(
+        [
+            PipelineUpdate(pipeline_id=pipeline_id, status=PipelineStatus.RUNNING),
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.COMPLETED,
+                result_url="https://example.com/result.png",
+                message="success",
+            ),
+            PipelineUpdate(pipeline_id=pipeline_id, status=PipelineStatus.RUNNING),
+        ]
+    )
+
+    assert len(updates) == 1
+    assert updates[0].status == PipelineStatus.COMPLETED
+    assert updates[0].result_url == "https://example.com/result.png"
+
+
+@pytest.mark.asyncio
+async def test_apply_pipeline_updates(db_session):
+    pipeline_id_1 = uuid4()
+    pipeline_id_2 = uuid4()
     trace_id = uuid4()
 
-    await service.create_pipeline(
+    await create_pipeline(db_session, pipeline_id_1, trace_id, "test1")
+    await create_pipeline(db_session, pipeline_id_2, trace_id, "test2")
+
+    pipelines = await service.apply_pipeline_updates(
         db=db_session,
-        pipeline_id=pipeline_id,
-        trace_id=trace_id,
-        pipeline_name="test",
+        updates=[
+            PipelineUpdate(
+                pipeline_id=pipeline_id_1,
+                status=PipelineStatus.COMPLETED,
+                result_url="https://example.com/result.png",
+            ),
+            PipelineUpdate(pipeline_id=pipeline_id_2, status=PipelineStatus.RUNNING),
+            PipelineUpdate(pipeline_id=uuid4(), status=PipelineStatus.RUNNING),
+        ],
     )
 
-    updated = await service.update_pipeline_status(
-        db=db_session,
-        pipeline_id=pipeline_id,
-        status=PipelineStatus.COMPLETED,
-        result_url="https://example.com/result.png",
-        message="success",
+    statuses = {p.id: (p.status, p.result_url) for p in pipelines}
+    assert statuses == {
+        pipeline_id_1: (
+            PipelineStatus.COMPLETED,
+            "https://example.com/result.png",
+        ),
+        pipeline_id_2: (PipelineStatus.RUNNING, None),
+    }
+
+
+@pytest.mark.asyncio
+async def test_apply_pipeline_updates_sets_result_and_message(db_session):
+    pipeline_id = uuid4()
+    await create_pipeline(db_session, pipeline_id)
+
+    [updated] = await service.apply_pipeline_updates(
+        db_session,
+        [
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.COMPLETED,
+                result_url="https://example.com/result.png",
+                message="success",
+            )
+        ],
     )
 
-    assert updated is not None
     assert updated.status == PipelineStatus.COMPLETED
     assert updated.result_url == "https://example.com/result.png"
     assert updated.message == "success"
 
 
 @pytest.mark.asyncio
-async def test_update_pipeline_status_not_found(db_session):
-    result = await service.update_pipeline_status(
-        db=db_session,
-        pipeline_id=uuid4(),
-        status=PipelineStatus.COMPLETED,
+async def test_apply_pipeline_updates_skips_unknown_pipeline(db_session):
+    pipelines = await service.apply_pipeline_updates(
+        db_session,
+        [PipelineUpdate(pipeline_id=uuid4(), status=PipelineStatus.COMPLETED)],
     )
 
-    assert result is None
+    assert pipelines == []
 
 
 @pytest.mark.asyncio
-async def test_get_pipelines_by_ids(db_session):
-    pipeline_id_1 = uuid4()
-    pipeline_id_2 = uuid4()
-    trace_id = uuid4()
+async def test_apply_pipeline_updates_rejects_invalid_transition(db_session):
+    pipeline_id = uuid4()
 
-    await service.create_pipeline(db_session, pipeline_id_1, trace_id, "test1")
-    await service.create_pipeline(db_session, pipeline_id_2, trace_id, "test2")
+    await create_pipeline(db_session, pipeline_id, uuid4(), "test")
+    await service.apply_pipeline_updates(
+        db_session,
+        [PipelineUpdate(pipeline_id=pipeline_id, status=PipelineStatus.FAILED)],
+    )
 
-    pipelines = await service.get_pipelines_by_ids(
-        db=db_session,
-        pipeline_ids=[pipeline_id_1, pipeline_id_2],
+    pipelines = await service.apply_pipeline_updates(
+        db_session,
+        [PipelineUpdate(pipeline_id=pipeline_id, status=PipelineStatus.RUNNING)],
     )
 
-    assert len(pipelines) == 2
-    assert {p.id for p in pipelines} == {pipeline_id_1, pipeline_id_2}
+    assert pipelines == []
+    [pipeline] = await service.get_pipelines_by_ids(db_session, [pipeline_id])
+    assert pipeline.status == PipelineStatus.FAILED
 
 
 @pytest.mark.asyncio
-async def test_get_pipelines_by_ids_empty(db_session):
-    pipelines = await service.get_pipelines_by_ids(
-        db=db_session,
-        pipeline_ids=[uuid4()],
+async def test_apply_pipeline_updates_keeps_preview_after_completion(db_session):
+    pipeline_id = uuid4()
+
+    await create_pipeline(db_session, pipeline_id, uuid4(), "test")
+    await service.apply_pipeline_updates(
+        db_session,
+        [
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.PREVIEW,
+                preview_url="https://example.com/preview.jpg",
+            )
+        ],
+    )
+    updates = service.coalesce_pipeline_updates(
+        [
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.COMPLETED,
+                result_url="https://example.com/result.webp",
+            ),
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                status=PipelineStatus.PREVIEW,
+                preview_url="https://example.com/late.jpg",
+            ),
+        ]
     )
 
-    assert len(pipelines) == 0
+    [pipeline] = await service.apply_pipeline_updates(db_session, updates)
+
+    assert pipeline.status == PipelineStatus.COMPLETED
+    assert pipeline.result_url == "https://example.com/result.webp"
+    assert pipeline.preview_url == "https://example.com/preview.jpg"
+
+
+@pytest.mark.asyncio
+async def test_cancel_pipelines_keeps_finished_ones(db_session):
+    jobs = [
+        PipelineJobInput(pipeline_id=uuid4(), pipeline_name="recast", input={})
+        for _ in range(2)
+    ]
+    await service.create_pipelines(db=db_session, trace_id=uuid4(), jobs=jobs)
+    running, completed = (job.pipeline_id for job in jobs)
+    await service.apply_pipeline_updates(
+        db_session,
+        [
+            PipelineUpdate(
+                pipeline_id=completed, status=PipelineStatus.COMPLETED, result_url="url"
+            )
+        ],
+    )
+
+    cancelled = await service.cancel_pipelines(db_session, [running, completed])
+
+    assert [p.id for p in cancelled] == [running]
+    assert cancelled[0].status == PipelineStatus.CANCELLED
+
+    late = await service.apply_pipeline_updates(
+        db_session,
+        [PipelineUpdate(pipeline_id=running, status=PipelineStatus.COMPLETED)],
+    )
+    assert late == []
+
+
+@pytest.mark.asyncio
+async def test_handle_pipeline_updates_logs_with_pipeline_context(mocker):
+    pipeline_id = uuid4()
+    seen = []
+
+    def record(msg):
+        seen.append((msg, context_trace_id.get(), context_pipeline_id.get()))
+
+    mocker.patch.object(consumer.log, "info", side_effect=record)
+    mocker.patch.object(consumer, "async_session_maker", mocker.MagicMock())
+    mocker.patch.object(consumer.service, "apply_pipeline_updates", return_value=[])
+    mocker.patch.object(consumer.cache, "cache_pipeline_statuses")
+    mocker.patch.object(consumer.events, "publish_pipeline_statuses")
+
+    await consumer.handle_pipeline_updates(
+        [
+            PipelineUpdate(
+                pipeline_id=pipeline_id,
+                trace_id="trace-1",
+                status=PipelineStatus.RUNNING,
+            )
+        ]
+    )
+
+    assert (
+        "Received pipeline update: status=RUNNING",
+        "trace-1",
+        str(pipeline_id),
+    ) in seen
+    assert context_trace_id.get() is None
+    assert context_pipeline_id.get() is None
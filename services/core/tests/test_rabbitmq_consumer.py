@@ -0,0 +1,199 @@
+import asyncio
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from services.common.rabbitmq import RabbitMQConsumer
+
+
+class FakeChannel:
+    # settles delivery tags like the broker and fails on a double settle
+    def __init__(self):
+        self.delivered = 0
+        self.outstanding: list[int] = []
+        self.acked: list[int] = []
+        self.requeued: list[int] = []
+        self.rejected: list[int] = []
+
+    def settle(self, tag: int, multiple: bool, into: list[int]) -> None:
+        if tag not in self.outstanding:
+            raise RuntimeError(f"PRECONDITION_FAILED - unknown delivery tag {tag}")
+        tags = [t for t in self.outstanding if t <= tag] if multiple else [tag]
+        self.outstanding = [t for t in self.outstanding if t not in tags]
+        into.extend(tags)
+
+    async def set_qos(self, prefetch_count: int) -> None:
+        pass
+
+    async def get_queue(self, name: str):
+        return self.queue
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, body: bytes):
+        channel.delivered += 1
+        self.channel = channel
+        self.tag = channel.delivered
+        self.body = body
+        channel.outstanding.append(self.tag)
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.channel.settle(self.tag, multiple, self.channel.acked)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self.channel.settle(self.tag, multiple, self.channel.requeued)
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.channel.settle(self.tag, False, self.channel.rejected)
+
+
+class FakeQueue:
+    def __init__(self):
+        self.on_message = None
+
+    async def consume(self, callback) -> None:
+        self.on_message = callback
+
+
+class Update(BaseModel):
+    pipeline_id: str
+
+
+@pytest.fixture
+def channel(mocker):
+    channel = FakeChannel()
+    channel.queue = FakeQueue()
+    return channel
+
+
+@pytest.fixture
+def consumer(mocker, channel):
+    connection = mocker.MagicMock()
+    connection.connection.channel = mocker.AsyncMock(return_value=channel)
+    return RabbitMQConsumer(connection, mocker.MagicMock())
+
+
+async def start(consumer, callback, **kwargs) -> FakeQueue:
+    await consumer.consume_batch("updates", callback, **kwargs)
+    queue = consumer._batch_channel.queue
+    while queue.on_message is None:
+        await asyncio.sleep(0)
+    return queue
+
+
+async def deliver(queue: FakeQueue, channel: FakeChannel, bodies: list) -> None:
+    # aio-pika runs the handler of every delivery concurrently
+    await asyncio.gather(
+        *(
+            queue.on_message(
+                FakeMessage(
+                    channel,
+                    body if isinstance(body, bytes) else json.dumps(body).encode(),
+                )
+            )
+            for body in bodies
+        )
+    )
+
+
+async def drain(consumer) -> None:
+    while consumer._background_tasks:
+        await asyncio.gather(*consumer._background_tasks)
+
+
+async def test_full_batch_is_flushed_at_once(consumer, channel, mocker):
+    callback = mocker.AsyncMock()
+    queue = await start(consumer, callback, max_batch_size=3, max_wait_ms=200)
+
+    await deliver(queue, channel, [{"n": i} for i in range(3)])
+    await asyncio.sleep(0.01)
+
+    callback.assert_awaited_once_with([{"n": 0}, {"n": 1}, {"n": 2}])
+    assert channel.acked == [1, 2, 3]
+    await consumer.stop()
+
+
+async def test_partial_batch_is_flushed_after_wait(consumer, channel, mocker):
+    callback = mocker.AsyncMock()
+    queue = await start(consumer, callback, max_batch_size=10, max_wait_ms=10)
+
+    await deliver(queue, channel, [{"n": 0}, {"n": 1}])
+    callback.assert_not_awaited()
+    await drain(consumer)
+
+    callback.assert_awaited_once_with([{"n": 0}, {"n": 1}])
+    assert channel.acked == [1, 2]
+    await consumer.stop()
+
+
+async def test_failed_batch_is_requeued(consumer, channel, mocker):
+    callback = mocker.AsyncMock(side_effect=ConnectionError("db down"))
+    queue = await start(consumer, callback, max_batch_size=2, max_wait_ms=10)
+
+    await deliver(queue, channel, [{"n": 0}, {"n": 1}])
+    await drain(consumer)
+
+    assert channel.requeued == [1, 2]
+    assert channel.acked == []
+    await consumer.stop()
+
+
+async def test_malformed_message_is_settled_once(consumer, channel, mocker):
+    callback = mocker.AsyncMock()
+    queue = await start(consumer, callback, max_batch_size=10, max_wait_ms=10)
+
+    await deliver(queue, channel, [{"n": 0}, b"not json", {"n": 1}, {"n": 2}])
+    await drain(consumer)
+
+    callback.assert_awaited_once_with([{"n": 0}, {"n": 1}, {"n": 2}])
+    assert channel.rejected == [2]
+    assert sorted(channel.acked) == [1, 3, 4]
+    await consumer.stop()
+
+
+async def test_invalid_messages_are_dropped_alone(consumer, channel, mocker):
+    callback = mocker.AsyncMock()
+    queue = await start(
+        consumer,
+        callback,
+        max_batch_size=10,
+        max_wait_ms=10,
+        validate=Update.model_validate,
+    )
+
+    await deliver(
+        queue,
+        channel,
+        [
+            {"pipeline_id": "a"},
+            b"not json",
+            {"pipeline_id": "b"},
+            {"status": "no pipeline id"},
+            {"pipeline_id": "c"},
+        ],
+    )
+    await drain(consumer)
+
+    callback.assert_awaited_once_with(
+        [Update(pipeline_id="a"), Update(pipeline_id="b"), Update(pipeline_id="c")]
+    )
+    assert channel.rejected == [2, 4]
+    assert sorted(channel.acked) == [1, 3, 5]
+    assert channel.outstanding == []
+    await consumer.stop()
+
+
+async def test_batch_of_only_invalid_messages_skips_callback(consumer, channel, mocker):
+    callback = mocker.AsyncMock()
+    queue = await start(consumer, callback, max_batch_size=2, max_wait_ms=10)
+
+    await deliver(queue, channel, [b"{", b"}"])
+    await drain(consumer)
+
+    callback.assert_not_awaited()
+    assert channel.rejected == [1, 2]
+    await consumer.stop()
@@ -0,0 +1,154 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from services.common.database import get_db
+from services.core.app.recast import cache, service
+from services.core.app.recast.models import RecastTemplate
+from services.core.app.recast.schemas import RecastTemplateRead
+from services.core.main import app
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value if isinstance(value, bytes) else str(value)
+        return True
+
+    async def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+
+@pytest.fixture
+def fake_redis(mocker):
+    redis_client = FakeRedis()
+    mocker.patch.object(
+        cache, "get_redis_client", mocker.AsyncMock(return_value=redis_client)
+    )
+    mocker.patch.object(cache, "_local_index", None)
+    return redis_client
+
+
+@pytest.fixture
+async def client(db_session):
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        yield ac
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+async def templates(db_session):
+    templates = [
+        RecastTemplate(name=f"Template {i}", url=f"https://example.com/{i}.jpg")
+        for i in range(5)
+    ]
+    db_session.add_all(templates)
+    await db_session.commit()
+    return templates
+
+
+@pytest.mark.asyncio
+async def test_load_template_index_reads_db_once(
+    db_session, templates, fake_redis, mocker
+):
+    get_all = mocker.spy(service, "get_all_templates")
+
+    first = await cache.load_template_index(db_session)
+    mocker.patch.object(cache, "_local_index", None)
+    second = await cache.load_template_index(db_session)
+
+    assert get_all.call_count == 1
+    assert first.digest == second.digest
+    assert sorted(first.by_id) == [t.id for t in templates]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_templates_bumps_version(db_session, templates, fake_redis):
+    first = await cache.load_template_index(db_session)
+
+    await cache.invalidate_templates()
+    second = await cache.load_template_index(db_session)
+
+    assert second.version != first.version
+
+
+def test_render_is_stable_per_seed():
+    index = cache.TemplateIndex.from_fragments(
+        "1", [f'{{"id":{i}}}'.encode() for i in range(20)]
+    )
+
+    assert index.render("a") == index.render("a")
+    assert index.etag("a") != index.etag("b")
+    assert sorted(index.render("a")) == sorted(index.render("b"))
+
+
+@pytest.mark.asyncio
+async def test_get_templates_not_modified(db_session, templates, fake_redis, client):
+    await cache.load_template_index(db_session)
+
+    response = await client.get("/api/v1/recast/templates", params={"seed": "s"})
+    assert response.status_code == 200
+    assert len(response.json()) == len(templates)
+
+    cached = await client.get(
+        "/api/v1/recast/templates",
+        params={"seed": "s"},
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+
+    single = await client.get(f"/api/v1/recast/templates/{templates[0].id}")
+    assert single.json()["url"] == templates[0].url
+
+    missing = await client.get("/api/v1/recast/templates/999")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_template_miss_is_served_from_index(
+    db_session, templates, fake_redis, client, mocker
+):
+    await cache.load_template_index(db_session)
+    added = RecastTemplate(name="New", url="https://example.com/new.jpg")
+    db_session.add(added)
+    await db_session.commit()
+    get_all = mocker.spy(service, "get_all_templates")
+
+    missing = await client.get(f"/api/v1/recast/templates/{added.id}")
+    assert missing.status_code == 404
+    get_all.assert_not_called()
+
+    await cache.invalidate_templates()
+    found = await client.get(f"/api/v1/recast/templates/{added.id}")
+    assert found.status_code == 200
+    assert found.json()["url"] == added.url
+
+
+@pytest.mark.asyncio
+async def test_redis_index_keeps_serialized_bytes(db_session, fake_redis):
+    template = RecastTemplate(name="Café ☕", url="https://example.com/cafe.jpg")
+    db_session.add(template)
+    await db_session.commit()
+
+    first = await cache.load_template_index(db_session)
+    reloaded = cache.TemplateIndex.from_fragments(
+        first.version, await cache._load_from_redis(first.version)
+    )
+
+    expected = RecastTemplateRead.model_validate(template).model_dump_json().encode()
+    assert first.by_id[template.id] == expected
+    assert reloaded.by_id[template.id] == expected
+    assert reloaded.etag() == first.etag()
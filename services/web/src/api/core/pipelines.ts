@@ -19,11 +19,23 @@ export interface QueuePipelinesResponse {
 
 export interface PipelineStatusItem {
   id: string;
-  status: "PENDING" | "RUNNING" | "COMPLETED" | "FAILED";
+  status:
+    | "PENDING"
+    | "RUNNING"
+    | "PREVIEW"
+    | "COMPLETED"
+    | "FAILED"
+    | "EXPIRED"
+    | "CANCELLED";
   result_url?: string | null;
+  preview_url?: string | null;
   message?: string | null;
 }
 
+// expired and cancelled jobs were dropped unfinished, they end like failed ones
+export const isFailedStatus = (status: PipelineStatusItem["status"]) =>
+  status === "FAILED" || status === "EXPIRED" || status === "CANCELLED";
+
 export interface PipelineStatusResponse {
   pipelines: PipelineStatusItem[];
 }
@@ -40,5 +52,11 @@ export const pipelinesApi = {
       pipeline_ids: pipelineIds,
     });
   },
+
+  cancel: async (pipelineIds: string[]): Promise<PipelineStatusResponse> => {
+    return apiClient.post<PipelineStatusResponse>("/pipelines/cancel", {
+      pipeline_ids: pipelineIds,
+    });
+  },
 };
 
@@ -1,6 +1,6 @@
 export { apiClient, ApiError } from "./client";
 export { recastApi } from "./core/recast";
-export { pipelinesApi } from "./core/pipelines";
+export { pipelinesApi, isFailedStatus } from "./core/pipelines";
 export type { RecastTemplateRead } from "./types/core";
 export type {
   PipelineJobInput,
@@ -3,7 +3,7 @@ import { useLocation, useNavigate } from "react-router-dom";
 import { Button } from "@/components/ui/button";
 import { Sparkles, ArrowLeft } from "lucide-react";
 import type { RecastTemplateRead } from "@/api";
-import { pipelinesApi, type PipelineStatusItem, ApiError } from "@/api";
+import { pipelinesApi, isFailedStatus, type PipelineStatusItem, ApiError } from "@/api";
 import { uploadToS3, parseS3Url, getFileExtension } from "@/lib/s3";
 import UploadDropzone from "@/components/UploadDropzone";
 import GenerationCard from "@/components/GenerationCard";
@@ -117,6 +117,7 @@ const FaceFusionGenerate = () => {
   const hasTriggeredAutoGenerate = useRef(false);
   const generationStartTime = useRef<number | null>(null);
   const isMountedRef = useRef(true);
+  const unfinishedPipelineIdsRef = useRef<string[]>([]);
 
   const clearPolling = useCallback(() => {
     if (pollingIntervalRef.current) {
@@ -147,10 +148,10 @@ const FaceFusionGenerate = () => {
       
       for (const pipeline of response.pipelines) {
         statusMap.set(pipeline.id, pipeline);
-        if (pipeline.status !== "COMPLETED" && pipeline.status !== "FAILED") {
+        if (pipeline.status !== "COMPLETED" && !isFailedStatus(pipeline.status)) {
           allCompleted = false;
         }
-        if (pipeline.status === "FAILED") {
+        if (isFailedStatus(pipeline.status)) {
           hasFailures = true;
           const errorMsg = pipeline.message || "Unknown error";
           console.error(`Pipeline ${pipeline.id} failed:`, errorMsg);
@@ -173,7 +174,7 @@ const FaceFusionGenerate = () => {
                 duration_seconds: duration 
               } 
             });
-          } else if (pipeline.status === "FAILED") {
+          } else if (isFailedStatus(pipeline.status)) {
             track({ 
               name: 'generation_failed', 
               params: { 
@@ -191,6 +192,7 @@ const FaceFusionGenerate = () => {
       
       if (allCompleted) {
         console.log("All pipelines completed, clearing polling");
+        unfinishedPipelineIdsRef.current = [];
         setIsProcessing(false);
         clearPolling();
         return;
@@ -233,6 +235,7 @@ const FaceFusionGenerate = () => {
 
       const generatedPipelineIds = jobs.map(job => job.pipeline_id);
       setPipelineIds(generatedPipelineIds);
+      unfinishedPipelineIdsRef.current = generatedPipelineIds;
 
       const response = await pipelinesApi.queuePipelines({
         trace_id: traceId,
@@ -277,6 +280,7 @@ const FaceFusionGenerate = () => {
       clearPolling();
       setIsProcessing(false);
       setPipelineIds([]);
+      unfinishedPipelineIdsRef.current = [];
     }
   }, [selectedTemplates, pollPipelineStatuses, clearPolling]);
 
@@ -378,6 +382,13 @@ const FaceFusionGenerate = () => {
     return () => {
       isMountedRef.current = false;
       clearPolling();
+      // nobody is left to see these results, free the workers
+      if (unfinishedPipelineIdsRef.current.length > 0) {
+        pipelinesApi.cancel(unfinishedPipelineIdsRef.current).catch((error) => {
+          console.error("Failed to cancel pipelines:", error);
+        });
+        unfinishedPipelineIdsRef.current = [];
+      }
       window.removeEventListener('beforeunload', handleBeforeUnload);
     };
   }, [clearPolling]);
@@ -411,7 +422,7 @@ const FaceFusionGenerate = () => {
     let count = 0;
     pipelineIds.forEach((pipelineId) => {
       const status = pipelineStatuses.get(pipelineId);
-      if (status && (status.status === "COMPLETED" || status.status === "FAILED")) {
+      if (status && (status.status === "COMPLETED" || isFailedStatus(status.status))) {
         count++;
       }
     });
@@ -482,8 +493,10 @@ const FaceFusionGenerate = () => {
                 const pipelineId = pipelineIds[index];
                 const status = pipelineId ? pipelineStatuses.get(pipelineId) : null;
                 const isCardProcessing = pipelineId ? (!status || status.status === "RUNNING" || status.status === "PENDING") : false;
-                const generatedImage = status?.status === "COMPLETED" ? status.result_url : null;
-                const cardErrorMessage = status?.status === "FAILED" ? status.message : null;
+                const generatedImage = status?.status === "COMPLETED"
+                  ? status.result_url
+                  : status?.status === "PREVIEW" ? status.preview_url : null;
+                const cardErrorMessage = status && isFailedStatus(status.status) ? status.message : null;
 
                 return (
                   <GenerationCard
@@ -535,7 +548,7 @@ const FaceFusionGenerate = () => {
             <div className="flex justify-center gap-4 animate-fade-in">
               <Button
                 onClick={() => {
-                  const hasErrors = Array.from(pipelineStatuses.values()).some(s => s.status === "FAILED");
+                  const hasErrors = Array.from(pipelineStatuses.values()).some(s => isFailedStatus(s.status));
                   track({ 
                     name: 'try_other_templates_clicked', 
                     params: { from_status: hasErrors ? 'error' : 'success' } 